@@ -0,0 +1,69 @@
+"""
+Times ``flatten_dict``, ``iter_flattened`` and ``unflatten_dict`` on synthetic nested dictionaries,
+to show how they scale with nesting depth and number of keys. The original recursive implementation
+of ``flatten_dict`` is included for comparison.
+
+    python benchmarks/flatten.py --keys 1000 10000 100000 --depths 1 4 16
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clickfig.base import flatten_dict, iter_flattened, unflatten_dict  # noqa: E402
+
+from generate import make_nested  # noqa: E402
+
+
+def legacy_flatten_dict(dictionary, separator="."):
+    """
+    The recursive implementation that ``flatten_dict`` replaced, which copies each level into a new dict.
+    """
+    result = {}
+    for key, value in dictionary.items():
+        if not isinstance(value, dict):
+            result[key] = value
+        else:
+            result.update(legacy_flatten_dict({"{}{}{}".format(key, separator, x): y
+                                               for x, y in value.items()
+                                               }))
+
+    return result
+
+
+def best_of(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("{:>8} {:>6} {:>14} {:>14} {:>14} {:>14}".format(
+        "keys", "depth", "legacy (ms)", "flatten (ms)", "iter (ms)", "unflatten (ms)"))
+
+    for num_keys in args.keys:
+        for depth in args.depths:
+            nested = make_nested(num_keys, depth)
+            flat = flatten_dict(nested)
+
+            timings = [
+                best_of(lambda: legacy_flatten_dict(nested), args.repeat),
+                best_of(lambda: flatten_dict(nested), args.repeat),
+                best_of(lambda: sum(1 for _ in iter_flattened(nested, as_tuples=True)), args.repeat),
+                best_of(lambda: unflatten_dict(flat), args.repeat),
+            ]
+
+            print("{:>8} {:>6} {:>14.2f} {:>14.2f} {:>14.2f} {:>14.2f}".format(
+                num_keys, depth, *[t * 1000 for t in timings]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Generates synthetic config files for benchmarking: any number of keys, at any nesting depth, in INI, JSON or
+Python format, spread over one or more levels.
+
+    python benchmarks/generate.py --format json --keys 100000 --depth 4 --levels 3 --dir /tmp/configs
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clickfig.base import unflatten_dict  # noqa: E402
+
+FORMATS = ["ini", "json", "python"]
+
+EXTENSIONS = {"ini": "ini", "json": "json", "python": "py"}
+
+
+def make_keys(num_keys, depth, fanout=10):
+    """
+    :param int num_keys: The number of leaf keys.
+    :param int depth: The number of parts in each key.
+    :param int fanout: The number of children of each nested dict (other than the last level).
+    :return: ``num_keys`` distinct keys, each with ``depth`` parts. Every part is a valid Python identifier.
+    :rtype: list[str]
+    """
+    keys = []
+
+    for i in range(num_keys):
+        parts = []
+        n = i
+        for _ in range(depth - 1):
+            parts.append("k{}".format(n % fanout))
+            n //= fanout
+        parts.append("leaf{}".format(i))
+        keys.append(".".join(parts))
+
+    return keys
+
+
+def make_nested(num_keys, depth, fanout=10):
+    """
+    :return: A nested dict with ``num_keys`` leaves, each ``depth`` levels down (see ``make_keys``).
+    :rtype: dict
+    """
+    return unflatten_dict({key: i for i, key in enumerate(make_keys(num_keys, depth, fanout))})
+
+
+def format_depth(format_, depth):
+    """
+    :return: The depth that's actually used for a format: INI files always have exactly two (section and option).
+    :rtype: int
+    """
+    return 2 if format_ == "ini" else depth
+
+
+def write_config(name, format_, values):
+    """
+    Writes a config file.
+
+    :param str name: The path of the file.
+    :param str format_: One of ``FORMATS``.
+    :param dict values: Maps (flat) keys to values. For INI files, every key must have exactly two parts.
+    """
+    tree = unflatten_dict(values)
+
+    with open(name, "w") as f:
+        if format_ == "json":
+            json.dump(tree, f, indent=4)
+
+        elif format_ == "ini":
+            for section, options in tree.items():
+                f.write("[{}]\n".format(section))
+                for option, value in options.items():
+                    f.write("{} = {}\n".format(option, value))
+                f.write("\n")
+
+        elif format_ == "python":
+            for name_, value in tree.items():
+                f.write("{} = {!r}\n".format(name_, value))
+
+        else:
+            raise ValueError("Unknown format: {}".format(format_))
+
+
+def make_levels(directory, format_, num_keys, depth, levels):
+    """
+    Writes the files for a config with ``levels`` levels. The lowest-precedence level has every key, and
+    each level above it overrides a smaller share of them (level ``i`` of ``n`` has every ``(n - i)``-th key).
+
+    :param str directory: Where to put the files.
+    :param str format_: One of ``FORMATS``.
+    :param int num_keys: The number of distinct keys.
+    :param int depth: The number of parts in each key (always 2 for INI).
+    :param int levels: The number of levels.
+    :return: The file specs to pass to :class:`clickfig.Config`, in order of precedence, and the keys.
+    :rtype: tuple[list[dict], list[str]]
+    """
+    keys = make_keys(num_keys, format_depth(format_, depth))
+    files = []
+
+    for level in range(levels):
+        step = levels - level
+        name = os.path.join(directory, "level{}.{}".format(level, EXTENSIONS[format_]))
+
+        write_config(name, format_, {key: "value{}-{}".format(i, level)
+                                     for i, key in enumerate(keys) if i % step == 0})
+
+        files.append({"name": name, "level": "level{}".format(level), "type": format_})
+
+    return files, keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--levels", type=int, default=1)
+    parser.add_argument("--dir", default=".")
+    args = parser.parse_args()
+
+    files, _ = make_levels(args.dir, args.format, args.keys, args.depth, args.levels)
+
+    for f in files:
+        print(f["name"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Measures how long ``import clickfig`` takes in a fresh interpreter, both as reported by
+``python -X importtime`` and as wall-clock start-up time (relative to an interpreter that imports nothing).
+
+Run from anywhere::
+
+    python benchmarks/import_time.py --runs 20 --max-ms 25
+
+If ``--max-ms`` is given, the script exits with a non-zero status when the median import time
+exceeds it, so that it can be used to catch import-time regressions.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_python(code, importtime=False):
+    """
+    :param str code: The code to run in a fresh interpreter.
+    :param bool importtime: Whether or not to run with ``-X importtime``.
+    :return: The wall-clock time (in seconds) and the captured stderr.
+    :rtype: tuple
+    """
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    args += ["-c", code]
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+
+    start = time.perf_counter()
+    process = subprocess.run(args, env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+    return time.perf_counter() - start, process.stderr
+
+
+def parse_importtime(stderr):
+    """
+    :param str stderr: The output of ``python -X importtime``.
+    :return: A dict mapping each imported module to its (self, cumulative) import time in microseconds.
+    :rtype: dict
+    """
+    result = {}
+
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            result[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+
+    return result
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+
+    if len(values) % 2:
+        return values[middle]
+
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="clickfig", help="The module to import (default: clickfig)")
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if the median import time exceeds this many milliseconds")
+    args = parser.parse_args()
+
+    statement = "import {}".format(args.module)
+
+    # Once up front, so that the timed runs don't include writing out bytecode.
+    run_python(statement)
+
+    import_times = []
+    start_up_times = []
+    modules = {}
+
+    for _ in range(args.runs):
+        _, stderr = run_python(statement, importtime=True)
+        modules = parse_importtime(stderr)
+        import_times.append(modules[args.module][1] / 1000.0)
+
+        baseline, _ = run_python("pass")
+        elapsed, _ = run_python(statement)
+        start_up_times.append((elapsed - baseline) * 1000.0)
+
+    print("import {}: median {:.2f} ms (min {:.2f} ms, max {:.2f} ms) over {} runs".format(
+        args.module, median(import_times), min(import_times), max(import_times), args.runs))
+    print("cold start overhead: median {:.2f} ms".format(median(start_up_times)))
+
+    print("\nslowest imports (self time, last run):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda x: -x[1][0])[:args.top]:
+        print("  {:>8.2f} ms  {:>8.2f} ms cumulative  {}".format(self_us / 1000.0, cumulative_us / 1000.0, name))
+
+    if args.max_ms is not None and median(import_times) > args.max_ms:
+        print("\nFAIL: median import time {:.2f} ms exceeds {:.2f} ms".format(median(import_times), args.max_ms))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
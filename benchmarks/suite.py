@@ -0,0 +1,306 @@
+"""
+Times the main operations of clickfig on generated configs (see ``generate.py``) across formats, sizes,
+nesting depths and numbers of levels, records their peak memory use with ``tracemalloc``, and compares the
+results against a saved baseline.
+
+    python benchmarks/suite.py --quick --save quick
+    python benchmarks/suite.py --quick --compare quick --threshold 0.25
+    python benchmarks/suite.py --large --compare large
+
+Baselines are kept in ``benchmarks/baselines`` (or anywhere else, given a path ending in ``.json``). With
+``--compare``, the script exits with a non-zero status if any benchmark got slower (or used more memory) than
+its baseline by more than ``--threshold``. Timings depend on the machine, so baselines should be saved on
+the same machine that they're compared on.
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import click  # noqa: E402
+from click.testing import CliRunner  # noqa: E402
+
+import clickfig  # noqa: E402
+from clickfig.base import flatten_dict  # noqa: E402
+
+from generate import FORMATS, format_depth, make_levels  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Keyed reads are timed in batches of this many, since a single one is too quick to time reliably.
+READS_PER_SAMPLE = 1000
+
+# The number of keys written or unset by the bulk benchmarks.
+BULK_KEYS = 100
+
+# Timings shorter than this (in seconds) are too noisy to count as regressions.
+NOISE_FLOOR = 0.0005
+
+PRESETS = {
+    "quick": {"keys": [10, 1000], "depths": [2], "levels": [1, 4]},
+    "default": {"keys": [10, 1000, 100000], "depths": [2, 4], "levels": [1, 8]},
+    # Files above the default partial parse threshold, so cold keyed reads parse them partially.
+    "large": {"keys": [100000], "depths": [2], "levels": [1, 4]},
+    "full": {"keys": [10, 1000, 100000, 1000000], "depths": [2, 4, 8], "levels": [1, 2, 4, 8]},
+}
+
+
+class Benchmark(object):
+    """
+    A single operation to time. ``setup`` runs before every sample (untimed), and returns the argument
+    passed to ``run``. Times are reported per operation, ie divided by ``operations``.
+    """
+
+    def __init__(self, name, setup, run, operations=1):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.operations = operations
+
+
+def make_benchmarks(files, keys):
+    """
+    :param list[dict] files: The file specs of the config.
+    :param list[str] keys: Every key in the config.
+    :return: The benchmarks for a single config.
+    :rtype: list[Benchmark]
+    """
+    step = max(1, len(keys) // READS_PER_SAMPLE)
+    read_keys = (keys[::step] * READS_PER_SAMPLE)[:READS_PER_SAMPLE]
+    bulk_keys = keys[:BULK_KEYS]
+    originals = {}
+
+    def new_config():
+        return clickfig.Config([dict(f) for f in files], verbose=False)
+
+    def restored_config():
+        # Writes and unsets change the files, so each sample starts again from the originals.
+        for f in files:
+            if f["name"] not in originals:
+                with open(f["name"]) as original:
+                    originals[f["name"]] = original.read()
+
+            with open(f["name"], "w") as out:
+                out.write(originals[f["name"]])
+
+        return new_config()
+
+    def loaded_config():
+        cfg = new_config()
+        cfg.read(key=keys[0])
+        return cfg
+
+    def keyed_reads(cfg):
+        for key in read_keys:
+            cfg.read(key=key)
+
+    def cli(cfg):
+        group = click.Group("main")
+        clickfig.attach(group, cfg)
+        return group
+
+    def invoke(group):
+        result = CliRunner().invoke(group, ["config", keys[-1]])
+        assert result.exit_code == 0, result.output
+
+    benchmarks = [
+        Benchmark("construct", lambda: None, lambda _: new_config()),
+        Benchmark("cold_keyed_read", new_config, lambda cfg: cfg.read(key=keys[-1])),
+        # The second key read from a config, which loads it in full if the first was a partial parse.
+        Benchmark("second_keyed_read", loaded_config, lambda cfg: cfg.read(key=keys[-1])),
+        Benchmark("keyed_read", loaded_config, keyed_reads, operations=len(read_keys)),
+        Benchmark("full_read", new_config, lambda cfg: cfg.read()),
+        Benchmark("flatten_dict", lambda: loaded_config().config_files[-1].read(flatten=False).data, flatten_dict),
+        Benchmark("cli_read", lambda: cli(new_config()), invoke),
+    ]
+
+    if files[0]["type"] != "python":
+        benchmarks += [
+            Benchmark("write", restored_config, lambda cfg: cfg.write(keys[0], "changed", level=files[0]["level"])),
+            Benchmark("bulk_write", restored_config,
+                      lambda cfg: cfg.update(dict((key, "changed") for key in bulk_keys), level=files[0]["level"])),
+            Benchmark("unset", restored_config, lambda cfg: cfg.unset(keys[0], level=files[-1]["level"])),
+            Benchmark("bulk_unset", restored_config, lambda cfg: cfg.unset_many(bulk_keys, level=files[-1]["level"])),
+        ]
+
+    return benchmarks
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+
+    if len(values) % 2:
+        return values[middle]
+
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def measure(benchmark, repeat):
+    """
+    :return: The median time per operation (in seconds), and the peak memory allocated by a single run
+     (in KiB, as measured by ``tracemalloc``).
+    :rtype: tuple[float, float]
+    """
+    timings = []
+
+    for _ in range(repeat):
+        argument = benchmark.setup()
+        gc.collect()
+
+        start = time.perf_counter()
+        benchmark.run(argument)
+        timings.append((time.perf_counter() - start) / benchmark.operations)
+
+    # Memory is measured in a separate run, since tracing slows everything down.
+    argument = benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        benchmark.run(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return median(timings), peak / 1024.0
+
+
+def run_suite(formats, key_counts, depths, level_counts, repeat, only=None):
+    """
+    :return: Maps the name of each benchmark (``format/keys/depth/levels/operation``) to its results.
+    :rtype: dict
+    """
+    results = {}
+
+    for format_ in formats:
+        for num_keys in key_counts:
+            # INI files always have a depth of 2, so there's no point in running them at any other.
+            for depth in sorted(set(format_depth(format_, depth) for depth in depths)):
+                for levels in level_counts:
+                    directory = tempfile.mkdtemp(prefix="clickfig-bench-")
+
+                    try:
+                        files, keys = make_levels(directory, format_, num_keys, depth, levels)
+
+                        for benchmark in make_benchmarks(files, keys):
+                            if only and benchmark.name not in only:
+                                continue
+
+                            name = "{}/{}/{}/{}/{}".format(format_, num_keys, depth, levels, benchmark.name)
+                            seconds, peak_kib = measure(benchmark, repeat)
+                            results[name] = {"seconds": seconds, "peak_kib": peak_kib}
+
+                            print("{:<45} {:>12.3f} ms {:>12.1f} KiB".format(name, seconds * 1000, peak_kib))
+                            sys.stdout.flush()
+                    finally:
+                        shutil.rmtree(directory)
+
+    return results
+
+
+def baseline_path(name):
+    if name.endswith(".json"):
+        return name
+
+    return os.path.join(BASELINE_DIR, "{}.json".format(name))
+
+
+def save_baseline(name, results):
+    path = baseline_path(name)
+
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+
+    with open(path, "w") as f:
+        json.dump({
+            "clickfig": clickfig.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results
+        }, f, indent=2, sort_keys=True)
+
+    print("\nSaved baseline to {}".format(path))
+
+
+def compare(results, baseline, threshold, noise_floor=NOISE_FLOOR):
+    """
+    :param dict results: The results of this run.
+    :param dict baseline: The results of the baseline run.
+    :param float threshold: The fraction by which a result may exceed its baseline.
+    :param float noise_floor: Timings below this (in seconds) aren't counted as regressions.
+    :return: A description of each regression.
+    :rtype: list[str]
+    """
+    regressions = []
+
+    for name in sorted(set(results) & set(baseline)):
+        new, old = results[name], baseline[name]
+
+        if new["seconds"] > old["seconds"] * (1 + threshold) and new["seconds"] > noise_floor:
+            regressions.append("{}: {:.3f} ms vs {:.3f} ms".format(name, new["seconds"] * 1000, old["seconds"] * 1000))
+
+        if new["peak_kib"] > old["peak_kib"] * (1 + threshold) and new["peak_kib"] - old["peak_kib"] > 64:
+            regressions.append("{}: peak {:.1f} KiB vs {:.1f} KiB".format(name, new["peak_kib"], old["peak_kib"]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--keys", type=int, nargs="+", help="Numbers of keys (overrides the preset)")
+    parser.add_argument("--depths", type=int, nargs="+", help="Nesting depths (overrides the preset)")
+    parser.add_argument("--levels", type=int, nargs="+", help="Numbers of levels (overrides the preset)")
+    parser.add_argument("--quick", action="store_const", dest="preset", const="quick",
+                        help="Only small configs")
+    parser.add_argument("--large", action="store_const", dest="preset", const="large",
+                        help="Only configs big enough to be parsed partially")
+    parser.add_argument("--full", action="store_const", dest="preset", const="full",
+                        help="Everything, up to a million keys")
+    parser.add_argument("--only", nargs="+", help="Only run these operations (eg keyed_read write)")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs of each benchmark")
+    parser.add_argument("--save", metavar="BASELINE", help="Save the results as a baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare the results against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail if a result is this much worse than its baseline (default: 0.25, ie 25%%)")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset or "default"]
+
+    results = run_suite(args.formats, args.keys or preset["keys"], args.depths or preset["depths"],
+                        args.levels or preset["levels"], args.repeat, only=args.only)
+
+    if args.save:
+        save_baseline(args.save, results)
+
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = compare(results, baseline, args.threshold)
+
+        if regressions:
+            print("\nFAIL: {} regression(s) beyond {:.0%}:".format(len(regressions), args.threshold))
+            for regression in regressions:
+                print("  " + regression)
+            return 1
+
+        print("\nNo regressions beyond {:.0%} (compared {} results)".format(
+            args.threshold, len(set(results) & set(baseline))))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
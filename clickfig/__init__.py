@@ -2,6 +2,8 @@ from . import config
 from .version import __version__
 from .attach import attach
 from .config import Config
+from .schema import Field, Schema
+from .stats import StatsHook
 
 
 
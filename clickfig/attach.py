@@ -1,4 +1,31 @@
-import click
+# The number of lines written to stdout at a time by the config command.
+STREAM_CHUNK_LINES = 1000
+
+
+def echo_lines(read_results, chunk_lines=STREAM_CHUNK_LINES):
+    """
+    Streams the lines of ``read_results`` to stdout in chunks, so that output starts right away
+    and the whole dump is never held in memory as one string.
+
+    :param list read_results: A list of :class:`ConfigReadResult` objects (or ``None``).
+    :param int chunk_lines: The number of lines to write at a time.
+    """
+    import click
+
+    chunk = []
+
+    for read_result in read_results:
+        lines = read_result.iter_lines() if read_result is not None else [str(read_result)]
+
+        for line in lines:
+            chunk.append(line)
+
+            if len(chunk) >= chunk_lines:
+                click.echo("\n".join(chunk))
+                chunk = []
+
+    if chunk:
+        click.echo("\n".join(chunk))
 
 
 def attach(group, config, command_name="config"):
@@ -10,6 +37,8 @@ def attach(group, config, command_name="config"):
     :param clickfig.Config config: A configuration object.
     :param command_name:
     """
+    # Imported here rather than at the top of the module, so that importing clickfig doesn't import click.
+    import click
 
     if not isinstance(group, click.Group):
         raise ValueError("group must be a click.Group object (not {})".format(type(group)))
@@ -18,7 +47,18 @@ def attach(group, config, command_name="config"):
     @click.argument("key", required=False)
     @click.argument("value", required=False)
     @click.option("--unset", is_flag=True, default=False)
-    def config_cmd(key, value, unset, level=None):
+    @click.option("--stats", "show_stats", is_flag=True, default=False, hidden=True,
+                  help="Print the config's parse, read and write stats to stderr")
+    def config_cmd(key, value, unset, show_stats, level=None):
+        try:
+            run_config_cmd(key, value, unset, level)
+        finally:
+            if show_stats:
+                from .config.file.base import ConfigReadResult
+
+                click.echo(str(ConfigReadResult(config.stats_report(), key="stats")), err=True)
+
+    def run_config_cmd(key, value, unset, level):
 
         if level is None:
             obj = config
@@ -33,16 +73,19 @@ def attach(group, config, command_name="config"):
                 raise ValueError("Cannot unset without a key")
             else:
 
-                read_results = obj.read(key=key)
+                # Nested data is flattened lazily as it's printed, rather than up front.
+                read_results = obj.read(key=key, flatten=False)
                 if not isinstance(read_results, list):
                     read_results = [read_results]
 
-                print("\n".join([str(x) for x in read_results]))
+                echo_lines(read_results)
         else:
             obj.write(key, value)
 
-    if len(config.config_files) > 1:
-        for lvl in [f.get("level") for f in config.file]:
+    # Only the level names are needed here, so that a lazy config isn't loaded just
+    # by attaching it.
+    if len(config.levels) > 1:
+        for lvl in config.levels:
             config_cmd = click.option("--{}".format(lvl), "level",
                                       flag_value=lvl)(config_cmd)
 
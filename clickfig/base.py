@@ -1,7 +1,7 @@
-import dpath
 from collections import OrderedDict
 
-from .exception import KeyNotFoundException
+from .exception import KeysNotFoundException
+from .path import ESCAPE, escape_part, get_path, split_key
 
 __config_types__ = [
     "ini",
@@ -9,6 +9,14 @@ __config_types__ = [
     "python"
 ]
 
+# Used to tell "no default given" apart from a default of None.
+_missing = object()
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
 
 def merge_dicts(*dict_args):
     """
@@ -44,48 +52,165 @@ def return_key_value(data, key=None):
     if key is None:
         return data
     else:
+        return get_path(data, key)
+
+
+def lookup_many(values, keys, default=_missing, flatten=True, separator="."):
+    """
+    Looks up several keys in a flat index in one pass.
+
+    :param dict values: A dict mapping keys to values (eg ``KeyIndex.values``).
+    :param list[str] keys: The keys to look up.
+    :param default: If given, the value used for keys that aren't found.
+    :param bool flatten: If enabled, dict values are flattened with ``separator``.
+    :param str separator: The separator to use when flattening.
+    :return: An ordered mapping of each key to its value.
+    :rtype: OrderedDict
+    :raises KeysNotFoundException: If no default was given and some keys weren't found.
+     All of the missing keys are reported together.
+    """
+    result = OrderedDict()
+    missing = []
+
+    for key in keys:
         try:
-            return dpath.util.get(data, key, separator=".")
+            value = values[key]
         except KeyError:
-            # Note: dpath will raise this error if the
-            # path is valid, but the corresponding value is None
-            # see: https://github.com/akesterson/dpath-python/issues/43
-            # So, we work around this by going up a level and seeing if
-            # the key actually exists. If it does, we return None.
+            if default is _missing:
+                missing.append(key)
+                continue
+            value = default
+
+        if flatten and isinstance(value, dict):
+            value = flatten_dict(value, separator)
+
+        result[key] = value
+
+    if missing:
+        raise KeysNotFoundException(missing)
+
+    return result
+
+
+def iter_flattened(dictionary, separator=".", as_tuples=False):
+    """
+    Lazily yields the ``(flattened key, value)`` pairs of a nested dictionary, in depth-first order.
+    This is done iteratively, without building any intermediate dictionaries, and each key is only
+    put together once (from the key of its parent).
+
+    :param dict dictionary: The (nested) dictionary.
+    :param str separator: The separator used to put parts of keys together.
+    :param bool as_tuples: If enabled, keys are yielded as tuples of their parts instead of being joined by ``separator``.
+    """
+    # Parts are escaped (see clickfig.path) as they're joined. Non-string top-level keys are
+    # yielded as they are, while anything below them gets a string key (unless as_tuples is enabled).
+    stack = [(None, iter(dictionary.items()))]
 
-            # To do this efficiently, we just flatten the dictionary
-            # that we get from data and see if key is in it.
+    while stack:
+        prefix, items = stack[-1]
 
-            flattened_data = flatten_dict(data)
-            if key in flattened_data:
-                return None
+        for key, value in items:
+            if as_tuples:
+                path = (prefix or ()) + (key,)
+            elif prefix is None:
+                path = escape_part(key, separator) if key.__class__ is str else key
+            else:
+                path = prefix + separator + escape_part(key, separator)
 
-            # If we couldn't find the key in the flattened dictionary,
-            # then we raise an exception indicating that the key wasn't found.
-            raise KeyNotFoundException(key)
+            if isinstance(value, dict):
+                if not as_tuples and path.__class__ is not str:
+                    path = str(path)
+
+                stack.append((path, iter(value.items())))
+                break
+
+            yield path, value
+        else:
+            stack.pop()
 
 
 def flatten_dict(dictionary, separator="."):
+    """
+    :param dict dictionary: A (nested) dictionary.
+    :param str separator: The separator used to put parts of keys together.
+    :return: A dictionary mapping each flattened key (eg ``a.b.c``) to its (non-dict) value.
+    :rtype: dict
+    """
+    # The same walk as iter_flattened, inlined (as this is called on every full read).
     result = {}
-    for key, value in dictionary.items():
-        if not isinstance(value, (dict, OrderedDict)):
-            result[key] = value
+    stack = [(None, iter(dictionary.items()))]
+
+    while stack:
+        prefix, items = stack[-1]
+
+        for key, value in items:
+            if prefix is None:
+                path = escape_part(key, separator) if key.__class__ is str else key
+            else:
+                path = prefix + separator + escape_part(key, separator)
+
+            if isinstance(value, dict):
+                stack.append((path if path.__class__ is str else str(path), iter(value.items())))
+                break
+
+            result[path] = value
         else:
-            result.update(flatten_dict({"{}{}{}".format(key, separator, x): y
-                                        for x, y in value.items()
-                                        }))
+            stack.pop()
 
     return result
 
 
 def unflatten_dict(dictionary, separator="."):
+    """
+    The inverse of ``flatten_dict``. This is done in a single pass, creating each nested dict only once.
+
+    :param dict dictionary: A dictionary mapping flattened keys to values. The keys may also be tuples
+     of key parts (as yielded by ``iter_flattened`` with ``as_tuples=True``).
+    :param str separator: The separator used to put parts of keys together.
+    :rtype: dict
+    """
     if any([k for k, v in dictionary.items() if isinstance(v, dict)]):
         raise ValueError(
             "Dictionary not flattened by separator '{}':\n{}".format(separator, dictionary))
 
     result = {}
 
+    # Maps each prefix seen so far (as a string, or a tuple of parts) to its dict.
+    nodes = {}
+
+    def node_for(prefix):
+        node = nodes.get(prefix)
+
+        if node is None:
+            if isinstance(prefix, tuple):
+                parent, leaf = (node_for(prefix[:-1]) if len(prefix) > 1 else result), prefix[-1]
+            else:
+                parent_prefix, _, leaf = prefix.rpartition(separator)
+                parent = node_for(parent_prefix) if parent_prefix else result
+
+            node = parent.setdefault(leaf, {})
+
+            if not isinstance(node, dict):
+                raise ValueError("Key {} has both a value and keys beneath it".format(prefix))
+
+            nodes[prefix] = node
+
+        return node
+
     for key, value in dictionary.items():
-        dpath.util.new(result, key, value, separator=separator)
+        if not isinstance(key, tuple) and ESCAPE in key:
+            key = split_key(key, separator)
+
+        if isinstance(key, tuple):
+            node = node_for(key[:-1]) if len(key) > 1 else result
+            leaf = key[-1]
+        else:
+            prefix, _, leaf = key.rpartition(separator)
+            node = node_for(prefix) if prefix else result
+
+        if isinstance(node.get(leaf), dict):
+            raise ValueError("Key {} has both a value and keys beneath it".format(key))
+
+        node[leaf] = value
 
     return result
@@ -1,2 +1,12 @@
 from .base import Config
 from . import file
+
+
+def __getattr__(name):
+    # Imported on demand, so that importing clickfig doesn't import asyncio.
+    if name == "AsyncConfig":
+        from .aio import AsyncConfig
+
+        return AsyncConfig
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
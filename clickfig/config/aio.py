@@ -0,0 +1,169 @@
+"""
+An asyncio interface to :class:`Config`, for reading and writing configuration from within an event loop.
+
+Reading and parsing files, and writing them, happen in an executor, so the event loop is never blocked on
+them. If several coroutines need the same file re-parsed at once, they all wait on a single parse. Reads
+for which every file's cached contents are up to date are answered straight away, without a trip through
+the executor (the files are still ``stat``-ed to find that out, unless ``revalidate_ttl`` says otherwise).
+"""
+import asyncio
+import functools
+
+from ..base import _missing
+
+
+class AsyncConfig(object):
+    """
+    Wraps a :class:`Config` with coroutine versions of its methods::
+
+        cfg = AsyncConfig(clickfig.Config("app.json"))
+
+        async def handler(request):
+            port = (await cfg.read(key="server.port")).data
+    """
+
+    def __init__(self, config, executor=None):
+        """
+        :param Config config: The config to wrap.
+        :param concurrent.futures.Executor|None executor: The executor to run file I/O and parsing in.
+         Defaults to the event loop's default executor.
+        """
+        self.config = config
+        self.executor = executor
+
+        # Futures for the parses (and index merges) that are currently running, so that concurrent
+        # reads can share them. Keyed by file object (or ``None`` for merging the combined index).
+        self._in_flight = {}
+
+    def _run(self, func, *args, **kwargs):
+        """
+        :return: A future for the result of calling ``func`` in the executor.
+        :rtype: asyncio.Future
+        """
+        return asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def _coalesced(self, key, func):
+        """
+        :return: A future for the result of ``func`` run in the executor, shared with any other callers that
+         ask for the same ``key`` while it's still running. Each caller gets it behind a shield, so that
+         cancelling one of them doesn't cancel the work the others are waiting on.
+        :rtype: asyncio.Future
+        """
+        future = self._in_flight.get(key)
+
+        if future is None:
+            future = self._in_flight[key] = self._run(func)
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        return asyncio.shield(future)
+
+    @staticmethod
+    def _load_file(config_file):
+        config_file._load()
+        config_file._key_index()
+
+    def _is_current(self):
+        """
+        :return: Whether or not the combined index reflects the cached contents of every file.
+        :rtype: bool
+        """
+        config = self.config
+
+        return config._combined is not None and config._level_indexes is not None and all(
+            config_file._index is index for config_file, index in zip(config.config_files, config._level_indexes))
+
+    async def refresh(self):
+        """
+        Brings the cached contents of the config up to date with the files, re-parsing (in the executor)
+        only those that have changed.
+        """
+        config = self.config
+
+        if config._config_files is None:
+            # A lazy config resolves its files (and maybe creates them from defaults) on first use.
+            await self._coalesced("resolve", config._resolve_files)
+
+        stale = [config_file for config_file in config.config_files
+                 if config_file._current_signature() != config_file._signature or config_file._index is None]
+
+        if stale:
+            await asyncio.gather(*[self._coalesced(config_file, functools.partial(self._load_file, config_file))
+                                   for config_file in stale])
+
+        if not self._is_current():
+            await self._coalesced(None, config._combined_index)
+
+    async def read(self, key=None, flatten=True):
+        """
+        The coroutine version of :meth:`Config.read`.
+        """
+        if key is None:
+            return await self._run(self.config.read, flatten=flatten)
+
+        await self.refresh()
+
+        return self.config.read(key=key, flatten=flatten)
+
+    async def read_many(self, keys, default=_missing, flatten=True):
+        """
+        The coroutine version of :meth:`Config.read_many`.
+        """
+        await self.refresh()
+
+        return self.config.read_many(keys, default=default, flatten=flatten)
+
+    async def get(self, key, default=None, flatten=True):
+        """
+        The coroutine version of :meth:`Config.get`.
+        """
+        await self.refresh()
+
+        return self.config.get(key, default=default, flatten=flatten)
+
+    async def has(self, key):
+        """
+        The coroutine version of :meth:`Config.has`.
+        """
+        await self.refresh()
+
+        return self.config.has(key)
+
+    async def items(self, prefix=None, pattern=None):
+        """
+        The coroutine version of :meth:`Config.items`.
+        """
+        await self.refresh()
+
+        return self.config.items(prefix=prefix, pattern=pattern)
+
+    async def keys(self, prefix=None, pattern=None):
+        """
+        The coroutine version of :meth:`Config.keys`.
+        """
+        await self.refresh()
+
+        return self.config.keys(prefix=prefix, pattern=pattern)
+
+    async def write(self, key, value, level=None):
+        """
+        The coroutine version of :meth:`Config.write`.
+        """
+        await self._run(self.config.write, key, value, level=level)
+
+    async def unset(self, key, level=None):
+        """
+        The coroutine version of :meth:`Config.unset`.
+        """
+        await self._run(self.config.unset, key, level=level)
+
+    async def unset_many(self, keys, level=None):
+        """
+        The coroutine version of :meth:`Config.unset_many`.
+        """
+        await self._run(self.config.unset_many, keys, level=level)
+
+    async def update(self, mapping, level=None):
+        """
+        The coroutine version of :meth:`Config.update`.
+        """
+        await self._run(self.config.update, mapping, level=level)
@@ -1,33 +1,65 @@
+import heapq
 import os
-
-import click
-import six
+import threading
+import time
+from collections import OrderedDict
 
 from clickfig.exception import KeyNotFoundException
+from clickfig.stats import Stats
 
-from ..base import __config_types__
-from .file import INIConfigFile, JSONConfigFile, PythonConfigFile
+from ..base import __config_types__, flatten_dict, lookup_many, string_types, _missing
+from . import file as config_file_module
+from .file.base import ConfigReadResult
 
+# Names of the classes (in ``clickfig.config.file``) for each type of file. They're
+# looked up by name, so that only the backends that are actually used get imported.
 __config_type_map__ = {
-    "ini": INIConfigFile,
-    "json": JSONConfigFile,
-    "python": PythonConfigFile
+    "ini": "INIConfigFile",
+    "json": "JSONConfigFile",
+    "python": "PythonConfigFile"
+}
+
+# Levels that are held in memory rather than in files (see ``clickfig.config.file.memory``), by the key of
+# their file info that holds their contents.
+__memory_type_map__ = {
+    "data": "DictConfigFile",
+    "env": "EnvConfigFile"
 }
 
 
 class Config(object):
     def __init__(self, file, app_name=None,
-                 dir_options=None, separator=".", verbose=True):
+                 dir_options=None, separator=".", verbose=True, revalidate_ttl=0,
+                 lazy=False, snapshot=None, partial_parse_threshold=1024 * 1024, schema=None):
         """
         :param str|list[dict[str,str]] file: Either a string denoting a single file or a list of dictionaries representing multiple files.
         Each such dict must have keys of ``name`` and ``level`` with an optional keys of ``default``, ``type``, and ``dir``.
+        A level can also be held in memory, with a ``data`` dict instead of a ``name`` (eg for defaults), or be
+        made up of the environment variables with a given prefix, with ``env`` (eg ``{"level": "env", "env": "MYAPP_"}``).
         :param str app_name: Used to find locations of files if the full path is not provided.
         :param dir_options: Other options to pass into `click.get_app_dir <http://click.pocoo.org/api/#click.get_app_dir>`_.
         :param str separator: The separator to use for sections, subsections, etc in keys.
         :param bool verbose: Enable this if you want extra info...
+        :param float revalidate_ttl: Number of seconds for which parsed file contents are trusted
+         without checking the files on disk (see :class:`BaseConfigFile`).
+        :param bool lazy: If enabled, resolving file paths, creating files from defaults and
+         building the file objects are all put off until the configuration is first used
+         (so, eg, ``--help`` never touches the config files). Note that this also defers any errors
+         from doing so.
+        :param bool|str|None snapshot: If enabled, the parsed and indexed data of every level is saved
+         in a compiled snapshot, which is loaded instead of parsing the files for as long as none of them
+         have changed (see :mod:`clickfig.config.snapshot`). Either a path for the snapshot, or ``True``
+         to put it in the app dir (if ``app_name`` is given) or next to the first file. In-memory levels
+         (eg ``data`` or ``env``) aren't included in the snapshot, and are indexed afresh each time.
+        :param int|None partial_parse_threshold: Until the config has been loaded in full, keyed reads of files of
+         at least this many bytes only parse as much of them as needed (see :class:`BaseConfigFile`). Not used
+         with ``snapshot``, which is loaded instead, or brought up to date by loading the config in full.
+        :param dict|clickfig.schema.Schema|None schema: The types (and defaults and validators) of keys,
+         for use with ``typed`` (see :mod:`clickfig.schema`). Unless ``lazy`` is enabled, the config is loaded
+         and validated against it straight away.
         """
 
-        if isinstance(file, six.string_types):
+        if isinstance(file, string_types):
             self.file = [{"level": "__default__", "name": file}]
         else:
             for f in file:
@@ -52,8 +84,78 @@ class Config(object):
         self.separator = separator
         self.app_name = app_name
         self.verbose = verbose
+        self.revalidate_ttl = revalidate_ttl
+        self.dir_options = dir_options or {}
+        self.snapshot = snapshot
+        self.partial_parse_threshold = partial_parse_threshold
+
+        # The combined index maps every key to its value from the highest-precedence
+        # level that contains it. It's kept alongside the per-level indexes it was
+        # built from, so that only levels that have been re-parsed need to be merged in again.
+        self._level_indexes = None
+        self._combined = None
+
+        # The file signatures of the snapshot that was last loaded or saved.
+        self._snapshot_signatures = None
+
+        # Whether a keyed read has already been answered with partial parses (see ``_lookup``).
+        self._partial_lookup_done = False
+
+        self._config_files = None
+
+        # Held while the combined index is brought up to date, as a watcher may be doing so on another thread.
+        self._lock = threading.RLock()
+        self._watcher = None
+
+        # The merged tree (see ``_merged_tree``) and the level indexes it was built from.
+        self._merged = None
+        self._merged_indexes = None
+
+        if schema is not None:
+            from ..schema import Schema
+
+            if not isinstance(schema, Schema):
+                schema = Schema(schema)
+
+        self.schema = schema
+
+        # The typed values of the keys in the schema, and the level indexes they were converted from.
+        self._typed = None
+        self._typed_indexes = None
+
+        #: Counters and timings of reads and lookups (see :mod:`clickfig.stats`). Each file has its own, too.
+        self.stats = Stats()
+
+        # Shared with every file, so that a hook added here sees all of their parses and writes.
+        self.hooks = []
+
+        if not lazy:
+            self._resolve_files()
+
+            if schema is not None:
+                self.validate()
+
+    @property
+    def config_files(self):
+        """
+        :return: The file objects for each level, in order of precedence.
+        :rtype: list[BaseConfigFile]
+        """
+        if self._config_files is None:
+            self._resolve_files()
+
+        return self._config_files
+
+    def _resolve_files(self):
+        """
+        Works out the full path and type of each file, and builds the corresponding file objects.
+        """
+        dir_options = self.dir_options
 
         for f in self.file:
+            if self._memory_type(f):
+                continue
+
             if f.get("name") != os.path.basename(f.get("name")) and not f.get("dir"):
                 f.setdefault("name", os.path.abspath(os.path.expanduser(f.get("name"))))
                 f.setdefault("dir", os.path.dirname(f.get("name")))
@@ -64,22 +166,28 @@ class Config(object):
                                  "Please be more specific or specify app_name".format(f.get("name")))
 
             if not f.get("dir"):
+                import click
+
                 f_dir = click.get_app_dir(self.app_name, roaming=dir_options.get("roaming", True),
                                           force_posix=dir_options.get("force_posix", False))
                 f.setdefault("dir", f_dir)
 
             f.setdefault("name", os.path.join(f.get("dir"), f.get("name")))
 
-        self.config_files = []
+        config_files = []
 
         for f in self.file:
 
+            if self._memory_type(f):
+                config_files.append(self._memory_file(f))
+                continue
+
             if f.get("type"):
 
                 type_ = str(f.get("type")).lower()
 
                 if type_ in __config_types__:
-                    cls = __config_type_map__[type_]
+                    cls = getattr(config_file_module, __config_type_map__[type_])
                 else:
                     raise ValueError(
                         "Invalid configuration value for type_: {} (must be one of {})".format(f.get("type"), ",".join(
@@ -94,15 +202,44 @@ class Config(object):
 
                 if extension in __config_types__:
 
-                    cls = __config_type_map__[extension]
+                    cls = getattr(config_file_module, __config_type_map__[extension])
 
                 else:
 
                     raise ValueError("Unable to determine the type of config file for {}".format(f.get("name")))
 
-            self.config_files.append(cls(name=f.get("name"), level=f.get("level"),
-                                         default_file=f.get("default"),
-                                         separator=self.separator, verbose=self.verbose))
+            config_files.append(cls(name=f.get("name"), level=f.get("level"),
+                                    default_file=f.get("default"),
+                                    separator=self.separator, verbose=self.verbose,
+                                    revalidate_ttl=self.revalidate_ttl,
+                                    partial_parse_threshold=self.partial_parse_threshold,
+                                    hooks=self.hooks))
+
+        self._config_files = config_files
+
+    @staticmethod
+    def _memory_type(f):
+        """
+        :param dict f: The info of a file.
+        :return: The key of ``f`` that holds the contents of an in-memory level, or ``None`` for a file.
+        :rtype: str|None
+        """
+        for key in __memory_type_map__:
+            if key in f:
+                return key
+
+        return None
+
+    def _memory_file(self, f):
+        """
+        :param dict f: The info of an in-memory level.
+        :rtype: clickfig.config.file.memory.DictConfigFile
+        """
+        key = self._memory_type(f)
+        cls = getattr(config_file_module, __memory_type_map__[key])
+
+        return cls(f[key], level=f.get("level"), separator=self.separator, verbose=self.verbose,
+                   partial_parse_threshold=self.partial_parse_threshold, hooks=self.hooks)
 
     @property
     def levels(self):
@@ -110,7 +247,7 @@ class Config(object):
 
     @property
     def file_names(self):
-        return [f.get("name") for f in self.file]
+        return [x.name for x in self.config_files]
 
     def file_by_level(self, level):
 
@@ -121,35 +258,573 @@ class Config(object):
 
         return files[0]
 
+    def invalidate(self):
+        """
+        Discards the cached parsed data of every level.
+        """
+        for config_file in self._config_files or []:
+            config_file.invalidate()
+
+    def _on_disk_files(self):
+        return [x for x in self.config_files if not x.in_memory]
+
+    @property
+    def snapshot_path(self):
+        """
+        :return: The path of the compiled snapshot, or ``None`` if snapshots aren't enabled
+         (or there are no levels on disk to take one of).
+        :rtype: str|None
+        """
+        if not self.snapshot:
+            return None
+
+        if self.snapshot is not True:
+            return self.snapshot
+
+        file_names = [x.name for x in self._on_disk_files()]
+
+        if not file_names:
+            return None
+
+        directory = None
+
+        if self.app_name is not None:
+            import click
+
+            directory = click.get_app_dir(self.app_name, roaming=self.dir_options.get("roaming", True),
+                                          force_posix=self.dir_options.get("force_posix", False))
+
+        from .snapshot import default_snapshot_path
+
+        return default_snapshot_path(file_names, directory=directory)
+
+    def _restore_snapshot(self):
+        """
+        Loads the compiled snapshot, if there is one. Levels whose files haven't changed since it was
+        saved get their parsed data from it, and if none of them have changed (and there are no in-memory
+        levels, which aren't in the snapshot), so does the combined index.
+        """
+        from .snapshot import load_snapshot
+
+        config_files = self._on_disk_files()
+        path = self.snapshot_path
+
+        if path is None:
+            return
+
+        payload = load_snapshot(path)
+
+        if payload is None or payload["names"] != [x.name for x in config_files] or \
+                payload["separator"] != self.separator:
+            return
+
+        signatures = [f._stat_signature() for f in config_files]
+
+        for config_file, index, signature, saved_signature in zip(config_files, payload["indexes"],
+                                                                   signatures, payload["signatures"]):
+            if signature is not None and signature == saved_signature:
+                config_file._seed(index, signature)
+
+        if signatures == payload["signatures"]:
+            self._snapshot_signatures = signatures
+
+            if payload["combined"] is not None:
+                self._level_indexes = payload["indexes"]
+                self._combined = payload["combined"]
+
+    def _save_snapshot(self):
+        config_files = self._on_disk_files()
+        signatures = [f._signature for f in config_files]
+
+        if signatures == self._snapshot_signatures:
+            return
+
+        path = self.snapshot_path
+
+        if path is None:
+            return
+
+        from .snapshot import save_snapshot
+
+        # The combined index is only of use without in-memory levels, as theirs are rebuilt every time.
+        complete = len(config_files) == len(self.config_files)
+
+        save_snapshot(path, {
+            "names": [x.name for x in config_files],
+            "separator": self.separator,
+            "signatures": signatures,
+            "indexes": [x._key_index() for x in config_files],
+            "combined": self._combined if complete else None
+        })
+
+        self._snapshot_signatures = signatures
+
+    def _combined_index(self):
+        """
+        Brings the combined index up to date with the files on disk and returns it.
+
+        :return: A dict mapping each key to its value in the highest-precedence level containing it.
+        :rtype: dict
+        """
+        with self._lock:
+            return self._update_combined_index()
+
+    def _update_combined_index(self):
+        if self._combined is None and self.snapshot:
+            self._restore_snapshot()
+
+        indexes = []
+        for config_file in self.config_files:
+            config_file._load()
+            indexes.append(config_file._key_index())
+
+        if self._combined is None:
+            combined = {}
+            for index in reversed(indexes):
+                combined.update(index.values)
+
+            self._combined = combined
+            self.stats.increment("index_builds")
+
+        else:
+            combined = self._combined
+
+            for old, new in zip(self._level_indexes, indexes):
+                if old is new:
+                    continue
+
+                self.stats.increment("index_merges")
+
+                # Only the keys that this level had or has can have changed owner.
+                for key in set(old.values).union(new.values):
+                    for index in indexes:
+                        if key in index.values:
+                            combined[key] = index.values[key]
+                            break
+                    else:
+                        combined.pop(key, None)
+
+        self._level_indexes = indexes
+
+        if self.snapshot:
+            self._save_snapshot()
+
+        return combined
+
+    def _merged_tree(self):
+        """
+        :return: The effective configuration, as a :class:`clickfig.hashing.MergedTree` of every level,
+         rebuilt only when a level has been re-parsed.
+        :rtype: clickfig.hashing.MergedTree
+        """
+        with self._lock:
+            self._combined_index()
+            indexes = self._level_indexes
+
+            if self._merged is None or any(old is not new for old, new in zip(self._merged_indexes, indexes)):
+                from ..hashing import MergedTree
+
+                self._merged = MergedTree([index.hashes for index in indexes], separator=self.separator)
+                self._merged_indexes = list(indexes)
+
+            return self._merged
+
+    def fingerprint(self):
+        """
+        :return: A stable digest of the effective configuration (ie after the levels have been merged),
+         which only changes when its contents do. It doesn't depend on the order of keys, or on which level
+         a value comes from. Subtree digests are kept between calls, so re-fingerprinting after a change only
+         re-hashes the levels that were re-parsed.
+        :rtype: str
+        :raises TypeError: If a value can't be hashed (see :func:`clickfig.hashing.encode_value`).
+        """
+        return self._merged_tree().hexdigest()
+
+    def diff(self, other):
+        """
+        Works out which keys were added, changed or removed in the effective configuration of ``other``
+        compared to this one. Only subtrees whose digests differ are compared key by key.
+
+        :param Config other: The config to compare against.
+        :rtype: clickfig.hashing.ConfigChange
+        """
+        return self._merged_tree().diff(other._merged_tree())
+
+    def _typed_values(self):
+        """
+        :return: The typed values of every key in the schema, converted again only when a level has
+         been re-parsed.
+        :rtype: dict
+        :raises SchemaValidationException: If the config doesn't match the schema.
+        """
+        if self.schema is None:
+            raise ValueError("No schema was given for this config")
+
+        with self._lock:
+            combined = self._combined_index()
+            indexes = self._level_indexes
+
+            if self._typed is None or any(old is not new for old, new in zip(self._typed_indexes, indexes)):
+                self._typed = self.schema.evaluate(combined)
+                self._typed_indexes = list(indexes)
+
+            return self._typed
+
+    def validate(self):
+        """
+        Loads the config and checks it against the schema.
+
+        :raises SchemaValidationException: Listing every key in the schema that's missing or invalid.
+        """
+        self._typed_values()
+
+    def typed(self, key=None):
+        """
+        Reads a value converted to the type given for it in the schema, eg ``cfg.typed("server.port")``.
+        Values are converted and validated once per version of the files, so this is usually just a
+        dict lookup (plus checking the files for changes, as with ``read``).
+
+        :param str|None key: A key in the schema. With no key, every typed value is returned.
+        :return: The typed value, or a dict of every key in the schema and its typed value.
+        :raises SchemaValidationException: If the config doesn't match the schema.
+        """
+        values = self._typed_values()
+
+        if key is None:
+            return dict(values)
+
+        try:
+            return values[key]
+        except KeyError:
+            raise ValueError("{} isn't in the schema".format(key))
+
+    def with_overrides(self, overrides, level="overrides"):
+        """
+        Stacks a level held in memory on top of this config, eg for a single request or a test::
+
+            request_cfg = cfg.with_overrides({"server.timeout": 5})
+
+        The new config shares this one's files, and the data parsed from them, rather than copying them: its
+        lookups fall through from the overrides to this config's combined index. So creating it only costs as
+        much as indexing the overrides, and it sees any changes to the files. Writes go to the overrides
+        (by default), without touching this config.
+
+        :param dict overrides: Maps keys (eg ``server.port``) to values, which may be nested dicts.
+        :param str level: The name of the new level.
+        :rtype: clickfig.config.overlay.OverlayConfig
+        """
+        from .overlay import OverlayConfig
+
+        return OverlayConfig(self, {"level": level, "data": overrides})
+
+    def with_env(self, prefix, level="env"):
+        """
+        The same as ``with_overrides``, but the level on top is made up of environment variables, eg with
+        a prefix of ``MYAPP_``, ``MYAPP_SERVER__PORT`` is the key ``server.port``
+        (see :class:`clickfig.config.file.memory.EnvConfigFile`).
+
+        :param str prefix: The prefix of the environment variables to include.
+        :param str level: The name of the new level.
+        :rtype: clickfig.config.overlay.OverlayConfig
+        """
+        from .overlay import OverlayConfig
+
+        return OverlayConfig(self, {"level": level, "env": prefix})
+
+    def watch(self, callback, keys=None, interval=1.0):
+        """
+        Calls ``callback`` whenever keys are added, changed or removed by changes to the files on disk, eg::
+
+            def reconfigure(change):
+                if "server.port" in change.keys:
+                    ...
+
+            subscription = cfg.watch(reconfigure, keys=["server", "log.level"])
+
+        The files are watched by a background thread, with inotify where it's available and by checking
+        them every ``interval`` seconds otherwise. Only the levels whose files changed are re-parsed.
+
+        :param callable callback: Called (on the watching thread) with a :class:`clickfig.watch.ConfigChange`
+         holding the keys that were ``added``, ``changed`` and ``removed``. Only keys of leaf values are included.
+        :param str|list[str]|None keys: Only call ``callback`` for changes to these keys, or keys within
+         these sections. By default, it's called for any change.
+        :param float interval: How often (in seconds) to check the files, if inotify isn't available.
+        :return: The subscription, whose ``stop`` method unsubscribes ``callback``. The thread is stopped
+         once there are no subscriptions left.
+        :rtype: clickfig.watch.Subscription
+        """
+        if self._watcher is None:
+            from ..watch import ConfigWatcher
+
+            self._watcher = ConfigWatcher(self, interval=interval)
+
+        return self._watcher.subscribe(callback, keys=keys)
+
+    def add_hook(self, hook):
+        """
+        :param clickfig.stats.StatsHook hook: Called on every read of this config, and on every parse and
+         write of any of its files.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def stats_report(self):
+        """
+        :return: The stats of the config, and of each of its levels (by name) that has been loaded, eg
+         ``report["levels"]["global"]["parses"]``.
+        :rtype: OrderedDict
+        """
+        return OrderedDict([
+            ("config", self.stats.as_dict()),
+            ("levels", OrderedDict((f.level, f.stats.as_dict()) for f in self._config_files or []))
+        ])
+
+    def reset_stats(self):
+        self.stats.reset()
+
+        for config_file in self._config_files or []:
+            config_file.stats.reset()
+
     def read(self, key=None, flatten=True):
+        started = time.perf_counter()
+        self.stats.increment("reads")
+
+        try:
+            return self._read(key, flatten)
+        finally:
+            seconds = time.perf_counter() - started
+            self.stats.observe("read", seconds)
+
+            for hook in self.hooks:
+                hook.on_read(self, key, seconds)
+
+    def _read(self, key, flatten):
         if key is None:
-            return [file.read(flatten=flatten) for file in self.config_files]
+            # The files' own _read, so that hooks see a single read of the config rather than one per file.
+            return [file._read(None, flatten) for file in self.config_files]
+
+        value = self._lookup(key)
+
+        if value is _missing:
+            raise KeyNotFoundException(key)
+
+        if flatten and isinstance(value, dict):
+            value = flatten_dict(value, self.separator)
+
+        return ConfigReadResult(value, key=key, separator=self.separator)
+
+    def _lookup(self, key):
+        """
+        :param str key: The key to look up.
+        :return: The raw value of ``key`` from the highest-precedence level that contains it, or ``_missing``.
+        """
+        self.stats.increment("lookups")
+        value = _missing
+
+        # With a snapshot, the combined index is always used: it's restored from the snapshot if that's up to
+        # date (which is cheaper than even a partial parse), and otherwise building it saves one for next time.
+        if self._combined is None and not self._partial_lookup_done and not self.snapshot:
+            signatures = [f._current_signature() for f in self.config_files]
+
+            if any(f._partial_parse_applies(signature) for f, signature in zip(self.config_files, signatures)):
+                # Nothing has been loaded in full yet, and some of the files are big: rather than loading
+                # everything to build the combined index, just look for the key level by level. This is only
+                # done for the first key: reading any more than that loads and indexes everything.
+                self._partial_lookup_done = True
+
+                for config_file, signature in zip(self.config_files, signatures):
+                    exists, value = config_file._find_key(key, signature)
+
+                    if exists and value is not _missing:
+                        break
+                else:
+                    value = _missing
+            else:
+                value = self._combined_index().get(key, _missing)
         else:
-            for file in self.config_files:
-                try:
-                    return file.read(key=key, flatten=flatten)
-                except KeyNotFoundException:
+            value = self._combined_index().get(key, _missing)
+
+        if value is _missing:
+            self.stats.increment("misses")
+
+        return value
+
+    def get(self, key, default=None, flatten=True):
+        """
+        Reads the value of an optional key, without raising if it's missing::
+
+            if cfg.get("features.new_ui", default="off") == "on":
+                ...
+
+        Looking up a missing key is as cheap as looking up one that's there: apart from the first key read
+        from big files (see ``partial_parse_threshold``), it's a miss in the combined index, which is kept
+        until the files change.
+
+        :param str key: The key to read.
+        :param default: The value returned if ``key`` isn't in any level.
+        :param bool flatten: If the value is a dict, flatten it with ``separator``.
+        :return: The (raw) value of ``key``, or ``default``.
+        """
+        value = self._lookup(key)
+
+        if value is _missing:
+            return default
+
+        if flatten and isinstance(value, dict):
+            value = flatten_dict(value, self.separator)
+
+        return value
+
+    def has(self, key):
+        """
+        :param str key: A key, or section/subsection.
+        :return: Whether or not ``key`` is in any level.
+        :rtype: bool
+        """
+        return self._lookup(key) is not _missing
+
+    def __contains__(self, key):
+        return self.has(key)
+
+    def items(self, prefix=None, pattern=None):
+        """
+        Lists keys from every level along with their values, eg::
+
+            cfg.items(prefix="upstream")        # Every leaf beneath upstream
+            cfg.items(pattern="pool.*.timeout")  # The timeout of every pool
+
+        Each key appears once, with its value from the highest-precedence level that contains it (as
+        ``read(key, flatten=False)`` would give it). Each level keeps its leaf keys sorted, so a prefix is
+        found by binary search, and a pattern only visits the sections on the way to its matches: either way,
+        the cost depends on the number of results rather than the size of the config.
+
+        :param str|None prefix: Only the leaf keys beneath this key (and the key itself, if it's a leaf).
+         With neither a prefix nor a pattern, every leaf key is listed.
+        :param str|None pattern: Only the keys (of leaves or sections) that match this pattern. Each part of
+         the pattern matches a single part of a key, and may contain ``*``, ``?`` and ``[...]`` wildcards.
+        :return: The ``(key, value)`` pairs, sorted by key.
+        :rtype: list[tuple]
+        """
+        if prefix is not None and pattern is not None:
+            raise ValueError("Give either a prefix or a pattern, not both")
+
+        with self._lock:
+            combined = self._combined_index()
+            indexes = self._level_indexes
+
+            if pattern is not None:
+                matches = set()
+
+                for index in indexes:
+                    matches.update(index.match(pattern))
+
+                return [(key, combined[key]) for key in sorted(matches)]
+
+            # The leaves of each level are already sorted, so they're merged rather than sorted again.
+            items = []
+            last = None
+
+            for key in heapq.merge(*[index.leaves_under(prefix) for index in indexes]):
+                if key == last:
                     continue
-            else:
-                raise KeyNotFoundException(key)
 
-    def write(self, key, value, level=None):
+                last = key
+                value = combined[key]
+
+                # A leaf in a lower level can be a section in a higher one, whose leaves are listed instead.
+                if not isinstance(value, dict):
+                    items.append((key, value))
+
+            return items
+
+    def keys(self, prefix=None, pattern=None):
+        """
+        The keys of ``items``, eg ``cfg.keys(pattern="upstream.*")``.
+
+        :rtype: list[str]
+        """
+        return [key for key, _ in self.items(prefix=prefix, pattern=pattern)]
+
+    def read_many(self, keys, default=_missing, flatten=True):
+        """
+        Reads several keys at once, each from the highest-precedence level that contains it.
+
+        :param list[str] keys: The keys to read.
+        :param default: If given, the value used for keys that aren't found in any level.
+        :param bool flatten: If enabled, dict values are flattened with ``separator``.
+        :return: An ordered mapping of each key to its (raw) value.
+        :rtype: OrderedDict
+        :raises KeysNotFoundException: If no default was given and some keys weren't found.
+        """
+        self.stats.increment("lookups", len(keys))
 
+        return lookup_many(self._combined_index(), keys, default=default,
+                           flatten=flatten, separator=self.separator)
+
+    def _file_for_write(self, level=None):
+        """
+        :param str|None level: The level to modify. Defaults to the highest-precedence level.
+        :rtype: BaseConfigFile
+        """
         if level is None and len(self.config_files) > 1:
             level = self.config_files[0].level
 
         level = level or "__default__"
 
-        config_file = self.file_by_level(level)
+        return self.file_by_level(level)
 
-        config_file.write(key, value)
+    def write(self, key, value, level=None):
+
+        self._file_for_write(level).write(key, value)
 
     def unset(self, key, level=None):
-        if level is None and len(self.config_files) > 1:
-            level = self.config_files[0].level
 
-        level = level or "__default__"
+        self._file_for_write(level).unset(key)
+
+    def unset_many(self, keys, level=None):
+        """
+        Removes several keys from a level with a single rewrite of its file.
 
-        config_file = self.file_by_level(level)
+        :param list[str] keys: The keys to remove.
+        :param str|None level: The level to modify. Defaults to the highest-precedence level.
+        """
+        self._file_for_write(level).unset_many(keys)
+
+    def unset_prefix(self, prefix, level=None):
+        """
+        Removes ``prefix`` and every key beneath it from a level.
+
+        :param str prefix: The section/subsection to remove.
+        :param str|None level: The level to modify. Defaults to the highest-precedence level.
+        :return: Whether or not anything was removed.
+        :rtype: bool
+        """
+        return self._file_for_write(level).unset_prefix(prefix)
+
+    def batch(self, level=None):
+        """
+        Stages writes and unsets to a single level, to be applied all at once::
 
-        config_file.unset(key)
+            with cfg.batch(level="global") as b:
+                b.set("server.port", 8080)
+                b.unset("server.debug")
+
+        The level's file is serialized exactly once when the ``with`` block exits,
+        and not at all if an exception is raised inside of it.
+
+        :param str|None level: The level to modify. Defaults to the highest-precedence level.
+        :rtype: ConfigBatch
+        """
+        return self._file_for_write(level).batch()
+
+    def update(self, mapping, level=None):
+        """
+        Writes every key/value pair in ``mapping`` to a level with a single rewrite of its file.
+
+        :param dict mapping: A mapping of keys to values.
+        :param str|None level: The level to modify. Defaults to the highest-precedence level.
+        """
+        with self.batch(level=level) as b:
+            b.update(mapping)
@@ -1,5 +1,27 @@
-from .ini import INIConfigFile
-from .json import JSONConfigFile
-from .python import PythonConfigFile
+import importlib
 
-__all__ = ["INIConfigFile", "JSONConfigFile", "PythonConfigFile"]
+__all__ = ["INIConfigFile", "JSONConfigFile", "PythonConfigFile", "DictConfigFile", "EnvConfigFile"]
+
+# Each backend (and whatever it depends upon) is only imported the first time that
+# it's asked for, so that using one format doesn't pay for loading the others.
+_backends = {
+    "INIConfigFile": ".ini",
+    "JSONConfigFile": ".json",
+    "PythonConfigFile": ".python",
+    "DictConfigFile": ".memory",
+    "EnvConfigFile": ".memory"
+}
+
+
+def __getattr__(name):
+    if name not in _backends:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    cls = getattr(importlib.import_module(_backends[name], __name__), name)
+    globals()[name] = cls
+
+    return cls
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
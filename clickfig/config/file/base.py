@@ -1,16 +1,59 @@
+import binascii
 import os
-import shutil
-import tempfile
+import time
 from abc import ABCMeta, abstractmethod
 
-from six import PY2
+from clickfig.base import flatten_dict, iter_flattened, lookup_many, return_key_value, _missing, __config_types__
+from clickfig.exception import KeyNotFoundException
+from clickfig.index import KeyIndex
+from clickfig.lock import FileLock
+from clickfig.stats import Stats
 
-from clickfig.base import flatten_dict, __config_types__
-
-if PY2:
+try:
+    FileNotFoundError
+except NameError:
     FileNotFoundError = IOError
 
 
+def create_temp_file(directory, prefix=".clickfig-"):
+    """
+    Creates a new, empty file with a random name, with the permissions that ``open`` gives new files
+    (``0666``, less the umask), rather than the ``0600`` of files from :mod:`tempfile`.
+
+    :param str directory: The directory to create the file in.
+    :param str prefix: The start of the file's name.
+    :return: A file descriptor open for writing to the file, and its path.
+    :rtype: tuple[int, str]
+    """
+    while True:
+        name = os.path.join(directory, prefix + binascii.hexlify(os.urandom(8)).decode("ascii"))
+
+        try:
+            return os.open(name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), name
+        except FileExistsError:
+            continue
+
+
+def sync_directory(directory):
+    """
+    Flushes a directory's entries to disk, so that a file renamed into it survives a crash. This is
+    best-effort: not every platform (or filesystem) allows it.
+
+    :param str directory: The directory to flush.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 class ConfigReadResult(object):
     """
     This is a wrapper object around data returned by a ``ConfigFile.read`` call
@@ -29,11 +72,12 @@ class ConfigReadResult(object):
         self.key = key
         self.separator = separator
 
-    def __str__(self):
+    def iter_lines(self):
         """
-        If the ``data`` attribute is a dictionary, then the paths are given along with their
-        corresponding (non-dict) value, in the form "path=key". If ``data`` isn't a dict,
-        then this just returns the string representation of the ``data``.
+        Lazily yields the lines of the printed result. If the ``data`` attribute is a dictionary (or a list of them),
+        then the paths are given along with their corresponding (non-dict) value, in the form "path=value",
+        flattening nested dictionaries as it goes. If ``data`` isn't a dict, then this just yields the string
+        representation of the ``data``.
         """
 
         data_list = None
@@ -46,37 +90,138 @@ class ConfigReadResult(object):
             data_list = self.data
 
         if data_list is None:
-            result = str(self.data)
+            yield str(self.data)
+            return
 
-        elif self.key is None:
+        prefix = "" if self.key is None else "{}{}".format(self.key, self.separator)
+        empty = True
 
-            result = "\n".join(["{}={}".format(k, v)
-                                for d in data_list
-                                for k, v in flatten_dict(d, self.separator).items()
-                                ]
-                               )
-        else:
+        for d in data_list:
+            for k, v in iter_flattened(d, self.separator):
+                empty = False
+                yield "{}{}={}".format(prefix, k, v)
+
+        if empty:
+            yield ""
+
+    def __str__(self):
+        """
+        All of the lines from ``iter_lines``, joined by newlines.
+        """
+
+        return "\n".join(self.iter_lines())
+
+
+class ConfigBatch(object):
+    """
+    Stages writes and unsets to a single config file in memory. When used as a context manager,
+    all of the staged changes are applied and the file is serialized exactly once when the ``with``
+    block exits. If an exception is raised inside of the block, nothing is written.
+    """
+
+    def __init__(self, config_file):
+        """
+        :param BaseConfigFile config_file: The file to which the changes will be applied.
+        """
+        self.config_file = config_file
+        self.operations = []
+
+    def set(self, key, value):
+        self.operations.append((key, value, False))
+
+    def unset(self, key):
+        self.operations.append((key, None, True))
+
+    def update(self, mapping):
+        """
+        :param dict mapping: A mapping of keys to the values to set.
+        """
+        for key, value in mapping.items():
+            self.set(key, value)
+
+    def commit(self):
+        """
+        Applies the staged operations, in order, and writes the file out. The file is locked from
+        before it's read until it's been replaced.
+        """
+        if not self.operations:
+            return
+
+        config_file = self.config_file
+
+        with config_file.lock():
+            document = config_file._load_document()
+
+            for key, value, unset in self.operations:
+                if unset:
+                    config_file._unset_key(document, key)
+                else:
+                    config_file._set_key(document, key, value)
 
-            result = "\n".join(["{}{}{}={}".format(self.key, self.separator, k, v)
-                                for d in data_list
-                                for k, v in flatten_dict(d, self.separator).items()
-                                ]
-                               )
+            config_file._dump(document)
 
-        return result
+        self.operations = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.operations = []
 
 
 class BaseConfigFile(object):
     __metaclass__ = ABCMeta
 
+    # Whether the level is held in memory, rather than in a file on disk.
+    in_memory = False
+
     def __init__(self, name, level="__default__",
-                 default_file=None, separator=".", verbose=True):
+                 default_file=None, separator=".", verbose=True,
+                 revalidate_ttl=0, partial_parse_threshold=1024 * 1024, hooks=None):
+        """
+        :param str name: The path to the configuration file.
+        :param str level: The level (eg ``local``, ``global``) of this file.
+        :param str|None default_file: A file to copy into place if ``name`` doesn't exist.
+        :param str separator: The separator to use for sections, subsections, etc in keys.
+        :param bool verbose: Enable this if you want extra info...
+        :param float revalidate_ttl: Number of seconds for which parsed data is trusted without
+         checking the file on disk again. With the default of ``0``, every read ``stat``s the file
+         (but only re-parses it if it changed).
+        :param int|None partial_parse_threshold: Keyed reads of files of at least this many bytes, which haven't
+         been parsed in full yet, only parse as much of the file as is needed to find the key (for formats
+         that support it). Set to ``None`` to always parse files in full.
+        :param list[clickfig.stats.StatsHook]|None hooks: Hooks to call on parses, reads and writes (see
+         :mod:`clickfig.stats`). The list is used as it is, so a :class:`Config` shares one with all of its files.
+        """
 
         self.name = name
         self.level = level
         self.default_file = default_file
         self.separator = separator
         self.verbose = verbose
+        self.revalidate_ttl = revalidate_ttl
+        self.partial_parse_threshold = partial_parse_threshold
+
+        # Parsed data is cached along with the (mtime_ns, size, inode) signature
+        # of the file that it was parsed from. ``generation`` is bumped every time
+        # the file is (re)parsed.
+        self._data = None
+        self._index = None
+        self._signature = None
+        self._checked_at = None
+        self.generation = 0
+
+        # The signature of the version of the file that's already had its one partial parse (see ``_find_key``).
+        self._partial_signature = None
+
+        self._file_lock = FileLock(name)
+
+        #: Counters and timings of this file's parses, reads and writes (see :mod:`clickfig.stats`).
+        self.stats = Stats()
+        self.hooks = hooks if hooks is not None else []
 
         if not self.exists():
             if not os.path.exists(self.default_file):
@@ -90,34 +235,303 @@ class BaseConfigFile(object):
     def exists(self):
         return os.path.exists(self.name)
 
-    @classmethod
-    def temp_clone(cls, name, base_file):
+    def _stat_signature(self):
+        """
+        :return: A tuple of ``(mtime_ns, size, inode)`` for the file, or ``None`` if it doesn't exist.
+        :rtype: tuple|None
+        """
+        self.stats.increment("stat_calls")
+
+        try:
+            st = os.stat(self.name)
+        except OSError:
+            return None
 
-        kwargs = {k: getattr(base_file, k)
-                  for k in ["level", "default_file", "separator",
-                            "verbose"]}
+        return st.st_mtime_ns, st.st_size, st.st_ino
 
-        return cls(name=name, **kwargs)
+    def invalidate(self):
+        """
+        Discards any cached parsed data, so that the next read goes back to the file.
+        """
+        self._data = None
+        self._index = None
+        self._signature = None
+        self._checked_at = None
+        self._partial_signature = None
 
-    def unset(self, key):
-        config_data = flatten_dict(self.read().data)
+    def _current_signature(self):
+        """
+        :return: The signature of the file on disk. If ``revalidate_ttl`` is set and the file was last checked
+         less than that many seconds ago, the signature of the cached data is returned without a ``stat``,
+         unless this thread holds the file's lock (see ``lock``).
+        :rtype: tuple|None
+        """
+        now = time.monotonic()
+
+        if self._signature is not None and self.revalidate_ttl and \
+                now - self._checked_at < self.revalidate_ttl and not self._file_lock.held():
+            return self._signature
+
+        self._checked_at = now
+
+        return self._stat_signature()
+
+    def _load(self, signature=_missing):
+        """
+        Returns the parsed contents of the file, only re-parsing it if its signature has changed
+        since the last parse (or if ``invalidate`` has been called). If ``revalidate_ttl`` is set,
+        the file isn't even ``stat``-ed until that many seconds have passed since the last check.
+
+        :param tuple|None signature: The current signature of the file, if it's already been looked up.
+        :return: The parsed data, or ``None`` if the file doesn't exist.
+        """
+        if signature is _missing:
+            signature = self._current_signature()
+
+        if signature is None:
+            # Only dropped when the file goes missing, so that the (empty) index is kept while it stays missing.
+            if self._signature is not None:
+                self.invalidate()
+
+            return None
+
+        if signature != self._signature:
+            # The signature is taken *before* parsing, so that a change that
+            # races with the parse is picked up by the next check.
+            started = time.perf_counter()
+            self._data = self._parse()
+            self._record_parse("parse", started, signature[1])
+            self._index = None
+            self._signature = signature
+            self.generation += 1
+        else:
+            self.stats.increment("cache_hits")
+
+        return self._data
+
+    def _record_parse(self, name, started, nbytes):
+        """
+        :param str name: ``parse``, or ``partial_parse``.
+        :param float started: When the parse started (from ``time.perf_counter``).
+        :param int nbytes: The size of the file.
+        """
+        seconds = time.perf_counter() - started
+
+        self.stats.increment(name + "s")
+        self.stats.increment("cache_misses")
+        self.stats.increment("bytes_read", nbytes)
+        self.stats.observe(name, seconds)
+
+        for hook in self.hooks:
+            hook.on_parse(self, seconds, nbytes)
+
+    def _seed(self, index, signature):
+        """
+        Installs already parsed and indexed data (eg from a snapshot) as if it had just been parsed
+        from the file with the given stat signature.
+
+        :param KeyIndex index: The index of the data.
+        :param tuple signature: The stat signature of the file that the data came from.
+        """
+        self._data = index.data
+        self._index = index
+        self._signature = signature
+        self._checked_at = time.monotonic()
+        self.generation += 1
+
+    def _parse_key(self, key):
+        """
+        Formats that can find a single key without parsing the whole file override this.
+
+        :param str key: The key to find.
+        :return: The value of ``key``.
+        :raises KeyNotFoundException: If ``key`` isn't in the file.
+        """
+        raise NotImplementedError
+
+    def _partial_parse_applies(self, signature):
+        """
+        :param tuple|None signature: The current signature of the file.
+        :return: Whether or not a keyed read should parse the file partially, ie the file is big enough,
+         hasn't been parsed (in full or partially) since it last changed, and its format supports partial parsing.
+        :rtype: bool
+        """
+        return signature is not None and signature != self._signature and signature != self._partial_signature and \
+            self.partial_parse_threshold is not None and signature[1] >= self.partial_parse_threshold and \
+            type(self)._parse_key is not BaseConfigFile._parse_key
+
+    def _lookup_key(self, key):
+        """
+        Looks up a single key, parsing as little of the file as possible.
+
+        :param str key: The key to look up.
+        :return: A tuple of whether or not the file exists, and the value of ``key``.
+        :rtype: tuple
+        :raises KeyNotFoundException: If the file exists, but ``key`` isn't in it.
+        """
+        exists, value = self._find_key(key)
+
+        if value is _missing:
+            raise KeyNotFoundException(key)
+
+        return exists, value
+
+    def _find_key(self, key, signature=_missing):
+        """
+        The same as ``_lookup_key``, except that a key that isn't in the file has a value of ``_missing``
+        rather than raising.
+
+        Only the first lookup in each version of a big file is done with a partial parse: that's what a
+        one-off command needs, but as a partial parse can read most of the file, any further lookups parse
+        it in full and use its index instead.
 
-        del config_data[key]
+        :param str key: The key to look up.
+        :param tuple|None signature: The current signature of the file, if it's already been looked up.
+        :return: A tuple of whether or not the file exists, and the value of ``key`` (or ``_missing``).
+        :rtype: tuple
+        """
+        self.stats.increment("lookups")
+
+        if signature is _missing:
+            signature = self._current_signature()
+
+        if self._partial_parse_applies(signature):
+            self._partial_signature = signature
+            started = time.perf_counter()
+
+            try:
+                value = self._parse_key(key)
+            except KeyNotFoundException:
+                value = _missing
+            finally:
+                self._record_parse("partial_parse", started, signature[1])
+
+            return True, value
 
-        with tempfile.NamedTemporaryFile() as temp:
-            tmp_config = self.__class__.temp_clone(name=temp.name, base_file=self)
+        self._load(signature)
 
-            key = [x for x in config_data.keys()]
-            value = [config_data[x] for x in key]
+        if self._signature is None:
+            return False, None
 
-            tmp_config.write(key=key, value=value, read_existing_data=False)
+        return True, self._key_index().values.get(key, _missing)
 
-            shutil.copyfile(temp.name, self.name)
+    def _key_index(self):
+        """
+        :return: The :class:`KeyIndex` of the data loaded by the last call to ``_load``, built at
+         most once per parse.
+        :rtype: KeyIndex
+        """
+        if self._index is None:
+            self._index = KeyIndex(self._data, separator=self.separator)
+
+        return self._index
 
     @abstractmethod
-    def read(self, key=None, flatten=True):
+    def _parse(self):
+        """
+        Reads and parses the whole file.
+
+        :return: The nested data contained in the file.
+        """
         pass
 
+    def unset(self, key):
+        """
+        Removes ``key`` (and everything beneath it, if it's a section/subsection).
+
+        :param str key: The key to remove.
+        :raises KeyNotFoundException: If ``key`` isn't in the file.
+        """
+        self.unset_many([key])
+
+    def unset_many(self, keys):
+        """
+        Removes several keys with a single rewrite of the file.
+
+        :param list[str] keys: The keys to remove.
+        :raises KeyNotFoundException: If any of the keys isn't in the file (in which case nothing is removed).
+        """
+        with self.batch() as b:
+            for key in keys:
+                b.unset(key)
+
+    def unset_prefix(self, prefix):
+        """
+        Removes ``prefix`` and every key beneath it with a single rewrite of the file.
+        Unlike ``unset``, it isn't an error if there's nothing to remove.
+
+        :param str prefix: The section/subsection to remove.
+        :return: Whether or not anything was removed.
+        :rtype: bool
+        """
+        with self.lock():
+            self._load(self._stat_signature())
+
+            if prefix not in self._key_index():
+                return False
+
+            self.unset(prefix)
+
+        return True
+
+    def read(self, key=None, flatten=True):
+        """
+        Reads the value of ``key`` (or all of the data, if no key is given).
+        Nested data returned with ``flatten=False`` is shared with the cache, and shouldn't be modified.
+
+        :param str|None key: The key to read.
+        :param bool flatten: If the result is a dict, flatten it with ``separator``.
+        :rtype: ConfigReadResult|None
+        :raises KeyNotFoundException: If ``key`` isn't in the file.
+        """
+        started = time.perf_counter()
+        self.stats.increment("reads")
+
+        try:
+            return self._read(key, flatten)
+        finally:
+            seconds = time.perf_counter() - started
+            self.stats.observe("read", seconds)
+
+            for hook in self.hooks:
+                hook.on_read(self, key, seconds)
+
+    def _read(self, key, flatten):
+        if key is None:
+            data = self._load()
+
+            if self._signature is None:
+                return None
+
+            result = return_key_value(data)
+        else:
+            exists, result = self._lookup_key(key)
+
+            if not exists:
+                return None
+
+        if flatten and isinstance(result, dict):
+            result = flatten_dict(result, self.separator)
+
+        return ConfigReadResult(result, key=key, separator=self.separator)
+
+    def read_many(self, keys, default=_missing, flatten=True):
+        """
+        Reads several keys with a single load of the file.
+
+        :param list[str] keys: The keys to read.
+        :param default: If given, the value used for keys that aren't in the file.
+        :param bool flatten: If enabled, dict values are flattened with ``separator``.
+        :return: An ordered mapping of each key to its (raw) value.
+        :rtype: OrderedDict
+        :raises KeysNotFoundException: If no default was given and some keys weren't found.
+        """
+        self._load()
+        self.stats.increment("lookups", len(keys))
+
+        return lookup_many(self._key_index().values, keys, default=default,
+                           flatten=flatten, separator=self.separator)
+
     @staticmethod
     def _validate_write_args(key, value):
         """
@@ -141,7 +555,6 @@ class BaseConfigFile(object):
 
         return key, value
 
-    @abstractmethod
     def write(self, key, value, read_existing_data=True):
         """
         Writes key(s) and corresponding value(s).
@@ -150,8 +563,127 @@ class BaseConfigFile(object):
         :param List value: A list of corresponding values. Note that each value will be stringified when written.
         :param bool read_existing_data: If enabled (default), existing data is read in, the ``value``(s) are (re)assigned to the ``key``(s), and then the transformed data is written out. Otherwise, the file contents will be overwritten by the given ``key``(s) and ``value``(s). Basically, this determines whether or not we're doing an ``UPSERT`` or ``INSERT OVERWRITE``.
         """
+        key, value = BaseConfigFile._validate_write_args(key, value)
+
+        with self.lock():
+            document = self._load_document(read_existing_data=read_existing_data)
+
+            for k, v in zip(key, value):
+                self._set_key(document, k, v)
+
+            self._dump(document)
+
+    def add_hook(self, hook):
+        """
+        :param clickfig.stats.StatsHook hook: Called on every parse, read and write of this file.
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def lock(self):
+        """
+        An exclusive (and reentrant) lock on the file, to be held over a read-modify-write cycle, eg::
+
+            with config_file.lock():
+                port = config_file.read(key="server.port").data
+                config_file.write("server.port", int(port) + 1)
+
+        ``write``, ``unset`` and batches take it themselves. It's an advisory ``flock``, so it only keeps out
+        other writers that use it too, and readers never wait for it. While it's held, reads always check the
+        file on disk (ignoring ``revalidate_ttl``), so they never see data from before another process's write.
+
+        :rtype: clickfig.lock.FileLock
+        """
+        return self._file_lock
+
+    def batch(self):
+        """
+        :return: A :class:`ConfigBatch` that stages writes to this file and applies them all at once.
+        :rtype: ConfigBatch
+        """
+        return ConfigBatch(self)
+
+    @abstractmethod
+    def _load_document(self, read_existing_data=True):
+        """
+        Called with the file locked, so the document must reflect the file as it is on disk now
+        (regardless of ``revalidate_ttl``).
+
+        :param bool read_existing_data: If disabled, an empty document is returned.
+        :return: A mutable, format-specific representation of the file's contents that can be
+         modified with ``_set_key``/``_unset_key`` and written back out with ``_dump``.
+        """
+        pass
+
+    @abstractmethod
+    def _set_key(self, document, key, value):
         pass
 
+    @abstractmethod
+    def _unset_key(self, document, key):
+        """
+        :raises KeyNotFoundException: If ``key`` isn't in the document.
+        """
+        pass
+
+    @abstractmethod
+    def _dump(self, document):
+        """
+        Serializes ``document`` and writes it out to the file (via ``_write_text``).
+        """
+        pass
+
+    def _write_text(self, text):
+        """
+        Atomically replaces the contents of the file with ``text``: it's written to a temporary
+        file in the same directory, which is flushed to disk and then renamed over the original,
+        so that readers never see a partially written file (even after a crash).
+
+        If the file is a symlink, it's the file that it points to that's replaced, so the link stays a link.
+        """
+        started = time.perf_counter()
+        target = os.path.realpath(self.name)
+        directory = os.path.dirname(target)
+
+        try:
+            mode = os.stat(target).st_mode & 0o777
+        except OSError:
+            # New files keep the permissions that the temporary file was created with,
+            # ie the ones that ``open`` would have given them.
+            mode = None
+
+        fd, temp_name = create_temp_file(directory)
+
+        try:
+            with os.fdopen(fd, "w") as temp:
+                temp.write(text)
+                temp.flush()
+                os.fsync(temp.fileno())
+                nbytes = os.fstat(temp.fileno()).st_size
+
+            if mode is not None:
+                os.chmod(temp_name, mode)
+
+            os.replace(temp_name, target)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+
+        sync_directory(directory)
+
+        self.invalidate()
+
+        # Every write, unset and batch rewrites the whole file.
+        seconds = time.perf_counter() - started
+        self.stats.increment("rewrites")
+        self.stats.increment("bytes_written", nbytes)
+        self.stats.observe("write", seconds)
+
+        for hook in self.hooks:
+            hook.on_write(self, seconds, nbytes)
+
     def write_from_default(self):
 
         if not self.default_file:
@@ -163,8 +695,7 @@ class BaseConfigFile(object):
         if self.verbose:
             print("Creating default config file at {}".format(self))
 
-        with open(self.name, "w") as f:
-            f.write(config_data)
+        self._write_text(config_data)
 
     def __str__(self):
         return self.name
@@ -2,61 +2,148 @@ from __future__ import absolute_import
 from collections import OrderedDict
 
 import os
+import re
+import six
 import six.moves as sm
 
-from .base import BaseConfigFile, ConfigReadResult, flatten_dict
+from .base import BaseConfigFile
 
-from ...base import return_key_value
+from ...exception import KeyNotFoundException
+from ...path import split_key
 
 
-class INIConfigFile(BaseConfigFile):
+# Matches section headers, as ConfigParser does (ie at the start of a line).
+SECTION_HEADER = re.compile(r"^\[(?P<header>.+)\]", re.MULTILINE)
+
 
-    def read(self, key=None, flatten=True):
+class INIConfigFile(BaseConfigFile):
 
-        if not self.exists():
-            return None
+    def _parse(self):
 
         cfg = sm.configparser.ConfigParser()
         cfg.read(self.name)
-        data = OrderedDict([(section,
+
+        return OrderedDict([(section,
                              OrderedDict([(k, v) for k, v in cfg.items(section)])
                              )
                             for section in cfg.sections()
                             ]
                            ) or None
 
-        result = return_key_value(data, key=key)
+    def _parse_key(self, key):
+
+        parts = split_key(key, self.separator)
+
+        # The DEFAULT section isn't a section of its own in the parsed data, just options inherited by the others.
+        if parts[0] == sm.configparser.DEFAULTSECT:
+            raise KeyNotFoundException(key)
+
+        with open(self.name) as f:
+            text = f.read()
+
+        # Only the requested section (plus any DEFAULT section, whose options every section inherits)
+        # is handed to ConfigParser, and the scan for section headers stops at the end of it.
+        chunks = []
+        end = None
 
-        if flatten and isinstance(result, dict):
-            result = flatten_dict(result, self.separator)
+        for header in SECTION_HEADER.finditer(text):
+            name = header.group("header")
+
+            if name != parts[0] and name != "DEFAULT":
+                continue
+
+            following = SECTION_HEADER.search(text, header.end())
+            end = following.start() if following else len(text)
+            chunks.append(text[header.start():end])
+
+            if name == parts[0]:
+                break
+        else:
+            end = None
+
+        if end is None or len(parts) > 2:
+            raise KeyNotFoundException(key)
+
+        # A DEFAULT section after the requested one still applies to it.
+        default = text.find("\n[DEFAULT]", end - 1)
+        if default != -1:
+            following = SECTION_HEADER.search(text, default + len("\n[DEFAULT]"))
+            chunks.append(text[default + 1:following.start() if following else len(text)])
+
+        cfg = sm.configparser.ConfigParser()
+        cfg.read_string("\n".join(chunks), source=self.name)
 
-        result = ConfigReadResult(result, key=key, separator=self.separator)
+        section = OrderedDict([(k, v) for k, v in cfg.items(parts[0])])
 
-        return result
+        if len(parts) == 1:
+            return section
 
-    def write(self, key, value, read_existing_data=True):
+        try:
+            return section[parts[1]]
+        except KeyError:
+            raise KeyNotFoundException(key)
 
-        key, value = BaseConfigFile._validate_write_args(key, value)
+    def _load_document(self, read_existing_data=True):
 
+        # Edits are made on a ConfigParser (rather than on the parsed data), so that
+        # interpolation and the DEFAULT section survive being written back out.
         cfg = sm.configparser.ConfigParser()
 
         if read_existing_data and os.path.exists(self.name):
             cfg.read(self.name)
 
-        for k, v in zip(key, value):
+        return cfg
+
+    def _split_key(self, key):
+
+        parts = list(split_key(key, self.separator)) if key else []
+
+        if not parts or len(parts) > 2:
+            raise ValueError(
+                "For .ini files, keys must be a top-level section or of the form section{}option".format(
+                    self.separator
+                ))
+
+        return parts
+
+    def _set_key(self, document, key, value):
+
+        parts = self._split_key(key)
+
+        if len(parts) != 2:
+            raise ValueError(
+                "For .ini files, values can only be written to keys of the form section{}option".format(
+                    self.separator
+                ))
+
+        section, option = parts
+
+        if not document.has_section(section=section):
+            document.add_section(section)
+
+        document.set(section, option, str(value))
+
+    def _unset_key(self, document, key):
+
+        parts = self._split_key(key)
+        section = parts[0]
+
+        if not document.has_section(section=section):
+            raise KeyNotFoundException(key)
+
+        if len(parts) == 2:
+            if not document.remove_option(section, parts[1]):
+                raise KeyNotFoundException(key)
 
-            if not k or len(k.split(self.separator)) > 2:
-                raise ValueError(
-                    "For .ini files, keys must be a top-level section or of the form section{}option".format(
-                        self.separator
-                    ))
+            # Sections left without options of their own are removed, too.
+            if set(document.options(section)) - set(document.defaults()):
+                return
 
-            section, option = k.split(".")
+        document.remove_section(section)
 
-            if not cfg.has_section(section=section):
-                cfg.add_section(section)
+    def _dump(self, document):
 
-            cfg.set(section, option, str(v))
+        output = six.StringIO()
+        document.write(output)
 
-        with open(self.name, "w") as f:
-            cfg.write(f)
+        self._write_text(output.getvalue())
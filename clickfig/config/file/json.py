@@ -1,44 +1,118 @@
 from __future__ import absolute_import
+import copy
 import json
-import os
+import re
 from collections import OrderedDict
+from json.decoder import scanstring
 
-import dpath
+from .base import BaseConfigFile
 
-from .base import BaseConfigFile, ConfigReadResult, flatten_dict
+from ...exception import KeyNotFoundException
+from ...path import delete_path, set_path, split_key
 
-from ...base import return_key_value
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Used to skip over values that aren't on the path to a key. Decoding them with the C decoder into plain
+# dicts (and throwing them away) turns out to be much faster than scanning over them in Python.
+_skipper = json.JSONDecoder()
+
+
+def skip_value(text, idx):
+    """
+    Skips over the JSON value starting at ``idx``.
+
+    :param str text: A JSON document.
+    :param int idx: The index of the first character of the value.
+    :return: The index just past the end of the value.
+    :rtype: int
+    """
+    return _skipper.raw_decode(text, idx)[1]
+
+
+def find_value(text, parts):
+    """
+    Finds the start of the value at the path ``parts`` in a JSON document, only walking the keys of the
+    objects on the path and skipping over everything else. If a key is repeated within an object, the
+    last occurrence is used (as ``json`` does), so each object on the path is walked to its end.
+
+    :param str text: A JSON document.
+    :param tuple parts: The parts of the key.
+    :return: The index of the first character of the value.
+    :rtype: int
+    :raises KeyNotFoundException: If there's no value at that path.
+    """
+    idx = WHITESPACE.match(text, 0).end()
+
+    for part in parts:
+        if text[idx:idx + 1] != "{":
+            raise KeyNotFoundException(part)
+
+        idx = WHITESPACE.match(text, idx + 1).end()
+        found = None
+
+        while True:
+            if text[idx:idx + 1] != '"':
+                raise KeyNotFoundException(part)
+
+            name, idx = scanstring(text, idx + 1)
+            idx = WHITESPACE.match(text, idx).end()
+
+            if text[idx:idx + 1] != ":":
+                raise ValueError("Expecting ':' delimiter at char {}".format(idx))
+
+            idx = WHITESPACE.match(text, idx + 1).end()
+
+            if name == part:
+                found = idx
+
+            idx = WHITESPACE.match(text, skip_value(text, idx)).end()
+
+            if text[idx:idx + 1] != ",":
+                break
+
+            idx = WHITESPACE.match(text, idx + 1).end()
+
+        if found is None:
+            raise KeyNotFoundException(part)
+
+        idx = found
+
+    return idx
 
 
 class JSONConfigFile(BaseConfigFile):
-    def read(self, key=None, flatten=True):
 
-        if not self.exists():
-            return None
+    def _parse(self):
 
         with open(self.name) as f:
-            data = json.loads(f.read(), object_pairs_hook=OrderedDict)
+            return json.loads(f.read(), object_pairs_hook=OrderedDict)
 
-        result = return_key_value(data, key=key)
+    def _parse_key(self, key):
+
+        with open(self.name) as f:
+            text = f.read()
 
-        if flatten and isinstance(result, dict):
-            result = flatten_dict(result, self.separator)
+        try:
+            idx = find_value(text, split_key(key, self.separator))
+        except KeyNotFoundException:
+            raise KeyNotFoundException(key)
 
-        result = ConfigReadResult(result, key=key, separator=self.separator)
+        return json.JSONDecoder(object_pairs_hook=OrderedDict).raw_decode(text, idx)[0]
 
-        return result
+    def _load_document(self, read_existing_data=True):
 
-    def write(self, key, value, read_existing_data=True):
+        data = None
 
-        key, value = BaseConfigFile._validate_write_args(key, value)
+        if read_existing_data:
+            data = copy.deepcopy(self._load(self._stat_signature()))
 
-        data = {}
+        return data if data is not None else OrderedDict()
 
-        if read_existing_data and os.path.exists(self.name):
-            data = self.read(flatten=False).data
+    def _set_key(self, document, key, value):
+        set_path(document, key, value, separator=self.separator)
 
-        for k, v in zip(key, value):
-            dpath.util.new(data, k, v, separator=".")
+    def _unset_key(self, document, key):
+        delete_path(document, key, separator=self.separator)
 
-        with open(self.name, "w") as f:
-            f.write(json.dumps(data, indent=4))
+    def _dump(self, document):
+        self._write_text(json.dumps(document, indent=4))
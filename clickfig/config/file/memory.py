@@ -0,0 +1,148 @@
+from __future__ import absolute_import
+import copy
+import logging
+import os
+import threading
+
+from .base import BaseConfigFile
+
+from ...path import delete_path, set_path
+
+logger = logging.getLogger(__name__)
+
+
+def nest(values, separator="."):
+    """
+    :param dict values: Maps keys (eg ``server.port``) to values. Values may themselves be (nested) dicts,
+     which are used as they are rather than copied.
+    :param str separator: The separator used to put parts of keys together.
+    :return: The nested data.
+    :rtype: dict
+    """
+    data = {}
+
+    for key, value in values.items():
+        set_path(data, key, value, separator=separator)
+
+    return data
+
+
+class DictConfigFile(BaseConfigFile):
+    """
+    A level whose data is held in memory rather than in a file, eg for defaults, or for overrides in tests.
+    It's never read from or written to disk: writes (and unsets) replace the data in memory.
+    """
+
+    in_memory = True
+
+    def __init__(self, data=None, level="__default__", name=None, separator=".", **kwargs):
+        """
+        :param dict|None data: Maps keys (eg ``server.port``) to values, which may be nested dicts. The values
+         are used as they are, so they shouldn't be modified afterwards.
+        :param str level: The level of this data.
+        :param str|None name: A name for the level, for use in messages. Defaults to ``<dict:LEVEL>``.
+        :param str separator: The separator to use for sections, subsections, etc in keys.
+
+        Any other arguments are passed on to :class:`BaseConfigFile`.
+        """
+        # Bumped whenever the data is replaced, in place of the file's stat signature.
+        self._version = 0
+        self._memory_data = nest(data or {}, separator=separator)
+        self._memory_lock = threading.RLock()
+
+        kwargs.pop("default_file", None)
+
+        super(DictConfigFile, self).__init__(name or "<dict:{}>".format(level), level=level,
+                                             separator=separator, **kwargs)
+
+    def exists(self):
+        return True
+
+    def _stat_signature(self):
+        return self._version, 0, id(self)
+
+    def _parse(self):
+        return self._memory_data
+
+    def lock(self):
+        return self._memory_lock
+
+    def _load_document(self, read_existing_data=True):
+
+        if read_existing_data:
+            return copy.deepcopy(self._memory_data)
+
+        return {}
+
+    def _set_key(self, document, key, value):
+        set_path(document, key, value, separator=self.separator)
+
+    def _unset_key(self, document, key):
+        delete_path(document, key, separator=self.separator)
+
+    def _dump(self, document):
+        self._memory_data = document
+        self._version += 1
+        self.stats.increment("rewrites")
+
+    def write_from_default(self):
+        pass
+
+
+class EnvConfigFile(DictConfigFile):
+    """
+    A read-only level made up of environment variables with a given prefix. With a prefix of ``MYAPP_``,
+    ``MYAPP_SERVER__PORT=8080`` is the key ``server.port``: the rest of the name is lowercased, and double
+    underscores separate the parts of the key. Values are always strings.
+
+    The variables are read when the level is created, and again by ``invalidate``.
+
+    If there's a variable for a section as well as for keys within it (eg both ``MYAPP_SERVER`` and
+    ``MYAPP_SERVER__PORT``), the keys within it win, and the variable for the section is ignored (with a warning).
+    """
+
+    def __init__(self, prefix, level="env", environ=None, separator=".", **kwargs):
+        """
+        :param str prefix: The prefix of the variables to include, eg ``MYAPP_``.
+        :param str level: The level of this data.
+        :param dict|None environ: The variables to read. Defaults to ``os.environ``.
+        :param str separator: The separator to use for sections, subsections, etc in keys.
+        """
+        self.prefix = prefix
+        self.environ = os.environ if environ is None else environ
+
+        super(EnvConfigFile, self).__init__(self._read_environ(separator), level=level,
+                                            name="<env:{}*>".format(prefix), separator=separator, **kwargs)
+
+    def _read_environ(self, separator):
+        prefix = self.prefix
+        names = dict((separator.join(name[len(prefix):].lower().split("__")), name)
+                     for name in self.environ if name.startswith(prefix) and name != prefix)
+
+        sections = set()
+
+        for key in names:
+            parts = key.split(separator)
+            sections.update(separator.join(parts[:i]) for i in range(1, len(parts)))
+
+        for key in sorted(sections.intersection(names)):
+            logger.warning("Ignoring %s, as there are variables for keys within %s", names.pop(key), key)
+
+        return dict((key, self.environ[name]) for key, name in names.items())
+
+    def invalidate(self):
+        super(EnvConfigFile, self).invalidate()
+
+        data = nest(self._read_environ(self.separator), separator=self.separator)
+
+        if data != self._memory_data:
+            self._memory_data = data
+            self._version += 1
+
+    def write(self, key, value, read_existing_data=True):
+
+        raise NotImplementedError
+
+    def _load_document(self, read_existing_data=True):
+
+        raise NotImplementedError
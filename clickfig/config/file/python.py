@@ -1,50 +1,143 @@
 from __future__ import absolute_import
 
-import imp
-import inspect
+import hashlib
+import importlib.machinery
+import importlib.util
+import marshal
 import os
-import re
+import sys
 
-from .base import BaseConfigFile, ConfigReadResult, flatten_dict
-from ...base import return_key_value
+from .base import BaseConfigFile
 
 
-# TODO: Python 3 compatibility
-def import_module(module_file):
+class ConfigFileLoader(importlib.machinery.SourceFileLoader):
+    """
+    A source loader for config files whose cached bytecode is validated against a hash of the source
+    (a "checked hash" pyc, as described in PEP 552), rather than against its mtime (which only has
+    a resolution of one second, so a quick rewrite of the file could otherwise pick up stale bytecode).
+    """
+
+    def __init__(self, fullname, path, source=None):
+        """
+        :param bytes|None source: The source of the file, if it's already been read.
+        """
+        super(ConfigFileLoader, self).__init__(fullname, path)
+        self.source = source
+
+    def get_code(self, fullname):
+        source = self.source
+        if source is None:
+            source = self.get_data(self.path)
+
+        source_hash = importlib.util.source_hash(source)
+        bytecode_path = importlib.util.cache_from_source(self.path)
+
+        try:
+            data = self.get_data(bytecode_path)
+        except OSError:
+            data = b""
+
+        if data[:4] == importlib.util.MAGIC_NUMBER and data[4:8] == _CHECKED_HASH_FLAGS and \
+                data[8:16] == source_hash:
+            try:
+                return marshal.loads(data[16:])
+            except (EOFError, ValueError, TypeError):
+                pass
+
+        code = self.source_to_code(source, self.path)
+
+        if not sys.dont_write_bytecode:
+            try:
+                self.set_data(bytecode_path, importlib.util.MAGIC_NUMBER + _CHECKED_HASH_FLAGS +
+                              source_hash + marshal.dumps(code))
+            except OSError:
+                pass
+
+        return code
+
+
+# The flags field of a pyc that's validated by (checked) source hash.
+_CHECKED_HASH_FLAGS = b"\x03\x00\x00\x00"
+
+
+def import_module(module_file, source=None):
     """
     Given a path to a Python file, this function imports it and returns the imported module.
 
+    The module gets a private name derived from the file's full path, and isn't added to ``sys.modules``,
+    so config files never clash with (or replace) each other or real modules with the same name.
+    Compiled bytecode is cached in ``__pycache__``.
+
     :param str module_file: The filename of the module that you wish to include.
+    :param bytes|None source: The contents of the file, if they've already been read.
     """
 
-    module_name = re.sub("\.py$", "", os.path.split(module_file)[-1])
-    module_dir = os.path.abspath(os.path.dirname(module_file))
+    path = os.path.abspath(module_file)
+    module_name = "clickfig._config_{}".format(hashlib.sha1(path.encode("utf-8")).hexdigest()[:16])
+
+    loader = ConfigFileLoader(module_name, path, source=source)
+    spec = importlib.util.spec_from_file_location(module_name, path, loader=loader)
+    module = importlib.util.module_from_spec(spec)
 
-    f, filename, description = imp.find_module(module_name, [module_dir])
-    return imp.load_module(module_name, f, filename, description)
+    loader.exec_module(module)
+
+    return module
+
+
+def module_data(module):
+    """
+    :return: The members of ``module``, leaving out dunder names (``__name__``, ``__builtins__``, etc).
+    :rtype: dict
+    """
+    return {k: v for k, v in vars(module).items()
+            if not (k.startswith("__") and k.endswith("__"))}
 
 
 class PythonConfigFile(BaseConfigFile):
-    def read(self, key=None, flatten=True):
-        if not self.exists():
-            return None
+    def __init__(self, *args, **kwargs):
+        # Digest of the source that ``_module_data`` was extracted from.
+        self._source_digest = None
+        self._module_data = None
+
+        super(PythonConfigFile, self).__init__(*args, **kwargs)
+
+    def invalidate(self):
+        super(PythonConfigFile, self).invalidate()
 
-        config_module = import_module(self.name)
+        self._source_digest = None
+        self._module_data = None
 
-        data = {
-            k: v for k, v in inspect.getmembers(config_module) if
-            k not in ["__builtins__", "__doc__", "__name__", "__package__", "__file__"]
-        }
+    def _parse(self):
 
-        result = return_key_value(data, key=key)
+        # This is only called when the file's stat signature has changed. If the source itself
+        # hasn't (eg the file was just touched), the module isn't executed again.
+        with open(self.name, "rb") as f:
+            source = f.read()
 
-        if flatten and isinstance(result, dict):
-            result = flatten_dict(result, separator=self.separator)
+        digest = hashlib.sha1(source).hexdigest()
 
-        result = ConfigReadResult(result, key=key, separator=self.separator)
+        if digest != self._source_digest:
+            self._module_data = module_data(import_module(self.name, source=source))
+            self._source_digest = digest
 
-        return result
+        return self._module_data
 
     def write(self, key, value, read_existing_data=True):
 
         raise NotImplementedError
+
+    def _load_document(self, read_existing_data=True):
+
+        raise NotImplementedError
+
+    def _set_key(self, document, key, value):
+
+        raise NotImplementedError
+
+    def _unset_key(self, document, key):
+
+        raise NotImplementedError
+
+    def _dump(self, document):
+
+        raise NotImplementedError
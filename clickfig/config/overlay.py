@@ -0,0 +1,57 @@
+"""
+Configs that stack a level held in memory on top of another config (see :meth:`Config.with_overrides`).
+
+An :class:`OverlayConfig` shares the file objects of the config beneath it, and so the data parsed from them
+and their caches. Its combined index is a ``ChainMap`` of the index of its own level over the combined index
+of the config beneath it, so it's never copied, and it stays up to date with the files as that one does.
+"""
+from collections import ChainMap
+
+from .base import Config
+
+
+class OverlayConfig(Config):
+    """
+    A copy-on-write view of a :class:`Config`, with a level held in memory on top of its levels.
+    """
+
+    def __init__(self, parent, overlay):
+        """
+        :param Config parent: The config beneath the new level.
+        :param dict overlay: The info of the new level, with either ``data`` or ``env`` (see :class:`Config`).
+        """
+        if overlay.get("level") in parent.levels:
+            raise ValueError("Level {} is already in use".format(overlay.get("level")))
+
+        if self._memory_type(overlay) is None:
+            raise ValueError("An overlay must have either data or env, not {}".format(overlay))
+
+        super(OverlayConfig, self).__init__([overlay], separator=parent.separator, verbose=parent.verbose,
+                                            revalidate_ttl=parent.revalidate_ttl, lazy=True,
+                                            partial_parse_threshold=parent.partial_parse_threshold,
+                                            schema=parent.schema)
+
+        self.parent = parent
+        self.overlay_file = self._memory_file(overlay)
+
+        self.file = self.file + parent.file
+        self._config_files = [self.overlay_file] + parent.config_files
+
+    def _update_combined_index(self):
+        parent = self.parent
+
+        with parent._lock:
+            parent_combined = parent._combined_index()
+            parent_indexes = parent._level_indexes
+
+        self.overlay_file._load()
+        index = self.overlay_file._key_index()
+
+        combined = self._combined
+
+        if combined is None or combined.maps[0] is not index.values or combined.maps[1] is not parent_combined:
+            combined = self._combined = ChainMap(index.values, parent_combined)
+
+        self._level_indexes = [index] + parent_indexes
+
+        return combined
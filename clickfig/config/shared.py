@@ -0,0 +1,596 @@
+"""
+Sharing a :class:`Config`'s effective configuration between processes through shared memory.
+
+In a pre-fork server, one process (eg the master) publishes the config with a :class:`SharedConfigPublisher`,
+and every worker reads it through a :class:`SharedConfig`, which looks keys up directly in the shared
+memory. Workers never parse the files themselves, and hold none of the parsed data.
+
+Each publish writes the effective configuration into a new, read-only data segment, and then points a small
+control segment at it, bumping its generation. Readers check the generation on every
+read (which is just a read from memory), and switch to the new data segment when it changes. The previous
+data segment is unlinked as soon as the new one has been published, but readers that still have it mapped
+can go on using it until they switch.
+
+The effective configuration is the config's combined index: every key (of a leaf or a section) in any level,
+with its value from the highest-precedence level that contains it, just as :meth:`Config.read` gives it. So
+reading a section gives the section from a single level, not the sections of every level merged together.
+
+A data segment is laid out as a header, followed by a table with an entry for each key (sorted by key, so
+that keys can be found by binary search, and the keys within a section are contiguous), followed by the
+keys and values themselves. Each entry records the level its value comes from. Sections have no value of
+their own: a section is put together from the entries beneath it that come from the same level, so every
+leaf is only stored once, however deeply it's nested. Strings are stored as UTF-8, and any other values are
+pickled, so (as with :mod:`clickfig.config.snapshot`) the segments shouldn't be any more widely accessible
+than the config files.
+"""
+import hashlib
+import os
+import pickle
+import struct
+import threading
+import time
+from fnmatch import fnmatchcase
+from multiprocessing import shared_memory
+
+from ..base import _missing, flatten_dict, lookup_many
+from ..exception import KeyNotFoundException, SharedConfigUnavailableException
+from ..index import WILDCARDS
+from ..path import join_key, set_path, split_key
+from .file.base import ConfigReadResult
+
+MAGIC = b"CLKFGSHM"
+
+# Bumped whenever the layout of the segments changes.
+SHARED_FORMAT = 3
+
+# magic, format, sequence number (odd while being updated), generation, name of the current data segment.
+CONTROL = struct.Struct("<8sIQQ64s")
+
+# magic, format, generation, number of keys.
+HEADER = struct.Struct("<8sIQI")
+
+# Offset and length of the key, offset and length of the value, the kind of value, and the level it's from.
+ENTRY = struct.Struct("<IIIIHH")
+
+KIND_STRING = 0
+KIND_PICKLE = 1
+KIND_SECTION = 2
+
+# How many times readers retry straight away while the control segment is being updated, and for how many
+# seconds they go on retrying after that. A publish only holds it for a few writes to memory, so running out
+# means that the publisher died part way through one.
+SEQLOCK_SPINS = 1000
+SEQLOCK_TIMEOUT = 0.1
+
+_attach_lock = threading.Lock()
+
+
+def attach(name):
+    """
+    Opens an existing shared memory segment, without handing it to the resource tracker (which would
+    otherwise unlink it, out from under every other process, when this one exits).
+
+    :param str name: The name of the segment.
+    :rtype: multiprocessing.shared_memory.SharedMemory
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13, there's no way to opt out of tracking, so registration is skipped by hand.
+        pass
+
+    from multiprocessing import resource_tracker
+
+    with _attach_lock:
+        register = resource_tracker.register
+
+        def register_except_shared_memory(name, rtype):
+            if rtype != "shared_memory":
+                register(name, rtype)
+
+        resource_tracker.register = register_except_shared_memory
+
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def default_shared_name(file_names):
+    """
+    :param list[str] file_names: The names of the files in the config (in order of precedence).
+    :return: A name for the control segment that's specific to the given list of files (and short enough
+     for platforms with tight limits on the names of segments).
+    :rtype: str
+    """
+    digest = hashlib.sha1("\n".join(os.path.abspath(name) for name in file_names).encode("utf-8"))
+
+    return "clickfig-{}".format(digest.hexdigest()[:10])
+
+
+def combined_items(config):
+    """
+    :param Config config: A config.
+    :return: A ``(key, value, level)`` tuple for every key in the config's combined index, where ``level`` is the
+     position (in order of precedence) of the level that the value comes from.
+    :rtype: list[tuple]
+    """
+    with config._lock:
+        combined = config._combined_index()
+        indexes = config._level_indexes
+        levels = {}
+
+        for level in range(len(indexes) - 1, -1, -1):
+            for key in indexes[level].values:
+                levels[key] = level
+
+        return [(key, value, levels[key]) for key, value in combined.items()]
+
+
+def encode_layout(items, generation):
+    """
+    :param iterable items: The ``(key, value, level)`` tuples to store, for sections as well as leaves (see
+     ``combined_items``). Only the keys of sections are stored, not their values.
+    :param int generation: The generation of the data.
+    :return: The contents of a data segment.
+    :rtype: bytes
+    """
+    entries = []
+
+    for key, value, level in items:
+        if isinstance(value, dict):
+            kind, encoded = KIND_SECTION, b""
+        elif isinstance(value, str):
+            kind, encoded = KIND_STRING, value.encode("utf-8")
+        else:
+            kind, encoded = KIND_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        entries.append((key.encode("utf-8"), encoded, kind, level))
+
+    entries.sort(key=lambda entry: entry[0])
+
+    table = bytearray(HEADER.pack(MAGIC, SHARED_FORMAT, generation, len(entries)))
+    blob = bytearray()
+    offset = HEADER.size + ENTRY.size * len(entries)
+
+    for key, encoded, kind, level in entries:
+        table += ENTRY.pack(offset + len(blob), len(key), offset + len(blob) + len(key), len(encoded), kind, level)
+        blob += key
+        blob += encoded
+
+    return bytes(table + blob)
+
+
+class SharedConfigPublisher(object):
+    """
+    Publishes the effective configuration of a :class:`Config` to shared memory, eg::
+
+        publisher = SharedConfigPublisher(cfg)
+        publisher.publish()
+        cfg.watch(lambda change: publisher.publish())
+
+    Segments are unlinked when they're superseded, and by ``close``.
+    """
+
+    def __init__(self, config, name=None):
+        """
+        :param Config config: The config to publish.
+        :param str|None name: The name of the control segment that readers attach to. Defaults to one
+         derived from the names of the config's files (see ``default_shared_name``).
+        """
+        self.config = config
+        self.name = name or default_shared_name(config.file_names)
+
+        self._control = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _open_control(self):
+        try:
+            control = shared_memory.SharedMemory(name=self.name, create=True, size=CONTROL.size)
+            control.buf[:CONTROL.size] = CONTROL.pack(MAGIC, SHARED_FORMAT, 0, 0, b"")
+        except FileExistsError:
+            # Left behind by an earlier publisher: carry on from its generation, so that
+            # generations never go backwards for readers that are still attached.
+            control = attach(self.name)
+
+            if bytes(control.buf[:8]) != MAGIC:
+                control.close()
+                raise ValueError("Shared memory segment {} isn't a clickfig control segment".format(self.name))
+
+            # An odd sequence number means the earlier publisher died part way through an update: rounding it
+            # up lets readers back in, and keeps this publisher's updates odd while they're being made.
+            sequence = struct.unpack_from("<Q", control.buf, 12)[0]
+
+            if sequence % 2:
+                struct.pack_into("<Q", control.buf, 12, sequence + 1)
+
+        return control
+
+    def publish(self):
+        """
+        Writes the current effective configuration to a new data segment, and points readers at it.
+
+        :return: The generation of the published data.
+        :rtype: int
+        """
+        with self._lock:
+            if self._control is None:
+                self._control = self._open_control()
+
+            control = self._control
+            _, _, sequence, generation, previous_name = CONTROL.unpack_from(control.buf)
+            previous_name = previous_name.rstrip(b"\0").decode("ascii")
+            generation += 1
+
+            layout = encode_layout(combined_items(self.config), generation)
+            data_name = "{}-{}".format(self.name, generation)
+
+            try:
+                data = shared_memory.SharedMemory(name=data_name, create=True, size=len(layout))
+            except FileExistsError:
+                stale = attach(data_name)
+                stale.close()
+                stale.unlink()
+                data = shared_memory.SharedMemory(name=data_name, create=True, size=len(layout))
+
+            data.buf[:len(layout)] = layout
+
+            # A seqlock: readers retry while the sequence number is odd, or if it changed while they were
+            # reading, so they never see the generation of one publish with the name of another.
+            sequence += 1
+            struct.pack_into("<Q", control.buf, 12, sequence)
+            CONTROL.pack_into(control.buf, 0, MAGIC, SHARED_FORMAT, sequence, generation, data_name.encode("ascii"))
+            struct.pack_into("<Q", control.buf, 12, sequence + 1)
+
+            previous, self._data = self._data, data
+
+            if previous is not None:
+                previous.close()
+                previous.unlink()
+            elif previous_name:
+                # Left behind by an earlier publisher.
+                try:
+                    previous = attach(previous_name)
+                except FileNotFoundError:
+                    pass
+                else:
+                    previous.close()
+                    previous.unlink()
+
+            return generation
+
+    def close(self):
+        """
+        Unlinks the segments. Readers that are still attached can go on reading the last published data.
+        """
+        with self._lock:
+            for segment in (self._data, self._control):
+                if segment is not None:
+                    segment.close()
+                    segment.unlink()
+
+            self._data = self._control = None
+
+
+class SharedConfig(object):
+    """
+    Read-only access to a configuration published by a :class:`SharedConfigPublisher`, with the same read
+    methods as :class:`Config`. Values are decoded from shared memory each time they're read.
+    """
+
+    def __init__(self, name, separator="."):
+        """
+        :param str name: The name of the control segment.
+        :param str separator: The separator used to put parts of keys together.
+        """
+        self.name = name
+        self.separator = separator
+
+        self._control = attach(name)
+        self._data = None
+        self._view = None
+        self._count = 0
+
+        # The (odd) sequence number that the control segment was last found stuck at, if any.
+        self._stuck_sequence = None
+
+        #: The generation of the data currently being read.
+        self.generation = None
+
+        self.refresh()
+
+    def _read_control(self):
+        """
+        :return: The generation and name of the current data segment, or ``None`` if the control segment
+         stayed part way through an update for longer than ``SEQLOCK_TIMEOUT``.
+        :rtype: tuple|None
+        """
+        buf = self._control.buf
+        spins = 0
+        deadline = None
+
+        while True:
+            magic, format_, sequence, generation, data_name = CONTROL.unpack_from(buf)
+
+            if sequence % 2 == 0 and struct.unpack_from("<Q", buf, 12)[0] == sequence:
+                break
+
+            # Once it's been found stuck, it isn't waited for again until it's moved on.
+            if sequence == self._stuck_sequence:
+                return None
+
+            spins += 1
+
+            if spins >= SEQLOCK_SPINS:
+                if deadline is None:
+                    deadline = time.monotonic() + SEQLOCK_TIMEOUT
+                elif time.monotonic() > deadline:
+                    self._stuck_sequence = sequence
+                    return None
+
+                time.sleep(0)
+
+        if magic != MAGIC or format_ != SHARED_FORMAT:
+            raise ValueError("Shared memory segment {} isn't a (compatible) clickfig control segment".format(self.name))
+
+        return generation, data_name.rstrip(b"\0").decode("ascii")
+
+    def refresh(self):
+        """
+        Switches to the most recently published data, if it's changed. This is done by every read.
+
+        If the publisher died part way through a publish, the data that was last read goes on being used.
+
+        :return: Whether or not there was new data.
+        :rtype: bool
+        :raises SharedConfigUnavailableException: If there's no data yet, and the publisher died part way
+         through a publish.
+        """
+        while True:
+            control = self._read_control()
+
+            if control is None:
+                if self.generation is None:
+                    raise SharedConfigUnavailableException(
+                        "Shared memory segment {} was left part way through an update".format(self.name))
+
+                return False
+
+            generation, data_name = control
+
+            if generation == self.generation:
+                return False
+
+            if not data_name:
+                # The publisher is still writing out its first generation.
+                data = None
+                break
+
+            try:
+                data = attach(data_name)
+            except FileNotFoundError:
+                # Superseded (and unlinked) before we got to it.
+                continue
+
+            break
+
+        self.close_data()
+
+        if data is not None:
+            self._data = data
+            self._view = data.buf
+            self._count = HEADER.unpack_from(self._view)[3]
+
+        self.generation = generation
+
+        return True
+
+    def close_data(self):
+        if self._data is not None:
+            self._view = None
+            self._count = 0
+            self._data.close()
+            self._data = None
+
+    def close(self):
+        self.close_data()
+        self._control.close()
+
+    def _key(self, i):
+        key_offset, key_length = struct.unpack_from("<II", self._view, HEADER.size + ENTRY.size * i)
+        return bytes(self._view[key_offset:key_offset + key_length])
+
+    def _bisect(self, key):
+        """
+        :param bytes key: The (encoded) key to look for.
+        :return: The index of the first entry whose key isn't less than ``key``.
+        :rtype: int
+        """
+        low, high = 0, self._count
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def _kind(self, i):
+        return ENTRY.unpack_from(self._view, HEADER.size + ENTRY.size * i)[4]
+
+    def _value(self, i):
+        key_offset, key_length, value_offset, value_length, kind, level = \
+            ENTRY.unpack_from(self._view, HEADER.size + ENTRY.size * i)
+        encoded = self._view[value_offset:value_offset + value_length]
+
+        if kind == KIND_STRING:
+            return bytes(encoded).decode("utf-8")
+        elif kind == KIND_PICKLE:
+            return pickle.loads(encoded)
+
+        return self._section(bytes(self._view[key_offset:key_offset + key_length]).decode("utf-8"), level)
+
+    def _section(self, prefix, level):
+        """
+        :param str prefix: The key of a section.
+        :param int level: The level that the section comes from.
+        :return: The section, put together from the entries beneath it that come from the same level. Any
+         other entries beneath it come from lower-precedence levels, so they aren't part of the section.
+        :rtype: dict
+        """
+        encoded_prefix = (prefix + self.separator).encode("utf-8")
+        skip = len(prefix) + len(self.separator)
+        section = {}
+
+        for i in self._range(prefix):
+            key = self._key(i)
+            kind, entry_level = ENTRY.unpack_from(self._view, HEADER.size + ENTRY.size * i)[4:]
+
+            if entry_level != level or not key.startswith(encoded_prefix):
+                continue
+
+            # Entries are sorted, so a section comes before anything in it: an empty dict is only ever
+            # put in place of nothing.
+            set_path(section, key.decode("utf-8")[skip:], {} if kind == KIND_SECTION else self._value(i),
+                     separator=self.separator)
+
+        return section
+
+    def lookup(self, key):
+        """
+        :param str|None key: A key, or ``None`` for every top-level key.
+        :return: The (raw) value of ``key``, or a dict of the top-level keys and their values.
+        :raises KeyNotFoundException: If ``key`` hasn't been published.
+        """
+        self.refresh()
+
+        if key is None:
+            top_level = {}
+
+            for i in range(self._count):
+                key = self._key(i).decode("utf-8")
+
+                if len(split_key(key, self.separator)) == 1:
+                    top_level[key] = self._value(i)
+
+            return top_level
+
+        encoded = key.encode("utf-8")
+        i = self._bisect(encoded)
+
+        if i < self._count and self._key(i) == encoded:
+            return self._value(i)
+
+        raise KeyNotFoundException(key)
+
+    def _range(self, prefix):
+        """
+        :param str|None prefix: A key, or ``None`` for everything.
+        :return: The indexes of the entries beneath ``prefix`` (or of ``prefix`` itself).
+        :rtype: range
+        """
+        if prefix is None:
+            return range(self._count)
+
+        encoded = prefix.encode("utf-8")
+        separator = self.separator.encode("utf-8")
+
+        start = self._bisect(encoded)
+        end = self._bisect(encoded + separator[:-1] + bytes([separator[-1] + 1]))
+
+        return range(start, end)
+
+    def items(self, prefix=None, pattern=None):
+        """
+        The same as :meth:`Config.items`. Keys beneath a prefix are found by binary search. For a pattern,
+        every key beneath its leading parts (up to the first wildcard) is looked at.
+        """
+        if prefix is not None and pattern is not None:
+            raise ValueError("Give either a prefix or a pattern, not both")
+
+        self.refresh()
+
+        if pattern is None:
+            # As with Config.items, sections are left out: their leaves are listed instead.
+            return [(key, self._value(i)) for key, i in
+                    ((self._key(i).decode("utf-8"), i) for i in self._range(prefix) if self._kind(i) != KIND_SECTION)
+                    if prefix is None or key == prefix or key.startswith(prefix + self.separator)]
+
+        parts = split_key(pattern, self.separator)
+        literal = 0
+
+        while literal < len(parts) and WILDCARDS.isdisjoint(parts[literal]):
+            literal += 1
+
+        matches = []
+
+        for i in self._range(join_key(parts[:literal], self.separator) if literal else None):
+            key_parts = split_key(self._key(i).decode("utf-8"), self.separator)
+
+            # Every section is published too, so only keys with as many parts as the pattern can match it.
+            if len(key_parts) == len(parts) and \
+                    all(fnmatchcase(key_part, part) for key_part, part in zip(key_parts, parts)):
+                matches.append((self._key(i).decode("utf-8"), self._value(i)))
+
+        return matches
+
+    def keys(self, prefix=None, pattern=None):
+        """
+        The same as :meth:`Config.keys`.
+        """
+        return [key for key, _ in self.items(prefix=prefix, pattern=pattern)]
+
+    def read(self, key=None, flatten=True):
+        """
+        The same as :meth:`Config.read`, except that the whole configuration (with no key) is returned
+        as a single result, of every top-level key with its value from the highest-precedence level.
+        """
+        value = self.lookup(key)
+
+        if flatten and isinstance(value, dict):
+            value = flatten_dict(value, self.separator)
+
+        return ConfigReadResult(value, key=key, separator=self.separator)
+
+    def read_many(self, keys, default=_missing, flatten=True):
+        """
+        The same as :meth:`Config.read_many`.
+        """
+        values = {}
+
+        for key in keys:
+            try:
+                values[key] = self.lookup(key)
+            except KeyNotFoundException:
+                pass
+
+        return lookup_many(values, keys, default=default, flatten=flatten, separator=self.separator)
+
+    def get(self, key, default=None, flatten=True):
+        """
+        The same as :meth:`Config.get`.
+        """
+        try:
+            value = self.lookup(key)
+        except KeyNotFoundException:
+            return default
+
+        if flatten and isinstance(value, dict):
+            value = flatten_dict(value, self.separator)
+
+        return value
+
+    def has(self, key):
+        try:
+            self.lookup(key)
+        except KeyNotFoundException:
+            return False
+
+        return True
+
+    def __contains__(self, key):
+        return self.has(key)
@@ -0,0 +1,89 @@
+"""
+Compiled snapshots of a :class:`Config`'s parsed and indexed data.
+
+A snapshot is a pickle of the per-level key indexes and the combined index of a config, along with the stat
+signatures of the files they were built from. As long as those signatures still match, the snapshot can be
+loaded instead of parsing every file, which turns loading the config into a single read of a small file.
+
+Note that, as with any pickle, a snapshot should only be kept somewhere that's no more writable than the
+config files themselves.
+"""
+import hashlib
+import os
+import pickle
+
+from ..version import __version__
+
+# Bumped whenever the layout of the snapshot changes.
+SNAPSHOT_FORMAT = 4
+
+
+def default_snapshot_path(file_names, directory=None):
+    """
+    :param list[str] file_names: The names of the files in the config (in order of precedence).
+    :param str|None directory: Where to put the snapshot. Defaults to the directory of the first file.
+    :return: A path for the snapshot that's specific to the given list of files.
+    :rtype: str
+    """
+    names = [os.path.abspath(name) for name in file_names]
+    digest = hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()[:16]
+
+    if directory is None:
+        directory = os.path.dirname(names[0])
+
+    return os.path.join(directory, ".clickfig-{}.snapshot".format(digest))
+
+
+def load_snapshot(path):
+    """
+    :param str path: The path of the snapshot.
+    :return: The snapshot's contents, or ``None`` if it doesn't exist or can't be used
+     (eg it was written by a different version of clickfig).
+    :rtype: dict|None
+    """
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(payload, dict) or payload.get("format") != SNAPSHOT_FORMAT or \
+            payload.get("version") != __version__:
+        return None
+
+    return payload
+
+
+def save_snapshot(path, payload):
+    """
+    Atomically writes a snapshot. Snapshots are only an optimization, so this fails quietly if the data
+    can't be pickled (eg Python config files that contain functions) or the snapshot can't be written.
+
+    :param str path: The path of the snapshot.
+    :param dict payload: The contents of the snapshot.
+    :return: Whether or not the snapshot was written.
+    :rtype: bool
+    """
+    import tempfile
+
+    payload = dict(payload, format=SNAPSHOT_FORMAT, version=__version__)
+
+    try:
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        with tempfile.NamedTemporaryFile("wb", dir=directory, prefix=".clickfig-", delete=False) as temp:
+            temp.write(data)
+
+        os.replace(temp.name, path)
+    except (IOError, OSError):
+        return False
+
+    return True
@@ -1,2 +1,32 @@
 class KeyNotFoundException(Exception):
     pass
+
+
+class KeysNotFoundException(KeyNotFoundException):
+    """
+    Raised when several keys were looked up at once and some of them weren't found.
+    The missing keys are available as the ``keys`` attribute.
+    """
+
+    def __init__(self, keys):
+        super(KeysNotFoundException, self).__init__(", ".join(str(k) for k in keys))
+        self.keys = list(keys)
+
+
+class SharedConfigUnavailableException(Exception):
+    """
+    Raised when a shared config's control segment stays part way through an update (eg because its publisher
+    died while publishing), and there's no earlier data to carry on reading.
+    """
+
+
+class SchemaValidationException(ValueError):
+    """
+    Raised when the configuration doesn't match its schema. Every problem that was found is
+    available in the ``errors`` attribute.
+    """
+
+    def __init__(self, errors):
+        super(SchemaValidationException, self).__init__(
+            "Invalid configuration:\n" + "\n".join("  " + error for error in errors))
+        self.errors = list(errors)
@@ -0,0 +1,496 @@
+"""
+Merkle-style content hashes of configuration trees, for cheap fingerprints and diffs.
+
+Every nested dict in a tree gets a digest computed from the (sorted) keys beneath it and the digests of their
+values, so two trees (or two subtrees) have the same digest exactly when they have the same contents, regardless
+of key order. The digests of a tree are computed in a single pass the first time one is asked for, and kept
+for as long as the tree is, ie until its file is re-parsed.
+
+Two trees are diffed by comparing the digests of their roots, and only descending into subtrees whose
+digests differ, so the cost of a diff depends on how much changed rather than how big the trees are.
+
+A :class:`MergedTree` is the effective configuration of several levels, as :meth:`Config.read` sees it: every
+key in any level, with its value from the highest-precedence level that contains it. It's never actually
+built; its digests are made out of the digests of the levels' subtrees wherever only one level contributes
+to a subtree.
+"""
+import datetime
+import decimal
+import enum
+import hashlib
+import types
+from operator import itemgetter
+
+from .base import _missing
+from .path import escape_part, split_key
+
+
+class ConfigChange(object):
+    """
+    The keys that were added, changed or removed between two versions of a config. Only keys of leaf values
+    are included: adding a key within a section doesn't also count as a change to the section.
+    """
+
+    def __init__(self, added=(), changed=(), removed=()):
+        self.added = frozenset(added)
+        self.changed = frozenset(changed)
+        self.removed = frozenset(removed)
+
+    @property
+    def keys(self):
+        """
+        :return: All of the keys that were added, changed or removed.
+        :rtype: frozenset
+        """
+        return self.added | self.changed | self.removed
+
+    def filter(self, prefixes, separator="."):
+        """
+        :param list[str]|None prefixes: Keys and/or sections. ``None`` matches every key.
+        :param str separator: The separator used to put parts of keys together.
+        :return: Only the changes to the given keys, or keys within the given sections.
+        :rtype: ConfigChange
+        """
+        if prefixes is None:
+            return self
+
+        def matches(key):
+            return any(key == prefix or key.startswith(prefix + separator) for prefix in prefixes)
+
+        return ConfigChange(added=[k for k in self.added if matches(k)],
+                            changed=[k for k in self.changed if matches(k)],
+                            removed=[k for k in self.removed if matches(k)])
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return "ConfigChange(added={}, changed={}, removed={})".format(
+            sorted(self.added), sorted(self.changed), sorted(self.removed))
+
+
+def _encode_sequence(value):
+    return "{}:[{}]".format(value.__class__.__name__, ",".join(encode_value(item) for item in value))
+
+
+def _encode_set(value):
+    return "{}:{{{}}}".format(value.__class__.__name__, ",".join(sorted(encode_value(item) for item in value)))
+
+
+def _encode_mapping(value):
+    return "dict:{{{}}}".format(",".join(sorted(encode_value(k) + "=" + encode_value(v) for k, v in value.items())))
+
+
+def _encode_code(code):
+    # Everything that the code does, but not where it was defined (its file name and line numbers).
+    return "code:({},{},{},{})".format(code.co_code.hex(), encode_value(code.co_consts),
+                                       encode_value(code.co_names), encode_value(code.co_varnames))
+
+
+def _encode_function(function):
+    return "function:{}({},{})".format(function.__qualname__, _encode_code(function.__code__),
+                                       encode_value(function.__defaults__))
+
+
+def _encode_qualified_name(value):
+    return "{}:{}.{}".format(value.__class__.__name__, value.__module__, value.__qualname__)
+
+
+# The reprs of strings and numbers are canonical (and quote and escape strings, so they're unambiguous).
+_ENCODERS = {
+    type(None): lambda value: "None",
+    bool: lambda value: "bool:{}".format(value),
+    int: lambda value: "int:{}".format(value),
+    float: lambda value: "float:{!r}".format(value),
+    str: lambda value: "str:" + repr(value),
+    bytes: lambda value: "bytes:" + value.hex(),
+    list: _encode_sequence,
+    tuple: _encode_sequence,
+    dict: _encode_mapping,
+    set: _encode_set,
+    frozenset: _encode_set,
+    types.FunctionType: _encode_function,
+    types.MethodType: lambda value: "method:" + _encode_function(value.__func__),
+    types.CodeType: _encode_code,
+    types.BuiltinFunctionType: lambda value: "builtin:{}.{}".format(value.__module__, value.__qualname__),
+    types.ModuleType: lambda value: "module:" + value.__name__,
+}
+
+
+def encode_value(value):
+    """
+    Encodes a value canonically, ie in the same way in every process, unlike its repr (which, for functions and
+    most other objects, includes their address in memory). The encoding includes the value's type, so that eg
+    ``1``, ``1.0`` and ``"1"`` all differ. Functions are encoded by their name and code.
+
+    :param value: A value from a configuration tree.
+    :return: The encoding of ``value``.
+    :rtype: str
+    :raises TypeError: If ``value`` is an object that can't be encoded, ie one without a repr of its own (or
+     whose repr gives its address).
+    """
+    encoder = _ENCODERS.get(value.__class__)
+
+    if encoder is not None:
+        return encoder(value)
+
+    # Subclasses of the types above (as well as a few other common types).
+    if isinstance(value, enum.Enum):
+        return "{}:{}".format(_encode_qualified_name(value.__class__), value.name)
+    elif isinstance(value, type):
+        return _encode_qualified_name(value)
+    elif isinstance(value, dict):
+        return _encode_mapping(value)
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return "{}:{}".format(value.__class__.__name__, value.isoformat())
+    elif isinstance(value, decimal.Decimal):
+        return "Decimal:{}".format(value)
+
+    for base, encoder in _ENCODERS.items():
+        if isinstance(value, base):
+            return encoder(value)
+
+    # Objects with a repr of their own are assumed to describe their values in it (as eg ``re.compile``
+    # and ``pathlib.Path`` do), unless it gives their address.
+    text = None if value.__class__.__repr__ is object.__repr__ else repr(value)
+
+    if text is None or " at 0x" in text:
+        raise TypeError("Values of type {} can't be hashed (they have no canonical encoding)".format(
+            value.__class__.__name__))
+
+    return "{}:{}".format(_encode_qualified_name(value.__class__), text)
+
+
+def node_digest(children):
+    """
+    :param list[tuple] children: An ``(escaped key, encoding)`` tuple for each value in a dict, where the
+     encoding of a value is from ``encode_value``, and that of a nested dict is ``dict:`` and its digest.
+    :return: A (hex) digest of the dict, which doesn't depend on the order of its keys.
+    :rtype: str
+    """
+    encoded = "\n".join(repr(part) + "=" + encoding for part, encoding in sorted(children, key=itemgetter(0)))
+
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+class TreeHashes(object):
+    """
+    The digest of every nested dict in a tree, by path. The tree mustn't be modified once a digest
+    has been asked for.
+    """
+
+    def __init__(self, data, separator="."):
+        """
+        :param dict|None data: The (nested) data to hash.
+        :param str separator: The separator used to put parts of keys together.
+        """
+        self.data = data
+        self.separator = separator
+        self._digests = None
+
+    def digest(self, path=None):
+        """
+        :param str|None path: The path of a nested dict, or ``None`` for the whole tree.
+        :return: The digest of the dict at ``path``, or ``None`` if there isn't one.
+        :rtype: str|None
+        """
+        if self._digests is None:
+            self._digests = self._build(self.data)
+
+        return self._digests.get(path)
+
+    def _build(self, data):
+        digests = {}
+
+        if not isinstance(data, dict):
+            return digests
+
+        separator = self.separator
+
+        # An explicit stack of (path, part, items iterator, child digests), so that each dict's digest
+        # is computed after those of the dicts within it, without recursion.
+        stack = [(None, None, iter(data.items()), [])]
+
+        while stack:
+            prefix, _, items, children = stack[-1]
+
+            for key, value in items:
+                part = escape_part(key, separator)
+
+                if isinstance(value, dict):
+                    path = prefix + separator + part if prefix is not None else part
+                    stack.append((path, part, iter(value.items()), []))
+                    break
+
+                children.append((part, encode_value(value)))
+            else:
+                path, part, _, children = stack.pop()
+                digest = digests[path] = node_digest(children)
+
+                if stack:
+                    stack[-1][3].append((part, "dict:" + digest))
+
+        return digests
+
+
+class MergedTree(object):
+    """
+    The effective configuration of several levels, key by key (as in the combined index of a config): each key
+    has its value from the highest-precedence level that contains it. A value only hides the same key in
+    lower-precedence levels, not the keys beneath it, so ``a.b`` from one level is still there beneath a
+    value of ``a`` from a higher one (and then ``a`` is both a leaf and a section).
+    """
+
+    def __init__(self, layers, separator="."):
+        """
+        :param list[TreeHashes] layers: The hashes (and data) of each level, in order of precedence.
+        :param str separator: The separator used to put parts of keys together.
+        """
+        self.separator = separator
+        self.root = [layer for layer in layers if isinstance(layer.data, dict)]
+
+        # Digests of subtrees that more than one level contributes to, by path.
+        self._digests = {}
+
+    @classmethod
+    def of(cls, data, separator="."):
+        """
+        :param dict data: A single (nested) tree.
+        :rtype: MergedTree
+        """
+        return cls([TreeHashes(data, separator=separator)], separator=separator)
+
+    def join(self, prefix, key):
+        part = escape_part(key, self.separator)
+        return prefix + self.separator + part if prefix is not None else part
+
+    @staticmethod
+    def children(nodes):
+        """
+        :param list[tuple] nodes: The ``(dict, TreeHashes)`` of each level that contributes to a subtree.
+        :return: The (unescaped) keys of the merged subtree.
+        :rtype: set
+        """
+        keys = set()
+
+        for node, _ in nodes:
+            keys.update(node)
+
+        return keys
+
+    @staticmethod
+    def child(nodes, key):
+        """
+        :param list[tuple] nodes: The ``(dict, TreeHashes)`` of each level that contributes to a subtree.
+        :param key: A key within the subtree.
+        :return: ``_missing`` if ``key`` isn't in the merged subtree, the levels with a dict at ``key`` if there
+         are any (with the value of ``key`` itself as their ``value``, if that comes from a level where it
+         isn't a dict), or its value otherwise.
+        :rtype: ContributingLevels|any
+        """
+        found = ContributingLevels()
+        leaf = _missing
+        first = True
+
+        for node, hashes in nodes:
+            value = node.get(key, _missing)
+
+            if value is _missing:
+                continue
+
+            if isinstance(value, dict):
+                found.append((value, hashes))
+            elif first:
+                leaf = value
+
+            first = False
+
+        if not found:
+            return leaf
+
+        found.value = leaf
+
+        return found
+
+    def digest(self, path=None, nodes=None):
+        """
+        :param str|None path: The path of a subtree, or ``None`` for the whole tree.
+        :param list[tuple]|None nodes: The levels contributing to the subtree, if they're already known.
+        :return: The digest of the merged subtree at ``path``.
+        :rtype: str
+        """
+        if nodes is None:
+            nodes = self.find(path)
+
+        if len(nodes) == 1:
+            return nodes[0][1].digest(path)
+
+        try:
+            return self._digests[path]
+        except KeyError:
+            pass
+
+        children = []
+
+        for key in self.children(nodes):
+            value = self.child(nodes, key)
+            part = escape_part(key, self.separator)
+
+            if not isinstance(value, ContributingLevels):
+                children.append((part, encode_value(value)))
+            elif value.value is _missing:
+                children.append((part, "dict:" + self.digest(self.join(path, key), value)))
+            else:
+                children.append((part, "{}+dict:{}".format(encode_value(value.value),
+                                                          self.digest(self.join(path, key), value))))
+
+        digest = self._digests[path] = node_digest(children)
+
+        return digest
+
+    def hexdigest(self):
+        """
+        :return: A fingerprint of the whole (effective) configuration.
+        :rtype: str
+        """
+        return self.digest()
+
+    def find(self, path):
+        """
+        :param str|None path: The path of a subtree.
+        :return: The levels contributing to the subtree at ``path``.
+        :rtype: list[tuple]
+        """
+        nodes = ContributingLevels((layer.data, layer) for layer in self.root)
+
+        if path is None:
+            return nodes
+
+        for key in split_key(path, self.separator):
+            nodes = self.child(nodes, key)
+
+            if not isinstance(nodes, ContributingLevels):
+                raise KeyError(path)
+
+        return nodes
+
+    def leaves(self, path, nodes):
+        """
+        :return: The keys of every leaf value within the merged subtree at ``path``.
+        :rtype: iterator
+        """
+        stack = [(path, nodes)]
+
+        while stack:
+            prefix, nodes = stack.pop()
+
+            for key in self.children(nodes):
+                value = self.child(nodes, key)
+
+                if isinstance(value, ContributingLevels):
+                    stack.append((self.join(prefix, key), value))
+
+                    if value.value is not _missing:
+                        yield self.join(prefix, key)
+                else:
+                    yield self.join(prefix, key)
+
+    def items(self):
+        """
+        :return: The path and value of every leaf of the merged tree (and of every empty section, whose
+         value is an empty dict), in no particular order.
+        :rtype: iterator
+        """
+        stack = [(None, self.find(None))]
+
+        while stack:
+            prefix, nodes = stack.pop()
+
+            for key in self.children(nodes):
+                value = self.child(nodes, key)
+                path = self.join(prefix, key)
+
+                if not isinstance(value, ContributingLevels):
+                    yield path, value
+                    continue
+
+                if value.value is not _missing:
+                    yield path, value.value
+
+                if self.children(value):
+                    stack.append((path, value))
+                elif value.value is _missing:
+                    yield path, {}
+
+    def diff(self, other):
+        """
+        Works out what changed between this configuration and ``other``, only descending into subtrees
+        whose digests differ.
+
+        :param MergedTree other: The newer version of the configuration.
+        :rtype: ConfigChange
+        """
+        added, changed, removed = [], [], []
+
+        stack = [(None, self.find(None), other.find(None))]
+
+        while stack:
+            path, old_nodes, new_nodes = stack.pop()
+
+            if self.digest(path, old_nodes) == other.digest(path, new_nodes):
+                continue
+
+            for key in self.children(old_nodes) | other.children(new_nodes):
+                key_path = self.join(path, key)
+                before = self.child(old_nodes, key)
+                after = other.child(new_nodes, key)
+                before_is_dict = isinstance(before, ContributingLevels)
+                after_is_dict = isinstance(after, ContributingLevels)
+
+                if before_is_dict and after_is_dict:
+                    stack.append((key_path, before, after))
+                elif before_is_dict:
+                    # A section that's gone (or been replaced by a value) counts as the removal of all of its
+                    # keys, and vice versa.
+                    removed.extend(self.leaves(key_path, before))
+                elif after_is_dict:
+                    added.extend(other.leaves(key_path, after))
+
+                # The value of the key itself (rather than of the keys beneath it).
+                before_value = before.value if before_is_dict else before
+                after_value = after.value if after_is_dict else after
+
+                if before_value is _missing and after_value is _missing:
+                    continue
+                elif before_value is _missing:
+                    (changed if before is not _missing else added).append(key_path)
+                elif after_value is _missing:
+                    (changed if after is not _missing else removed).append(key_path)
+                elif type(before_value) is not type(after_value) or before_value != after_value:
+                    changed.append(key_path)
+
+        return ConfigChange(added, changed, removed)
+
+
+class ContributingLevels(list):
+    """
+    The ``(dict, TreeHashes)`` of each level that contributes to a subtree of a :class:`MergedTree`. It's
+    a distinct type so that a subtree can be told apart from a leaf value that happens to be a list.
+    """
+
+    #: The value of the subtree's key itself, if a level where it isn't a dict has the highest precedence.
+    value = _missing
+
+
+def diff_trees(old, new, separator="."):
+    """
+    Works out which keys were added, changed or removed between two (nested) trees.
+
+    :param dict old: The old tree.
+    :param dict new: The new tree.
+    :param str separator: The separator used to put parts of keys together.
+    :rtype: ConfigChange
+    """
+    return MergedTree.of(old, separator).diff(MergedTree.of(new, separator))
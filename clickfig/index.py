@@ -0,0 +1,178 @@
+import bisect
+from fnmatch import fnmatchcase
+
+from .exception import KeyNotFoundException
+from .path import escape_part, split_key
+
+# The characters that make a part of a pattern a wildcard (see ``KeyIndex.match``).
+WILDCARDS = frozenset("*?[")
+
+
+def prefix_range(keys, prefix, separator="."):
+    """
+    :param list[str] keys: Sorted keys.
+    :param str prefix: A key.
+    :param str separator: The separator used to put parts of keys together.
+    :return: The start and end of the slice of ``keys`` that are beneath ``prefix``.
+    :rtype: tuple[int, int]
+    """
+    # Everything beneath the prefix starts with it plus the separator, so it's all between that and the
+    # same string with the last character of the separator bumped up by one.
+    low = prefix + separator
+    high = prefix + separator[:-1] + chr(ord(separator[-1]) + 1)
+
+    return bisect.bisect_left(keys, low), bisect.bisect_left(keys, high)
+
+
+class KeyIndex(object):
+    """
+    A flat index over (nested) configuration data. Every path in the data, whether it
+    leads to a leaf value or to a nested dict, is mapped to its value, so that looking up
+    a key is a single dict lookup. The index is built once per parse of a file and never
+    modified afterwards.
+    """
+
+    def __init__(self, data, separator="."):
+        """
+        :param dict|None data: The (nested) data to index.
+        :param str separator: The separator used to put parts of keys together.
+        """
+        self.data = data
+        self.separator = separator
+
+        #: Maps every path (leaf or interior) to its value.
+        self.values = {}
+        #: The paths that lead to nested dicts rather than leaf values.
+        self.interior = set()
+
+        self._hashes = None
+        self._sorted_leaves = None
+
+        if isinstance(data, dict):
+            self._build(data)
+
+    def _build(self, data):
+        values = self.values
+        interior = self.interior
+        separator = self.separator
+
+        # An explicit stack of (prefix, items iterator) pairs, rather than recursion,
+        # so that the paths come out in depth-first document order.
+        stack = [(None, iter(data.items()))]
+
+        while stack:
+            prefix, items = stack[-1]
+
+            for key, value in items:
+                part = escape_part(key, separator)
+                path = prefix + separator + part if prefix is not None else part
+                values[path] = value
+
+                if isinstance(value, dict):
+                    interior.add(path)
+                    stack.append((path, iter(value.items())))
+                    break
+            else:
+                stack.pop()
+
+    @property
+    def hashes(self):
+        """
+        :return: The content hashes of the data's subtrees, computed the first time they're needed.
+        :rtype: clickfig.hashing.TreeHashes
+        """
+        if self._hashes is None:
+            from .hashing import TreeHashes
+
+            self._hashes = TreeHashes(self.data, separator=self.separator)
+
+        return self._hashes
+
+    @property
+    def sorted_leaves(self):
+        """
+        :return: The paths of every leaf value, sorted, so that the ones beneath any prefix can be found by
+         binary search. Sorted the first time they're needed.
+        :rtype: list[str]
+        """
+        if self._sorted_leaves is None:
+            interior = self.interior
+            self._sorted_leaves = sorted(key for key in self.values if key not in interior)
+
+        return self._sorted_leaves
+
+    def leaves_under(self, prefix=None):
+        """
+        :param str|None prefix: A key, or ``None`` for everything.
+        :return: The paths of the leaf values beneath ``prefix`` (or of ``prefix`` itself, if it's a leaf), in
+         sorted order. This takes time proportional to the number of them, plus the log of the size of the index.
+        :rtype: list[str]
+        """
+        leaves = self.sorted_leaves
+
+        if prefix is None:
+            return list(leaves)
+
+        start, end = prefix_range(leaves, prefix, self.separator)
+        found = leaves[start:end]
+
+        if self.is_leaf(prefix):
+            found.insert(0, prefix)
+
+        return found
+
+    def match(self, pattern):
+        """
+        Finds the paths (of leaves or sections) that match a glob pattern, where each part of the pattern
+        matches a single part of a path, eg ``pool.*.timeout``. Parts with wildcards (``*``, ``?`` or
+        ``[...]``) are matched with ``fnmatch``, and only the sections on the way to a match are looked at.
+
+        :param str pattern: The pattern.
+        :return: The matching paths, in no particular order.
+        :rtype: list[str]
+        """
+        separator = self.separator
+        matches = [(None, self.data)]
+
+        for part in split_key(pattern, separator):
+            wildcard = not WILDCARDS.isdisjoint(part)
+            found = []
+
+            for path, node in matches:
+                if not isinstance(node, dict):
+                    continue
+
+                if wildcard:
+                    children = [(key, value) for key, value in node.items() if fnmatchcase(str(key), part)]
+                elif part in node:
+                    children = [(part, node[part])]
+                else:
+                    continue
+
+                for key, value in children:
+                    child = escape_part(key, separator)
+                    found.append((path + separator + child if path is not None else child, value))
+
+            matches = found
+
+        return [path for path, _ in matches]
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    def lookup(self, key):
+        """
+        :param str key: The key to look up.
+        :return: The value at ``key``. Note that a value of ``None`` is a perfectly good value.
+        :raises KeyNotFoundException: If ``key`` isn't in the data.
+        """
+        try:
+            return self.values[key]
+        except KeyError:
+            raise KeyNotFoundException(key)
+
+    def is_leaf(self, key):
+        return key in self.values and key not in self.interior
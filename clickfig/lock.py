@@ -0,0 +1,103 @@
+"""
+Advisory locking of config files, so that read-modify-write cycles in different processes don't lose updates.
+
+Config files are written by renaming a new file over the old one, so a lock on the old file doesn't
+protect the new one. A process that's been waiting for the lock therefore checks, once it has it, that the
+file it locked is still the one at that path, and if it isn't, locks the new one instead.
+
+Readers never take the lock: as files are replaced atomically, they always see either the old or the new
+contents. Where ``fcntl`` isn't available (eg on Windows), only threads within a process are serialized.
+"""
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock(object):
+    """
+    A reentrant, exclusive lock on a file, held by a thread of this process and (with ``flock``)
+    against other processes.
+    """
+
+    def __init__(self, name):
+        """
+        :param str name: The path of the file to lock.
+        """
+        self.name = name
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+        self._owner = None
+
+    def held(self):
+        """
+        :return: Whether or not the lock is held by the current thread.
+        :rtype: bool
+        """
+        return self._owner == threading.get_ident()
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        self._owner = threading.get_ident()
+
+        if self._depth == 1 and fcntl is not None:
+            try:
+                self._file = self._lock_current_file()
+            except BaseException:
+                self._depth -= 1
+                self._thread_lock.release()
+                raise
+
+    def _lock_current_file(self):
+        """
+        :return: The (open and locked) file that's currently at ``name``, or ``None`` if there's no such file
+         (eg it's about to be created from a default), in which case there's nothing to lock.
+        """
+        while True:
+            try:
+                f = open(self.name, "rb")
+            except (IOError, OSError):
+                return None
+
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+                locked = os.fstat(f.fileno())
+                try:
+                    current = os.stat(self.name)
+                except OSError:
+                    current = None
+
+                if current is not None and (locked.st_dev, locked.st_ino) == (current.st_dev, current.st_ino):
+                    return f
+            except BaseException:
+                f.close()
+                raise
+
+            # Replaced (or removed) while we were waiting for the lock.
+            f.close()
+
+    def release(self):
+        self._depth -= 1
+
+        if self._depth == 0:
+            self._owner = None
+
+        if self._depth == 0 and self._file is not None:
+            # Closing the file releases the lock.
+            self._file.close()
+            self._file = None
+
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
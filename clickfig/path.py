@@ -0,0 +1,176 @@
+"""
+Exact-path operations on nested mappings.
+
+Keys are made up of parts joined by a separator (``.`` by default), eg ``server.port``. A part that itself
+contains the separator (or a backslash) is written with a backslash in front of it, eg ``hosts.example\\.com``
+is the key ``example.com`` within ``hosts``.
+"""
+from functools import lru_cache
+
+from .exception import KeyNotFoundException
+
+ESCAPE = "\\"
+
+
+@lru_cache(maxsize=4096)
+def split_key(key, separator="."):
+    """
+    :param str key: A key, such as ``a.b.c``.
+    :param str separator: The separator used to put parts of keys together.
+    :return: The parts of the key, with any escapes removed.
+    :rtype: tuple[str]
+    """
+    if ESCAPE not in key:
+        return tuple(key.split(separator))
+
+    parts = []
+    current = []
+    i = 0
+    length = len(key)
+
+    while i < length:
+        if key[i] == ESCAPE and i + 1 < length:
+            if key.startswith(separator, i + 1):
+                current.append(separator)
+                i += 1 + len(separator)
+                continue
+
+            current.append(key[i + 1])
+            i += 2
+
+        elif key.startswith(separator, i):
+            parts.append("".join(current))
+            current = []
+            i += len(separator)
+
+        else:
+            current.append(key[i])
+            i += 1
+
+    parts.append("".join(current))
+
+    return tuple(parts)
+
+
+def escape_part(part, separator="."):
+    """
+    :param part: A single part of a key.
+    :param str separator: The separator used to put parts of keys together.
+    :return: ``part`` as a string, with a backslash in front of any backslashes or separators in it.
+    :rtype: str
+    """
+    if part.__class__ is not str:
+        part = str(part)
+
+    if ESCAPE in part:
+        part = part.replace(ESCAPE, ESCAPE + ESCAPE)
+
+    if separator in part:
+        part = part.replace(separator, ESCAPE + separator)
+
+    return part
+
+
+def join_key(parts, separator="."):
+    """
+    The inverse of ``split_key``.
+
+    :param list parts: The parts of a key.
+    :param str separator: The separator used to put parts of keys together.
+    :rtype: str
+    """
+    return separator.join(escape_part(part, separator) for part in parts)
+
+
+def get_path(data, key, separator="."):
+    """
+    :param dict data: The (nested) data to search.
+    :param str key: The key to look up.
+    :param str separator: The separator used to put parts of keys together.
+    :return: The value at ``key``. Note that ``None`` is a perfectly good value.
+    :raises KeyNotFoundException: If ``key`` isn't in ``data``.
+    """
+    node = data
+
+    for part in split_key(key, separator):
+        if not isinstance(node, dict):
+            raise KeyNotFoundException(key)
+
+        try:
+            node = node[part]
+        except KeyError:
+            raise KeyNotFoundException(key)
+
+    return node
+
+
+def has_path(data, key, separator="."):
+    """
+    :return: Whether or not ``key`` is in ``data``.
+    :rtype: bool
+    """
+    try:
+        get_path(data, key, separator)
+    except KeyNotFoundException:
+        return False
+
+    return True
+
+
+def set_path(data, key, value, separator="."):
+    """
+    Sets the value at ``key``, creating any missing dicts along the way (of the same type as ``data``).
+
+    :param dict data: The (nested) data to modify.
+    :param str key: The key to set.
+    :param value: The value to set.
+    :param str separator: The separator used to put parts of keys together.
+    :raises ValueError: If a part of the path (other than the last) already has a non-dict value.
+    """
+    parts = split_key(key, separator)
+    node = data
+
+    for part in parts[:-1]:
+        child = node.get(part)
+
+        if child is None and part not in node:
+            child = node[part] = data.__class__()
+        elif not isinstance(child, dict):
+            raise ValueError("Cannot set {}: {} isn't a section".format(key, part))
+
+        node = child
+
+    node[parts[-1]] = value
+
+
+def delete_path(data, key, separator=".", prune=True):
+    """
+    Removes ``key`` (and anything beneath it) from nested ``data`` in place.
+
+    :param dict data: The (nested) data to modify.
+    :param str key: The key to remove.
+    :param str separator: The separator used to put parts of keys together.
+    :param bool prune: If enabled, any dicts that are left empty by the removal are removed as well.
+    :raises KeyNotFoundException: If ``key`` isn't in ``data``.
+    """
+    parts = split_key(key, separator)
+    parents = []
+    node = data
+
+    for part in parts[:-1]:
+        child = node.get(part) if isinstance(node, dict) else None
+        if not isinstance(child, dict):
+            raise KeyNotFoundException(key)
+        parents.append((node, part))
+        node = child
+
+    if not isinstance(node, dict) or parts[-1] not in node:
+        raise KeyNotFoundException(key)
+
+    del node[parts[-1]]
+
+    if prune:
+        for parent, part in reversed(parents):
+            if parent[part]:
+                break
+            del parent[part]
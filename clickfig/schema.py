@@ -0,0 +1,155 @@
+"""
+Typed access to configuration values.
+
+A schema maps keys to the type of their values (and optionally a default and a validator)::
+
+    schema = {
+        "server.url": Field(str, validator=lambda url: url.startswith(("http://", "https://"))),
+        "server.port": int,
+        "server.debug": Field(bool, default=False)
+    }
+
+It's compiled once, when it's given to a :class:`Config`. Every key is then coerced and validated together
+whenever the config is (re)loaded, so that all of the problems with it are reported at once, and the typed
+values are kept until the next change. Values that didn't change (because they come from a level whose file
+wasn't re-parsed) aren't coerced again.
+"""
+from .base import _missing, string_types
+from .exception import SchemaValidationException
+
+TRUE_STRINGS = frozenset(["1", "true", "yes", "on"])
+FALSE_STRINGS = frozenset(["0", "false", "no", "off"])
+
+
+def to_bool(value):
+    """
+    :param value: A bool, or a string such as ``yes``/``no``, ``true``/``false``, ``on``/``off`` or ``1``/``0``.
+    :rtype: bool
+    :raises ValueError: If ``value`` can't be understood as a bool.
+    """
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, string_types):
+        lowered = value.strip().lower()
+
+        if lowered in TRUE_STRINGS:
+            return True
+        if lowered in FALSE_STRINGS:
+            return False
+
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+
+    raise ValueError("{!r} isn't a boolean".format(value))
+
+
+class Field(object):
+    """
+    The type, default and validator of a single key in a schema.
+    """
+
+    def __init__(self, type_=str, default=_missing, validator=None):
+        """
+        :param callable type_: Converts the raw value, eg ``int``. ``bool`` understands strings such as
+         ``yes``/``no`` (see ``to_bool``), and values that are already of the right type are left as they are.
+        :param default: The value to use if the key isn't in any level. Without one, the key is required.
+        :param callable|None validator: Called with the converted value. Returning ``False`` (or raising
+         ``ValueError``) marks the value as invalid.
+        """
+        self.type = type_
+        self.default = default
+        self.validator = validator
+
+        if type_ is bool:
+            self.convert = to_bool
+        elif isinstance(type_, type):
+            self.convert = self._convert_to_type
+        else:
+            self.convert = type_
+
+    def _convert_to_type(self, value):
+        return value if isinstance(value, self.type) else self.type(value)
+
+    def coerce(self, key, value):
+        """
+        :param str key: The key of the value (for error messages).
+        :param value: The raw value.
+        :return: The converted value.
+        :raises ValueError: If the value can't be converted, or isn't valid.
+        """
+        try:
+            value = self.convert(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError("{}: {}".format(key, e))
+
+        if self.validator is not None:
+            try:
+                valid = self.validator(value)
+            except ValueError as e:
+                raise ValueError("{}: {}".format(key, e))
+
+            if valid is False:
+                raise ValueError("{}: {!r} is invalid".format(key, value))
+
+        return value
+
+
+class Schema(object):
+    """
+    A compiled schema, which turns a :class:`Config`'s combined index into typed values.
+    """
+
+    def __init__(self, fields):
+        """
+        :param dict fields: Maps each key to a :class:`Field`, or just to a type.
+        """
+        self.fields = dict((key, field if isinstance(field, Field) else Field(field))
+                           for key, field in fields.items())
+
+        # The typed values from the last evaluation, along with the raw values they were converted from.
+        self._raw = {}
+        self._typed = {}
+
+    def evaluate(self, values):
+        """
+        Converts and validates every key in the schema. Raw values that are the very same objects as
+        last time are not converted again.
+
+        :param dict values: Maps keys to their raw values (eg a combined index).
+        :return: Maps each key to its typed value.
+        :rtype: dict
+        :raises SchemaValidationException: Listing every key that's missing or invalid.
+        """
+        raw, typed, errors = {}, {}, []
+        previous_raw, previous_typed = self._raw, self._typed
+
+        for key in sorted(self.fields):
+            field = self.fields[key]
+            value = values.get(key, _missing)
+
+            if value is _missing:
+                if field.default is _missing:
+                    errors.append("{}: required, but not set".format(key))
+                else:
+                    typed[key] = field.default
+
+                continue
+
+            raw[key] = value
+
+            if previous_raw.get(key, _missing) is value:
+                typed[key] = previous_typed[key]
+                continue
+
+            try:
+                typed[key] = field.coerce(key, value)
+            except ValueError as e:
+                errors.append(str(e))
+
+        if errors:
+            raise SchemaValidationException(errors)
+
+        self._raw, self._typed = raw, typed
+
+        return typed
@@ -0,0 +1,149 @@
+"""
+Counters and timings of what a :class:`Config` (and each of its files) spends its time on, eg::
+
+    cfg.read(key="server.port")
+    print(cfg.stats_report())
+
+Every file counts its ``stat`` calls, parses (full and partial), bytes read and written, cache hits and misses,
+keyed lookups and full rewrites, and times its parses and writes. The config itself counts and times reads,
+and counts lookups of the combined index. Timings are kept as :class:`Histogram`\\s.
+
+The same events can be forwarded elsewhere (eg to a metrics library) with a :class:`StatsHook`::
+
+    class Forward(StatsHook):
+        def on_parse(self, config_file, seconds, nbytes):
+            statsd.timing("config.parse", seconds * 1000)
+
+    cfg.add_hook(Forward())
+"""
+import bisect
+from collections import Counter, OrderedDict
+
+# The upper bounds (in seconds) of the buckets of a histogram, from 10us up to 10s.
+BUCKET_BOUNDS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+# The name of each bucket, including the last one, for anything slower than that.
+BUCKET_NAMES = ("le_10us", "le_100us", "le_1ms", "le_10ms", "le_100ms", "le_1s", "le_10s", "gt_10s")
+
+
+class Histogram(object):
+    """
+    The distribution of a timing, in buckets whose bounds are powers of ten.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def observe(self, seconds):
+        """
+        :param float seconds: A timing to add.
+        """
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self):
+        """
+        :return: The count, total, mean, min and max (in seconds), and the count in each non-empty bucket,
+         keyed by its bound (eg ``le_1ms``).
+        :rtype: OrderedDict
+        """
+        buckets = OrderedDict()
+
+        for name, count in zip(BUCKET_NAMES, self.buckets):
+            if count:
+                buckets[name] = count
+
+        return OrderedDict([
+            ("count", self.count),
+            ("total", self.total),
+            ("mean", self.total / self.count if self.count else 0.0),
+            ("min", self.min),
+            ("max", self.max),
+            ("buckets", buckets)
+        ])
+
+
+class Stats(object):
+    """
+    A set of named counters and timing histograms.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = {}
+
+    def increment(self, name, amount=1):
+        self.counters[name] += amount
+
+    def observe(self, name, seconds):
+        """
+        :param str name: The name of the timing, eg ``parse``.
+        :param float seconds: How long it took.
+        """
+        try:
+            histogram = self.timings[name]
+        except KeyError:
+            histogram = self.timings[name] = Histogram()
+
+        histogram.observe(seconds)
+
+    def reset(self):
+        self.counters.clear()
+        self.timings = {}
+
+    def as_dict(self):
+        """
+        :return: Every counter, and every timing (see ``Histogram.as_dict``), sorted by name.
+        :rtype: OrderedDict
+        """
+        result = OrderedDict((name, self.counters[name]) for name in sorted(self.counters))
+
+        for name in sorted(self.timings):
+            result[name] = self.timings[name].as_dict()
+
+        return result
+
+
+class StatsHook(object):
+    """
+    Receives the events counted in :class:`Stats` as they happen. Subclasses override whichever
+    methods they need. Hooks are called on the thread that did the work, so they should be quick.
+    """
+
+    def on_parse(self, config_file, seconds, nbytes):
+        """
+        Called after a file has been parsed, in full or (for a keyed read of a big file) partially.
+
+        :param BaseConfigFile config_file: The file.
+        :param float seconds: How long it took.
+        :param int nbytes: The size of the file.
+        """
+
+    def on_read(self, source, key, seconds):
+        """
+        Called after a read, once per call: reading a :class:`Config` (even with no key, which reads every
+        file) only calls it for the config, not for its files as well.
+
+        :param Config|BaseConfigFile source: What was read from.
+        :param str|None key: The key that was read (``None`` for everything).
+        :param float seconds: How long it took (including any parsing).
+        """
+
+    def on_write(self, config_file, seconds, nbytes):
+        """
+        Called after a file has been rewritten (by a write, an unset or a batch).
+
+        :param BaseConfigFile config_file: The file.
+        :param float seconds: How long it took to write out and replace the file.
+        :param int nbytes: The size of the new file.
+        """
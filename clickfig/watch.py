@@ -0,0 +1,344 @@
+"""
+Watching the files of a :class:`Config` for changes.
+
+A :class:`ConfigWatcher` runs a background thread that waits for the config's files to change, re-parses
+only the levels whose files did change, works out which keys were added, changed or removed as a result
+(taking the precedence of the levels into account), and passes those keys to any subscribers that are
+interested in them.
+
+On Linux, the thread blocks on inotify events for the directories containing the files (directories,
+rather than the files themselves, so that files which are atomically replaced keep being watched).
+Elsewhere, it falls back to checking the files' stat signatures every ``interval`` seconds.
+"""
+import logging
+import os
+import select
+import struct
+import threading
+
+from .base import string_types
+from .hashing import ConfigChange
+
+logger = logging.getLogger(__name__)
+
+# inotify event flags (see ``inotify(7)``).
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+# The fixed-size part of an inotify event: wd, mask, cookie and the length of the name that follows it.
+EVENT_HEADER = struct.Struct("iIII")
+
+# After the first event, further events are collected for this many seconds before the files are checked,
+# so that a burst of writes (eg an editor saving a file) results in a single reload.
+DEBOUNCE = 0.05
+
+
+class Subscription(object):
+    """
+    A callback registered with :meth:`ConfigWatcher.subscribe`. Call ``stop`` to unsubscribe.
+    """
+
+    def __init__(self, watcher, callback, keys=None):
+        """
+        :param ConfigWatcher watcher: The watcher that the callback is registered with.
+        :param callable callback: Called (on the watcher's thread) with a :class:`ConfigChange`.
+        :param list[str]|None keys: The keys and/or sections that the callback is interested in.
+        """
+        self.watcher = watcher
+        self.callback = callback
+        self.keys = keys
+
+    def stop(self):
+        self.watcher.unsubscribe(self)
+
+
+class InotifyWaiter(object):
+    """
+    Blocks until something happens to one of a set of files, using inotify on their directories.
+    """
+
+    def __init__(self, names):
+        """
+        :param list[str] names: The paths of the files to watch.
+        :raises OSError: If inotify isn't available.
+        """
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        try:
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError("inotify isn't available")
+
+        inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # The base names of the files that are interesting, by the watch descriptor of their directory.
+        self.watched = {}
+
+        directories = {}
+        for name in names:
+            directory, base = os.path.split(os.path.abspath(name))
+            directories.setdefault(directory, set()).add(base)
+
+        for directory, bases in directories.items():
+            wd = inotify_add_watch(self.fd, directory.encode("utf-8"), WATCH_MASK)
+
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), "Unable to watch {}".format(directory))
+
+            self.watched[wd] = set(base.encode("utf-8") for base in bases)
+
+        # Writing to this pipe wakes up ``wait`` (so that the watcher can be stopped).
+        self.wake_read, self.wake_write = os.pipe()
+        self.close_on_exit = False
+
+    def _relevant_events(self):
+        """
+        :return: Whether or not any of the pending events were for one of the watched files.
+        :rtype: bool
+        """
+        relevant = False
+
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except (OSError, IOError):
+                return relevant
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if name in self.watched.get(wd, ()):
+                    relevant = True
+
+    def wait(self):
+        """
+        Blocks until one of the files might have changed, or ``wake`` is called.
+
+        :return: Whether or not one of the files might have changed.
+        :rtype: bool
+        """
+        while True:
+            readable = select.select([self.fd, self.wake_read], [], [])[0]
+
+            if self.wake_read in readable:
+                return False
+
+            if self._relevant_events():
+                # Let the rest of a burst of writes land before the files are checked.
+                while select.select([self.fd], [], [], DEBOUNCE)[0]:
+                    self._relevant_events()
+
+                return True
+
+    def wake(self):
+        os.write(self.wake_write, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self.wake_read, self.wake_write):
+            os.close(fd)
+
+
+class PollingWaiter(object):
+    """
+    Stands in for :class:`InotifyWaiter` where inotify isn't available, by waking up every ``interval`` seconds.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.close_on_exit = False
+
+    def wait(self):
+        return not self.stopped.wait(self.interval)
+
+    def wake(self):
+        self.stopped.set()
+
+    def close(self):
+        pass
+
+
+class ConfigWatcher(object):
+    """
+    Watches the files of a :class:`Config` and notifies subscribers of the keys that changed.
+    Usually created through :meth:`Config.watch`.
+    """
+
+    def __init__(self, config, interval=1.0, use_inotify=None):
+        """
+        :param Config config: The config to watch.
+        :param float interval: How often (in seconds) to check the files when polling.
+        :param bool|None use_inotify: Whether or not to use inotify. By default, it's used if it's available.
+        """
+        self.config = config
+        self.interval = interval
+        self.use_inotify = use_inotify
+
+        self.subscriptions = []
+
+        # The version of the config that subscribers were last notified about.
+        self._tree = None
+        self._lock = threading.Lock()
+        self._waiter = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def subscribe(self, callback, keys=None):
+        """
+        Registers ``callback`` to be called with a :class:`ConfigChange` whenever any of ``keys`` (or keys
+        within them, if they're sections) are added, changed or removed. The watcher is started if it isn't
+        already running.
+
+        :param callable callback: Called (on the watcher's thread) with a :class:`ConfigChange`.
+        :param str|list[str]|None keys: The keys and/or sections to watch. By default, every key is watched.
+        :rtype: Subscription
+        """
+        if isinstance(keys, string_types):
+            keys = [keys]
+
+        subscription = Subscription(self, callback, keys=None if keys is None else list(keys))
+
+        with self._lock:
+            self.subscriptions.append(subscription)
+
+        if not self.running:
+            self.start()
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Removes a subscription. Once there are none left, the watcher is stopped.
+
+        :param Subscription subscription: The subscription to remove.
+        """
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+            empty = not self.subscriptions
+
+        if empty:
+            self.stop()
+
+    def start(self):
+        """
+        Loads the config (so that changes are reported relative to its current contents) and starts
+        the background thread.
+        """
+        if self.running:
+            return
+
+        self._tree = self._current_tree()
+
+        waiter = None
+
+        if self.use_inotify is not False:
+            try:
+                waiter = InotifyWaiter([f.name for f in self.config.config_files if not f.in_memory])
+            except OSError:
+                if self.use_inotify:
+                    raise
+
+        self._waiter = waiter or PollingWaiter(self.interval)
+
+        self._thread = threading.Thread(target=self._run, args=(self._waiter,), name="clickfig-watcher")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread (without removing any subscriptions).
+        """
+        thread, waiter = self._thread, self._waiter
+
+        if thread is None:
+            return
+
+        self._thread = self._waiter = None
+
+        if thread is threading.current_thread():
+            # Stopped from within a callback: the thread closes the waiter itself once the callback returns.
+            waiter.close_on_exit = True
+            waiter.wake()
+        else:
+            waiter.wake()
+            thread.join()
+            waiter.close()
+
+    def _current_tree(self):
+        config = self.config
+
+        with config._lock:
+            # The files are stat-ed directly, so that changes are noticed even if ``revalidate_ttl`` is set.
+            for config_file in config.config_files:
+                config_file._load(config_file._stat_signature())
+
+            return config._merged_tree()
+
+    def check(self):
+        """
+        Reloads the levels whose files have changed, and notifies subscribers of the keys that changed.
+        This is what the background thread does whenever the files might have changed, but it can also be
+        called directly.
+
+        :return: All of the changes since the last check.
+        :rtype: ConfigChange
+        """
+        with self.config._lock:
+            tree = self._current_tree()
+            change = self._tree.diff(tree)
+            self._tree = tree
+
+        if change:
+            with self._lock:
+                subscriptions = list(self.subscriptions)
+
+            for subscription in subscriptions:
+                keys_changed = change.filter(subscription.keys, self.config.separator)
+
+                if keys_changed:
+                    try:
+                        subscription.callback(keys_changed)
+                    except Exception:
+                        logger.exception("Error in config change callback %r", subscription.callback)
+
+        return change
+
+    def _run(self, waiter):
+        while self._waiter is waiter:
+            if not waiter.wait():
+                continue
+
+            try:
+                self.check()
+            except Exception:
+                # Most likely a file that's been left half-written or invalid. The previous contents
+                # stay in effect, and the file is checked again the next time it changes.
+                logger.exception("Unable to reload config files")
+
+        if waiter.close_on_exit:
+            waiter.close()
@@ -15,7 +15,17 @@ sys.path = ['../..'] + sys.path
 
 import clickfig
 
-cfg = clickfig.Config("./server.ini")
+# Everything in an INI file is a string, so the schema says what each value should be turned into (once,
+# rather than on every read), and checks them all as soon as the config is loaded.
+schema = {
+    "server.url": clickfig.Field(str, validator=lambda url: url.startswith(("http://", "https://"))),
+    "server.port": int,
+    "login.username": str,
+    "login.password": str
+}
+
+# Lazy, so that commands that don't need the config (eg --help) don't pay for loading it.
+cfg = clickfig.Config("./server.ini", lazy=True, schema=schema)
 
 
 def get_url(username=None, password=None):
@@ -32,19 +42,16 @@ def get_url(username=None, password=None):
     :rtype: str
     """
 
-    url = str(cfg.read("server.url"))
-    port = str(cfg.read("server.port"))
+    url = cfg.typed("server.url")
+    port = cfg.typed("server.port")
 
-    username = username or str(cfg.read("login.username"))
-    password = password or str(cfg.read("login.password"))
+    username = username or cfg.typed("login.username")
+    password = password or cfg.typed("login.password")
 
     # URL escape
     username = urllib.parse.quote(username)
     password = urllib.parse.quote(password)
 
-    if not url.startswith("http://") and not url.startswith("https://"):
-        raise ValueError("server.url must be HTTP or HTTPS.")
-
     protocol, remaining_url = url.split("//", 1)
 
     return "{protocol}//{username}:{password}@{remaining_url}:{port}".format(
@@ -4,7 +4,7 @@ import sys
 sys.path = ['..', '.'] + sys.path
 
 import unittest
-from clickfig.base import flatten_dict, unflatten_dict
+from clickfig.base import flatten_dict, iter_flattened, unflatten_dict
 # noinspection PyUnresolvedReferences
 from dict_equal import dict_equal
 
@@ -51,3 +51,20 @@ class TestDictFlattenUnflatten(unittest.TestCase):
 
     def test_unflatten(self):
         self.assertTrue(dict_equal(unflatten_dict(dict_flat), dict_unflat))
+
+    def test_flatten_separator(self):
+        flattened = flatten_dict(dict_unflat, separator="/")
+
+        self.assertEqual(flattened["a/b/e/f"], 2)
+        self.assertTrue(dict_equal(unflatten_dict(flattened, separator="/"), dict_unflat))
+
+    def test_iter_flattened_tuples(self):
+        pairs = dict(iter_flattened(dict_unflat, as_tuples=True))
+
+        self.assertEqual(pairs[("a", "b", "e", "f")], 2)
+        self.assertEqual(pairs[("one",)], 1)
+        self.assertTrue(dict_equal(unflatten_dict(pairs), dict_unflat))
+
+    def test_unflatten_conflict(self):
+        with self.assertRaises(ValueError):
+            unflatten_dict({"a": 1, "a.b": 2})
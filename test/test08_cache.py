@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+
+
+class CountingJSONConfigFile(clickfig.config.file.JSONConfigFile):
+    parses = 0
+
+    def _parse(self):
+        self.parses += 1
+        return super(CountingJSONConfigFile, self)._parse()
+
+
+class TestParsedCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = os.path.join(self.dir, "test.json")
+        shutil.copyfile("./json/test.json", self.name)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_parsed_once(self):
+        cfg = CountingJSONConfigFile(self.name)
+
+        for _ in range(5):
+            self.assertEqual(cfg.read(key="bar.blah").data, "blarg")
+
+        self.assertEqual(cfg.parses, 1)
+
+    def test_reparse_on_change(self):
+        cfg = CountingJSONConfigFile(self.name)
+        self.assertEqual(cfg.read(key="foo").data, "baz")
+
+        with open(self.name, "w") as f:
+            f.write('{"foo": "changed"}')
+
+        self.assertEqual(cfg.read(key="foo").data, "changed")
+        self.assertEqual(cfg.parses, 2)
+
+    def test_write_invalidates(self):
+        cfg = CountingJSONConfigFile(self.name)
+        cfg.write("foo", "qux")
+        self.assertEqual(cfg.read(key="foo").data, "qux")
+
+    def test_revalidate_ttl(self):
+        cfg = CountingJSONConfigFile(self.name, revalidate_ttl=3600)
+        self.assertEqual(cfg.read(key="foo").data, "baz")
+
+        with open(self.name, "w") as f:
+            f.write('{"foo": "changed"}')
+
+        self.assertEqual(cfg.read(key="foo").data, "baz")
+
+        cfg.invalidate()
+        self.assertEqual(cfg.read(key="foo").data, "changed")
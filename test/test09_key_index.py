@@ -0,0 +1,57 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import unittest
+from clickfig.exception import KeyNotFoundException
+from clickfig.index import KeyIndex
+
+data = {
+    "a": {
+        "b": {
+            "c": "foo",
+            "d": None
+        }
+    },
+    "one": 1
+}
+
+
+class TestKeyIndex(unittest.TestCase):
+    def test_leaves(self):
+        index = KeyIndex(data)
+
+        self.assertEqual(index.lookup("a.b.c"), "foo")
+        self.assertEqual(index.lookup("one"), 1)
+        self.assertTrue(index.is_leaf("a.b.c"))
+
+    def test_none_value(self):
+        index = KeyIndex(data)
+
+        self.assertTrue("a.b.d" in index)
+        self.assertTrue(index.lookup("a.b.d") is None)
+
+    def test_interior(self):
+        index = KeyIndex(data)
+
+        self.assertEqual(index.interior, {"a", "a.b"})
+        self.assertEqual(index.lookup("a.b"), data["a"]["b"])
+
+    def test_missing(self):
+        index = KeyIndex(data)
+
+        with self.assertRaises(KeyNotFoundException):
+            index.lookup("a.b.e")
+
+        with self.assertRaises(KeyNotFoundException):
+            index.lookup("a.b.c.d")
+
+    def test_separator(self):
+        index = KeyIndex(data, separator="/")
+
+        self.assertEqual(index.lookup("a/b/c"), "foo")
+        self.assertFalse("a.b.c" in index)
+
+    def test_empty(self):
+        self.assertEqual(len(KeyIndex(None)), 0)
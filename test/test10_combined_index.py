@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig import exception
+
+
+class TestCombinedIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+        for name in ["test.ini", "test_global.ini"]:
+            shutil.copyfile(os.path.join("./ini", name), os.path.join(self.dir, name))
+
+        self.cfg = clickfig.Config(
+            [
+                {"level": "local", "name": os.path.join(self.dir, "test.ini")},
+                {"level": "global", "name": os.path.join(self.dir, "test_global.ini")}
+            ]
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_precedence(self):
+        self.assertEqual(self.cfg.read(key="foo.bar").data, "baz")
+        self.assertEqual(self.cfg.read(key="baz.first").data, "1")
+        self.assertEqual(self.cfg.read(key="foo").data, {"bar": "baz", "blah": "2"})
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            self.cfg.read(key="nope")
+
+    def test_only_changed_levels_reparsed(self):
+        self.cfg.read(key="foo.bar")
+        local, global_ = self.cfg.config_files
+        generations = local.generation, global_.generation
+
+        self.cfg.write("baz.third", "3", level="global")
+
+        self.assertEqual(self.cfg.read(key="baz.third").data, "3")
+        self.assertEqual(local.generation, generations[0])
+        self.assertEqual(global_.generation, generations[1] + 1)
+
+    def test_fall_back_after_unset(self):
+        self.assertEqual(self.cfg.read(key="foo.bar").data, "baz")
+
+        self.cfg.unset("foo.bar", level="local")
+
+        self.assertEqual(self.cfg.read(key="foo.bar").data, "blarg")
+
+    def test_shadowed_key_added(self):
+        self.assertEqual(self.cfg.read(key="baz.first").data, "1")
+
+        self.cfg.write("baz.first", "local value", level="local")
+
+        self.assertEqual(self.cfg.read(key="baz.first").data, "local value")
+        self.assertEqual(self.cfg.read(key="baz.second").data, "2")
+
+    def test_missing_level_not_remerged(self):
+        self.cfg.read(key="foo.bar")
+        os.remove(os.path.join(self.dir, "test_global.ini"))
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            self.cfg.read(key="baz.first")
+
+        merges = self.cfg.stats.counters["index_merges"]
+
+        for _ in range(10):
+            self.assertEqual(self.cfg.read(key="foo.bar").data, "baz")
+
+        self.assertEqual(self.cfg.stats.counters["index_merges"], merges)
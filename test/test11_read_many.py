@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import unittest
+import clickfig
+from clickfig import exception
+
+cfg = clickfig.Config(
+    [
+        {"level": "local", "name": "./json/test.json"},
+        {"level": "global", "name": "./json/test_global.json"}
+    ]
+)
+
+
+class TestReadMany(unittest.TestCase):
+    def test_config(self):
+        result = cfg.read_many(["bar.blah", "x", "q", "bar.meh"])
+
+        self.assertEqual(list(result.keys()), ["bar.blah", "x", "q", "bar.meh"])
+        self.assertEqual(result["bar.blah"], "blarg")
+        self.assertEqual(result["x"], "yz")
+        self.assertTrue(result["q"] is None)
+        self.assertEqual(result["bar.meh"], {"a": 1, "b": 2, "c": 3})
+
+    def test_file(self):
+        result = cfg.config_files[1].read_many(["q", "x"])
+
+        self.assertEqual(dict(result), {"q": 2, "x": "yz"})
+
+    def test_missing_reported_together(self):
+        with self.assertRaises(exception.KeysNotFoundException) as context:
+            cfg.read_many(["foo", "nope", "bar.nope"])
+
+        self.assertEqual(context.exception.keys, ["nope", "bar.nope"])
+        self.assertTrue(isinstance(context.exception, exception.KeyNotFoundException))
+
+    def test_default(self):
+        result = cfg.read_many(["foo", "nope"], default="fallback")
+
+        self.assertEqual(dict(result), {"foo": "baz", "nope": "fallback"})
@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig import exception
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+        for name in ["test.ini", "test.json"]:
+            fmt = name.split(".")[-1]
+            shutil.copyfile(os.path.join(".", fmt, name), os.path.join(self.dir, name))
+
+        self.cfg_ini = clickfig.Config(os.path.join(self.dir, "test.ini"))
+        self.cfg_json = clickfig.Config(os.path.join(self.dir, "test.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_single_write(self):
+        config_file = self.cfg_json.config_files[0]
+        dumps = []
+        dump = config_file._dump
+        config_file._dump = lambda document: dumps.append(document) or dump(document)
+
+        with self.cfg_json.batch() as b:
+            b.set("bar.blah", "something")
+            b.set("bar.meh.a", 12)
+            b.set("new.key", True)
+            b.unset("q")
+
+        self.assertEqual(len(dumps), 1)
+        self.assertEqual(self.cfg_json.read(key="bar.blah").data, "something")
+        self.assertEqual(self.cfg_json.read(key="bar.meh.a").data, 12)
+        self.assertEqual(self.cfg_json.read(key="new.key").data, True)
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            self.cfg_json.read(key="q")
+
+    def test_nothing_written_on_error(self):
+        with open(os.path.join(self.dir, "test.ini")) as f:
+            before = f.read()
+
+        with self.assertRaises(RuntimeError):
+            with self.cfg_ini.batch() as b:
+                b.set("foo.bar", "meh")
+                raise RuntimeError()
+
+        with open(os.path.join(self.dir, "test.ini")) as f:
+            self.assertEqual(f.read(), before)
+
+        self.assertEqual(self.cfg_ini.read(key="foo.bar").data, "baz")
+
+    def test_update(self):
+        self.cfg_ini.update({"foo.bar": "meh", "new.option": 3})
+
+        self.assertEqual(self.cfg_ini.read(key="foo.bar").data, "meh")
+        self.assertEqual(self.cfg_ini.read(key="new.option").data, "3")
+
+    def test_ini_unset(self):
+        with self.cfg_ini.batch() as b:
+            b.unset("foo.bar")
+            b.unset("foo.blah")
+            b.unset("section.stuff")
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            self.cfg_ini.read(key="foo")
+
+        self.assertEqual(self.cfg_ini.read(key="section").data,
+                         {"other": "something else blah blah blah"})
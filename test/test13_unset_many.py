@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig import exception
+
+
+class TestUnsetMany(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = os.path.join(self.dir, "test.json")
+        shutil.copyfile("./json/test.json", self.name)
+        os.chmod(self.name, 0o640)
+
+        self.cfg = clickfig.Config(self.name)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_unset_many(self):
+        self.cfg.unset_many(["foo", "bar.meh.a"])
+
+        self.assertEqual(self.cfg.read().pop().data,
+                         {"q": None, "bar.blah": "blarg", "bar.meh.b": 2, "bar.meh.c": 3})
+
+    def test_unset_many_missing(self):
+        with self.assertRaises(exception.KeyNotFoundException):
+            self.cfg.unset_many(["foo", "nope"])
+
+        self.assertEqual(self.cfg.read(key="foo").data, "baz")
+
+    def test_unset_prefix(self):
+        self.assertTrue(self.cfg.unset_prefix("bar"))
+        self.assertFalse(self.cfg.unset_prefix("bar"))
+
+        self.assertEqual(self.cfg.read().pop().data, {"foo": "baz", "q": None})
+
+    def test_empty_parents_removed(self):
+        self.cfg.unset_many(["bar.meh.a", "bar.meh.b", "bar.meh.c"])
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            self.cfg.read(key="bar.meh")
+
+    def test_atomic_replace(self):
+        inode = os.stat(self.name).st_ino
+
+        self.cfg.unset("foo")
+
+        self.assertNotEqual(os.stat(self.name).st_ino, inode)
+        self.assertEqual(os.stat(self.name).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.dir), ["test.json"])
+
+    def test_new_file_permissions(self):
+        umask = os.umask(0o027)
+
+        try:
+            # Created from the default file, which is written out like any other write.
+            name = os.path.join(self.dir, "new.json")
+            clickfig.Config([{"name": name, "default": "./json/test.json", "level": "local"}], verbose=False)
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(os.stat(name).st_mode & 0o777, 0o640)
+
+    def test_symlink(self):
+        link = os.path.join(self.dir, "link.json")
+        os.symlink(self.name, link)
+
+        clickfig.Config(link).unset("foo")
+
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(os.stat(self.name).st_mode & 0o777, 0o640)
+        self.assertEqual(clickfig.Config(self.name).get("foo"), None)
+        self.assertEqual(sorted(os.listdir(self.dir)), ["link.json", "test.json"])
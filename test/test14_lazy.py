@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import click
+from click.testing import CliRunner
+
+import clickfig
+
+
+class TestLazy(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.local = os.path.join(self.dir, "local.ini")
+        self.default = os.path.join(self.dir, "default.ini")
+        shutil.copyfile("./ini/default.ini", self.default)
+
+        self.cfg = clickfig.Config(
+            [
+                {"level": "local", "name": self.local, "default": self.default},
+                {"level": "global", "name": os.path.join(self.dir, "global.ini"), "default": self.default}
+            ],
+            verbose=False, lazy=True
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_deferred_until_read(self):
+        self.assertEqual(self.cfg.levels, ["local", "global"])
+        self.assertFalse(os.path.exists(self.local))
+
+        self.assertEqual(self.cfg.read(key="first.foo").data, "bar")
+        self.assertTrue(os.path.exists(self.local))
+
+    def test_attach_help(self):
+        @click.group()
+        def main():
+            pass
+
+        clickfig.attach(main, self.cfg)
+
+        result = CliRunner().invoke(main, ["config", "--help"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertTrue("--global" in result.output)
+        self.assertFalse(os.path.exists(self.local))
+        self.assertTrue(self.cfg._config_files is None)
@@ -0,0 +1,41 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import subprocess
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(code):
+    """
+    :param str code: Code to run in a fresh interpreter.
+    :return: The top-level names of the modules imported by the time ``code`` has run.
+    :rtype: set
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sys.modules))"],
+        cwd=ROOT, universal_newlines=True
+    )
+
+    return set(output.split())
+
+
+class TestImport(unittest.TestCase):
+    def test_import_is_light(self):
+        modules = imported_modules("import clickfig")
+
+        for name in ["click", "dpath", "six", "json", "configparser", "inspect", "imp", "tempfile", "asyncio",
+                     "clickfig.config.file.ini", "clickfig.config.file.json", "clickfig.config.file.python"]:
+            self.assertFalse(name in modules, "{} was imported".format(name))
+
+    def test_only_used_backend_imported(self):
+        modules = imported_modules("import clickfig\nclickfig.Config('test/json/test.json')")
+
+        self.assertTrue("clickfig.config.file.json" in modules)
+        self.assertFalse("clickfig.config.file.ini" in modules)
+        self.assertFalse("clickfig.config.file.python" in modules)
+        self.assertFalse("click" in modules)
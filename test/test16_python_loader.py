@@ -0,0 +1,58 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+
+SOURCE = """
+import os
+
+os.environ["CLICKFIG_TEST_EXECS"] = str(int(os.environ.get("CLICKFIG_TEST_EXECS", "0")) + 1)
+
+x = {}
+"""
+
+
+class TestPythonLoader(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = os.path.join(self.dir, "settings.py")
+        os.environ["CLICKFIG_TEST_EXECS"] = "0"
+
+        with open(self.name, "w") as f:
+            f.write(SOURCE.format(1))
+
+        self.cfg = clickfig.config.file.PythonConfigFile(self.name)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        del os.environ["CLICKFIG_TEST_EXECS"]
+
+    def executions(self):
+        return int(os.environ["CLICKFIG_TEST_EXECS"])
+
+    def test_private_namespace(self):
+        self.assertEqual(self.cfg.read(key="x").data, 1)
+        self.assertFalse("settings" in sys.modules)
+        self.assertFalse(any(k.startswith("__") for k in self.cfg.read().data))
+
+    def test_not_reexecuted_unless_changed(self):
+        self.assertEqual(self.cfg.read(key="x").data, 1)
+
+        # Same contents, new mtime
+        stat = os.stat(self.name)
+        os.utime(self.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertEqual(self.cfg.read(key="x").data, 1)
+        self.assertEqual(self.executions(), 1)
+
+        with open(self.name, "w") as f:
+            f.write(SOURCE.format(2))
+
+        self.assertEqual(self.cfg.read(key="x").data, 2)
+        self.assertEqual(self.executions(), 2)
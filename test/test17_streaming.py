@@ -0,0 +1,65 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import types
+import unittest
+
+import click
+from click.testing import CliRunner
+
+import clickfig
+from clickfig.attach import echo_lines
+from clickfig.config.file.base import ConfigReadResult
+
+cfg = clickfig.Config("./json/test.json")
+
+
+@click.group()
+def main():
+    pass
+
+
+clickfig.attach(main, cfg)
+
+
+class TestStreaming(unittest.TestCase):
+    def test_iter_lines(self):
+        result = ConfigReadResult({"a": {"b": 1, "c": {"d": 2}}, "e": 3}, key="x")
+        lines = result.iter_lines()
+
+        self.assertTrue(isinstance(lines, types.GeneratorType))
+        self.assertEqual(list(lines), ["x.a.b=1", "x.a.c.d=2", "x.e=3"])
+        self.assertEqual(str(result), "x.a.b=1\nx.a.c.d=2\nx.e=3")
+
+    def test_scalar(self):
+        self.assertEqual(list(ConfigReadResult("foo").iter_lines()), ["foo"])
+
+    def test_command_dump(self):
+        result = CliRunner().invoke(main, ["config"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(sorted(result.output.splitlines()),
+                         ["bar.blah=blarg", "bar.meh.a=1", "bar.meh.b=2", "bar.meh.c=3", "foo=baz", "q=None"])
+
+    def test_command_key(self):
+        result = CliRunner().invoke(main, ["config", "bar.meh"])
+
+        self.assertEqual(sorted(result.output.splitlines()), ["bar.meh.a=1", "bar.meh.b=2", "bar.meh.c=3"])
+
+        result = CliRunner().invoke(main, ["config", "bar.blah"])
+
+        self.assertEqual(result.output, "blarg\n")
+
+    def test_chunks(self):
+        chunks = []
+        echo = click.echo
+        click.echo = chunks.append
+
+        try:
+            echo_lines([ConfigReadResult({str(i): i for i in range(5)})], chunk_lines=2)
+        finally:
+            click.echo = echo
+
+        self.assertEqual(chunks, ["0=0\n1=1", "2=2\n3=3", "4=4"])
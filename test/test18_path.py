@@ -0,0 +1,66 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import unittest
+from clickfig.base import flatten_dict, unflatten_dict
+from clickfig.exception import KeyNotFoundException
+from clickfig.index import KeyIndex
+from clickfig.path import delete_path, get_path, has_path, join_key, set_path, split_key
+
+
+class TestPath(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            "a": {"b": {"c": 1, "d": None}},
+            "hosts": {"example.com": {"port": 80}},
+            "x": 2
+        }
+
+    def test_split_join(self):
+        self.assertEqual(split_key("a.b.c"), ("a", "b", "c"))
+        self.assertEqual(split_key("hosts.example\\.com.port"), ("hosts", "example.com", "port"))
+        self.assertEqual(split_key("a\\\\.b"), ("a\\", "b"))
+        self.assertEqual(split_key("a/b.c", "/"), ("a", "b.c"))
+        self.assertEqual(join_key(("hosts", "example.com", "port")), "hosts.example\\.com.port")
+
+        for key in ["a.b", "x\\.y.z", "back\\\\slash.q"]:
+            self.assertEqual(join_key(split_key(key)), key)
+
+    def test_get(self):
+        self.assertEqual(get_path(self.data, "a.b.c"), 1)
+        self.assertTrue(get_path(self.data, "a.b.d") is None)
+        self.assertEqual(get_path(self.data, "hosts.example\\.com.port"), 80)
+        self.assertTrue(has_path(self.data, "a.b"))
+        self.assertFalse(has_path(self.data, "a.b.c.d"))
+
+        with self.assertRaises(KeyNotFoundException):
+            get_path(self.data, "a.z")
+
+    def test_set(self):
+        set_path(self.data, "a.e.f", 3)
+        set_path(self.data, "new\\.key", 4)
+
+        self.assertEqual(self.data["a"]["e"], {"f": 3})
+        self.assertEqual(self.data["new.key"], 4)
+
+        with self.assertRaises(ValueError):
+            set_path(self.data, "x.y", 5)
+
+    def test_delete(self):
+        delete_path(self.data, "hosts.example\\.com.port")
+        self.assertFalse("hosts" in self.data)
+
+        delete_path(self.data, "a.b.c", prune=False)
+        self.assertEqual(self.data["a"], {"b": {"d": None}})
+
+        with self.assertRaises(KeyNotFoundException):
+            delete_path(self.data, "a.b.c")
+
+    def test_escaped_keys_round_trip(self):
+        flattened = flatten_dict(self.data)
+
+        self.assertEqual(flattened["hosts.example\\.com.port"], 80)
+        self.assertEqual(unflatten_dict(flattened), {k: v for k, v in self.data.items()})
+        self.assertEqual(KeyIndex(self.data).lookup("hosts.example\\.com.port"), 80)
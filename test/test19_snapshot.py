@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig.config.file.json import JSONConfigFile
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+        for name in ["test.json", "test_global.json"]:
+            shutil.copyfile(os.path.join("./json", name), os.path.join(self.dir, name))
+
+        self.parse = JSONConfigFile._parse
+        self.parses = 0
+
+        def counting_parse(config_file):
+            self.parses += 1
+            return self.parse(config_file)
+
+        JSONConfigFile._parse = counting_parse
+
+    def tearDown(self):
+        JSONConfigFile._parse = self.parse
+        shutil.rmtree(self.dir)
+
+    def config(self, **kwargs):
+        return clickfig.Config(
+            [
+                {"level": "local", "name": os.path.join(self.dir, "test.json")},
+                {"level": "global", "name": os.path.join(self.dir, "test_global.json")}
+            ],
+            snapshot=True,
+            **kwargs
+        )
+
+    def test_loaded_instead_of_parsing(self):
+        cfg = self.config()
+        self.assertEqual(cfg.read(key="x").data, "yz")
+        self.assertEqual(self.parses, 2)
+        self.assertTrue(os.path.exists(cfg.snapshot_path))
+        self.assertEqual(os.path.dirname(cfg.snapshot_path), self.dir)
+
+        cfg = self.config()
+        self.assertEqual(cfg.read(key="x").data, "yz")
+        self.assertEqual(cfg.read(key="bar.meh.a").data, 1)
+        self.assertEqual(self.parses, 2)
+
+    def test_stale_snapshot_ignored(self):
+        self.config().read(key="x")
+
+        cfg = self.config()
+        cfg.write("x", "changed", level="global")
+
+        cfg = self.config()
+        self.assertEqual(cfg.read(key="x").data, "changed")
+        self.assertEqual(cfg.read(key="foo").data, "baz")
+        self.assertEqual(self.parses, 4)
+
+        # The snapshot was brought up to date by the last read.
+        cfg = self.config()
+        self.assertEqual(cfg.read(key="x").data, "changed")
+        self.assertEqual(self.parses, 4)
+
+    def test_big_files(self):
+        # Files above the partial parse threshold are loaded from the snapshot too, not parsed partially.
+        self.assertEqual(self.config(partial_parse_threshold=0).read(key="x").data, "yz")
+        self.assertEqual(self.parses, 2)
+
+        cfg = self.config(partial_parse_threshold=0)
+        self.assertEqual(cfg.read(key="x").data, "yz")
+        self.assertEqual(self.parses, 2)
+        self.assertEqual([f.stats.counters["partial_parses"] for f in cfg.config_files], [0, 0])
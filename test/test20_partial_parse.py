@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig import exception
+from clickfig.config.file.ini import INIConfigFile
+from clickfig.config.file.json import JSONConfigFile
+
+JSON_DATA = {
+    "skip": {"a": [1, {"b": "}]{["}], "c": "quote \" and \\ backslash"},
+    "n": -1.5e3,
+    "t": True,
+    "target": {"deep": {"value": "found"}, "list": [1, 2, 3], "none": None},
+    "after": {"x": 1}
+}
+
+INI_TEXT = """[DEFAULT]
+shared = yes
+
+[first]
+foo = bar
+ref = %(shared)s
+
+[second]
+blarg = something
+    something
+
+[third]
+x = 1
+"""
+
+
+class ParseForbidden(Exception):
+    pass
+
+
+class TestPartialParse(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+        self.json_name = os.path.join(self.dir, "big.json")
+        with open(self.json_name, "w") as f:
+            json.dump(JSON_DATA, f, indent=2)
+
+        self.ini_name = os.path.join(self.dir, "big.ini")
+        with open(self.ini_name, "w") as f:
+            f.write(INI_TEXT)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def assert_partial_matches_full(self, cls, name, keys):
+        full = cls(name, partial_parse_threshold=None)
+
+        def forbidden():
+            raise ParseForbidden()
+
+        for key in keys:
+            # Only the first lookup in a file is partial, so each key gets a file of its own.
+            partial = cls(name, partial_parse_threshold=0)
+            partial._parse = forbidden
+
+            self.assertEqual(partial.read(key=key, flatten=False).data, full.read(key=key, flatten=False).data)
+
+    def test_json(self):
+        self.assert_partial_matches_full(JSONConfigFile, self.json_name,
+                                         ["skip.c", "n", "t", "target", "target.deep.value", "target.list",
+                                          "target.none", "after.x"])
+
+    def test_ini(self):
+        self.assert_partial_matches_full(INIConfigFile, self.ini_name,
+                                         ["first", "first.foo", "first.ref", "second.blarg", "third.shared"])
+
+    def test_duplicate_keys(self):
+        # As with json, the last of a repeated key wins, however deep it is.
+        with open(self.json_name, "w") as f:
+            f.write('{"a": {"b": 1, "c": 2}, "x": 0, "a": {"b": 3, "b": 4}, "x": {"y": 5}}')
+
+        self.assert_partial_matches_full(JSONConfigFile, self.json_name, ["a", "a.b", "x", "x.y"])
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            JSONConfigFile(self.json_name, partial_parse_threshold=0).read(key="a.c")
+
+    def test_ini_default_section(self):
+        # Options in DEFAULT are only inherited by the other sections: it isn't a section of its own.
+        for key in ["DEFAULT", "DEFAULT.shared"]:
+            with self.assertRaises(exception.KeyNotFoundException):
+                INIConfigFile(self.ini_name, partial_parse_threshold=None).read(key=key)
+
+            with self.assertRaises(exception.KeyNotFoundException):
+                INIConfigFile(self.ini_name, partial_parse_threshold=0).read(key=key)
+
+    def test_missing(self):
+        for cls, name, key in [(JSONConfigFile, self.json_name, "target.nope"),
+                               (JSONConfigFile, self.json_name, "n.x"),
+                               (INIConfigFile, self.ini_name, "first.nope"),
+                               (INIConfigFile, self.ini_name, "fourth")]:
+            with self.assertRaises(exception.KeyNotFoundException):
+                cls(name, partial_parse_threshold=0).read(key=key)
+
+    def test_hands_over_to_full_parse(self):
+        config_file = JSONConfigFile(self.json_name, partial_parse_threshold=0)
+
+        self.assertEqual(config_file.read(key="n").data, -1.5e3)
+        self.assertEqual(config_file.generation, 0)
+
+        self.assertEqual(config_file.read(key="t").data, True)
+        self.assertEqual(config_file.read(key="after.x").data, 1)
+        self.assertEqual(config_file.generation, 1)
+        self.assertEqual(config_file.stats.counters["partial_parses"], 1)
+        self.assertEqual(config_file.stats.counters["parses"], 1)
+
+    def test_small_files_parsed_in_full(self):
+        config_file = JSONConfigFile(self.json_name)
+        config_file.read(key="n")
+
+        self.assertEqual(config_file.generation, 1)
+
+    def test_config_levels(self):
+        cfg = clickfig.Config(
+            [
+                {"level": "local", "name": self.ini_name},
+                {"level": "global", "name": os.path.join(".", "ini", "test_global.ini")}
+            ],
+            partial_parse_threshold=0
+        )
+
+        self.assertEqual(cfg.read(key="first.foo").data, "bar")
+        self.assertTrue(all(f.generation == 0 for f in cfg.config_files))
+
+        # Any more keys come from the combined index, so every level is loaded.
+        self.assertEqual(cfg.read(key="baz.first").data, "1")
+        self.assertTrue(all(f.generation == 1 for f in cfg.config_files))
+
+        with self.assertRaises(exception.KeyNotFoundException):
+            cfg.read(key="nope")
@@ -0,0 +1,141 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import clickfig
+from clickfig.watch import ConfigWatcher, Subscription
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.writes = 0
+        self.local = os.path.join(self.dir, "local.json")
+        self.global_ = os.path.join(self.dir, "global.json")
+
+        self.dump(self.local, {"server": {"port": 8080}})
+        self.dump(self.global_, {"server": {"port": 80, "host": "localhost"}, "log": {"level": "info"}})
+
+        self.cfg = clickfig.Config([{"name": self.local, "level": "local"},
+                                    {"name": self.global_, "level": "global"}])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def dump(self, name, data):
+        # Padded to a distinct size, so that the change shows up in the stat signature even if the mtime doesn't.
+        self.writes += 1
+
+        with open(name, "w") as f:
+            json.dump(data, f)
+            f.write(" " * self.writes)
+
+    def test_check_reports_changed_keys(self):
+        watcher = ConfigWatcher(self.cfg)
+        watcher._tree = watcher._current_tree()
+
+        self.dump(self.global_, {"server": {"port": 81, "timeout": 5}, "log": {"level": "debug"}})
+        change = watcher.check()
+
+        # The port is shadowed by the local level, so it doesn't count as a change.
+        self.assertEqual(change.added, {"server.timeout"})
+        self.assertEqual(change.changed, {"log.level"})
+        self.assertEqual(change.removed, {"server.host"})
+
+        self.assertFalse(watcher.check())
+
+    def test_keys_beneath_a_shadowing_value(self):
+        # A value in a higher level doesn't hide the keys beneath it in a lower one (as with read).
+        self.dump(self.local, {"a": 1})
+        self.dump(self.global_, {"a": {"b": 2}})
+
+        watcher = ConfigWatcher(self.cfg)
+        watcher._tree = watcher._current_tree()
+
+        self.dump(self.global_, {"a": {"b": 3}})
+        self.assertEqual(self.cfg.read(key="a.b").data, 3)
+        self.assertEqual(watcher.check().changed, {"a.b"})
+
+        self.dump(self.global_, {"a": {"b": 3, "c": 4}})
+        self.assertEqual(watcher.check().added, {"a.c"})
+
+        self.dump(self.local, {"a": 2})
+        self.assertEqual(watcher.check().changed, {"a"})
+
+        self.dump(self.local, {})
+        self.assertEqual(watcher.check().changed, {"a"})
+
+    def test_only_changed_levels_reparsed(self):
+        watcher = ConfigWatcher(self.cfg)
+        watcher._tree = watcher._current_tree()
+        local, global_ = self.cfg.config_files
+        generations = local.generation, global_.generation
+
+        self.dump(self.local, {"server": {"port": 9090}})
+        self.assertEqual(watcher.check().changed, {"server.port"})
+
+        self.assertEqual(local.generation, generations[0] + 1)
+        self.assertEqual(global_.generation, generations[1])
+
+    def test_subscription_keys(self):
+        watcher = ConfigWatcher(self.cfg)
+        watcher._tree = watcher._current_tree()
+        server, log, everything = [], [], []
+
+        watcher.subscriptions = [Subscription(watcher, server.append, keys=["server"]),
+                                 Subscription(watcher, log.append, keys=["log.level"]),
+                                 Subscription(watcher, everything.append)]
+
+        self.dump(self.global_, {"server": {"port": 80, "host": "example.com"}, "log": {"level": "info"}})
+        watcher.check()
+
+        self.assertEqual([c.keys for c in server], [{"server.host"}])
+        self.assertEqual(log, [])
+        self.assertEqual([c.keys for c in everything], [{"server.host"}])
+
+    def wait_for_change(self):
+        changes = []
+        changed = threading.Event()
+
+        def callback(change):
+            changes.append(change)
+            changed.set()
+
+        subscription = self.cfg.watch(callback, keys="server")
+
+        try:
+            self.dump(self.local, {"server": {"port": 9090}})
+            self.assertTrue(changed.wait(5))
+        finally:
+            subscription.stop()
+
+        self.assertEqual(changes[0].changed, {"server.port"})
+        self.assertEqual(self.cfg.read(key="server.port").data, 9090)
+        self.assertFalse(self.cfg._watcher.running)
+
+    def test_watch_polling(self):
+        self.cfg._watcher = ConfigWatcher(self.cfg, interval=0.05, use_inotify=False)
+        self.wait_for_change()
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on Linux")
+    def test_watch_inotify(self):
+        self.cfg._watcher = ConfigWatcher(self.cfg, use_inotify=True)
+        self.wait_for_change()
+
+    def test_atomic_write_noticed(self):
+        watcher = ConfigWatcher(self.cfg)
+        watcher._tree = watcher._current_tree()
+
+        self.cfg.write("server.port", 7070, level="local")
+        self.assertEqual(watcher.check().changed, {"server.port"})
+
+
+if __name__ == "__main__":
+    unittest.main()
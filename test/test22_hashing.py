@@ -0,0 +1,171 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from collections import OrderedDict
+
+import clickfig
+from clickfig.hashing import MergedTree, TreeHashes, diff_trees
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FINGERPRINT = """
+import clickfig
+
+print(clickfig.Config([{"level": "local", "name": "py/_test.py"},
+                       {"level": "global", "name": "py/_test_global.py"}]).fingerprint())
+"""
+
+
+class TestTreeHashes(unittest.TestCase):
+    def test_key_order_independent(self):
+        a = OrderedDict([("x", 1), ("y", OrderedDict([("p", "q"), ("r", "s")]))])
+        b = OrderedDict([("y", OrderedDict([("r", "s"), ("p", "q")])), ("x", 1)])
+
+        self.assertEqual(TreeHashes(a).digest(), TreeHashes(b).digest())
+        self.assertEqual(TreeHashes(a).digest("y"), TreeHashes(b).digest("y"))
+
+    def test_content_sensitive(self):
+        base = TreeHashes({"x": 1, "y": {"p": "q"}})
+
+        for other in [{"x": "1", "y": {"p": "q"}}, {"x": 1, "y": {"p": "r"}}, {"x": 1, "y": {"p.q": "q"}},
+                      {"x": 1, "y": {"p": "q"}, "z": {}}]:
+            self.assertNotEqual(base.digest(), TreeHashes(other).digest())
+
+    def test_subtree_digests(self):
+        hashes = TreeHashes({"a": {"b": {"c": 1}}, "d": 2})
+
+        self.assertEqual(hashes.digest("a.b"), TreeHashes({"c": 1}).digest())
+        self.assertIsNone(hashes.digest("d"))
+        self.assertIsNone(hashes.digest("nope"))
+
+    def test_functions(self):
+        base = TreeHashes({"f": lambda x: x ** 2, "g": len}).digest()
+
+        self.assertEqual(base, TreeHashes({"f": lambda x: x ** 2, "g": len}).digest())
+        self.assertNotEqual(base, TreeHashes({"f": lambda x: x ** 3, "g": len}).digest())
+        self.assertNotEqual(base, TreeHashes({"f": lambda x: x ** 2, "g": max}).digest())
+
+    def test_unencodable(self):
+        with self.assertRaises(TypeError):
+            TreeHashes({"x": object()}).digest()
+
+
+class TestDiffTrees(unittest.TestCase):
+    def test_diff(self):
+        old = {"a": {"b": 1, "c": 2}, "d": {"e": 3}, "f": 4, "g": {"h": 5}}
+        new = {"a": {"b": 1, "c": 20, "x": 0}, "d": 30, "f": {"y": 1}, "g": {"h": 5}}
+        change = diff_trees(old, new)
+
+        self.assertEqual(change.added, {"a.x", "f.y"})
+        self.assertEqual(change.changed, {"a.c", "d", "f"})
+        self.assertEqual(change.removed, {"d.e"})
+
+    def test_identical(self):
+        self.assertFalse(diff_trees({"a": {"b": 1}}, OrderedDict([("a", {"b": 1})])))
+
+    def test_only_differing_subtrees_visited(self):
+        old = {"section{}".format(i): {"key": i} for i in range(100)}
+        new = dict(old, section7={"key": "changed"})
+        visited = []
+        children = MergedTree.children
+
+        def counting_children(nodes):
+            visited.append(nodes)
+            return children(nodes)
+
+        MergedTree.children = staticmethod(counting_children)
+
+        try:
+            change = diff_trees(old, new)
+        finally:
+            MergedTree.children = staticmethod(children)
+
+        self.assertEqual(change.changed, {"section7.key"})
+        # The root, and section7 (from both sides).
+        self.assertEqual(len(visited), 4)
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def config(self, *levels):
+        files = []
+
+        for i, data in enumerate(levels):
+            name = os.path.join(self.dir, "{}-{}.json".format(len(os.listdir(self.dir)), i))
+
+            with open(name, "w") as f:
+                json.dump(data, f)
+
+            files.append({"name": name, "level": "level{}".format(i)})
+
+        return clickfig.Config(files)
+
+    def test_effective_config(self):
+        split = self.config({"server": {"port": 8080}}, {"server": {"port": 80, "host": "localhost"}})
+        single = self.config({"server": {"host": "localhost", "port": 8080}})
+        different = self.config({"server": {"host": "localhost", "port": 80}})
+
+        self.assertEqual(split.fingerprint(), single.fingerprint())
+        self.assertNotEqual(split.fingerprint(), different.fingerprint())
+        self.assertEqual(split.fingerprint(), MergedTree.of({"server": {"host": "localhost", "port": 8080}}).hexdigest())
+
+    def test_keys_beneath_a_shadowing_value(self):
+        shadowed = self.config({"a": 1}, {"a": {"b": 2}})
+        changed = self.config({"a": 1}, {"a": {"b": 3}})
+
+        self.assertEqual(shadowed.read(key="a.b").data, 2)
+        self.assertNotEqual(shadowed.fingerprint(), changed.fingerprint())
+        self.assertNotEqual(shadowed.fingerprint(), self.config({"a": 1}).fingerprint())
+        self.assertNotEqual(shadowed.fingerprint(), self.config({"a": {"b": 2}}).fingerprint())
+        self.assertEqual(shadowed.diff(changed).changed, {"a.b"})
+
+        change = shadowed.diff(self.config({"a": {"b": 2}}))
+        self.assertEqual((change.added, change.changed, change.removed), (set(), {"a"}, set()))
+
+    def test_changes_with_contents(self):
+        cfg = self.config({"server": {"port": 8080}}, {"log": {"level": "info"}})
+        before = cfg.fingerprint()
+        self.assertEqual(cfg.fingerprint(), before)
+
+        cfg.write("log.level", "debug", level="level1")
+        self.assertNotEqual(cfg.fingerprint(), before)
+
+        cfg.write("log.level", "info", level="level1")
+        self.assertEqual(cfg.fingerprint(), before)
+
+    def test_config_diff(self):
+        old = self.config({"server": {"port": 8080}}, {"server": {"port": 80, "host": "localhost"}})
+        new = self.config({"server": {"port": 8080, "host": "example.com"}})
+
+        change = old.diff(new)
+
+        self.assertEqual(change.changed, {"server.host"})
+        self.assertFalse(change.added or change.removed)
+        self.assertFalse(old.diff(old))
+
+    def test_stable_across_processes(self):
+        # Python config files can hold functions, whose reprs differ from one process to the next.
+        env = dict(os.environ, PYTHONPATH=ROOT, PYTHONHASHSEED="random")
+        here = os.path.dirname(os.path.abspath(__file__))
+
+        fingerprints = set(subprocess.check_output([sys.executable, "-c", FINGERPRINT], cwd=here, env=env,
+                                                   universal_newlines=True).strip() for _ in range(3))
+
+        self.assertEqual(len(fingerprints), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+import clickfig
+from clickfig.lock import FileLock, fcntl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WRITER = """
+import sys
+import clickfig
+
+config_file = clickfig.config.file.{cls}(sys.argv[1])
+
+for i in range(int(sys.argv[3])):
+    config_file.write("{section}.key_{{}}_{{}}".format(sys.argv[2], i), i)
+"""
+
+INCREMENTER = """
+import sys
+import clickfig
+
+config_file = clickfig.config.file.INIConfigFile(sys.argv[1], revalidate_ttl=10)
+
+for i in range(int(sys.argv[2])):
+    # An unlocked read, which caches the file for the next ten seconds.
+    config_file.read(key="section.count")
+
+    with config_file.lock():
+        count = int(config_file.read(key="section.count").data)
+        config_file.write("section.count", count + 1)
+"""
+
+
+class TestLocking(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def concurrent_writes(self, name, cls, section, processes=4, writes=15):
+        code = WRITER.format(cls=cls, section=section)
+        env = dict(os.environ, PYTHONPATH=ROOT)
+
+        writers = [subprocess.Popen([sys.executable, "-c", code, name, str(p), str(writes)], env=env)
+                   for p in range(processes)]
+
+        for writer in writers:
+            self.assertEqual(writer.wait(), 0)
+
+        return processes * writes
+
+    @unittest.skipIf(fcntl is None, "fcntl isn't available")
+    def test_no_lost_updates_json(self):
+        name = os.path.join(self.dir, "test.json")
+        with open(name, "w") as f:
+            f.write("{}")
+
+        expected = self.concurrent_writes(name, "JSONConfigFile", "section")
+
+        with open(name) as f:
+            self.assertEqual(len(json.load(f)["section"]), expected)
+
+    @unittest.skipIf(fcntl is None, "fcntl isn't available")
+    def test_no_lost_updates_ini(self):
+        name = os.path.join(self.dir, "test.ini")
+        with open(name, "w") as f:
+            f.write("[section]\n")
+
+        expected = self.concurrent_writes(name, "INIConfigFile", "section")
+
+        self.assertEqual(len(clickfig.config.file.INIConfigFile(name).read(key="section").data), expected)
+
+    @unittest.skipIf(fcntl is None, "fcntl isn't available")
+    def test_waiter_locks_replaced_file(self):
+        name = os.path.join(self.dir, "test.json")
+        with open(name, "w") as f:
+            f.write("{}")
+
+        holder = FileLock(name)
+        waiter = FileLock(name)
+        acquired = []
+
+        def wait():
+            with waiter:
+                acquired.append(os.fstat(waiter._file.fileno()).st_ino)
+
+        with holder:
+            thread = threading.Thread(target=wait)
+            thread.start()
+            time.sleep(0.05)
+            self.assertEqual(acquired, [])
+
+            # Replace the file while the other lock is waiting on the old one.
+            replacement = os.path.join(self.dir, "new.json")
+            with open(replacement, "w") as f:
+                f.write("{}")
+            os.replace(replacement, name)
+
+        thread.join(5)
+        self.assertEqual(acquired, [os.stat(name).st_ino])
+
+    def test_reentrant(self):
+        name = os.path.join(self.dir, "test.json")
+        with open(name, "w") as f:
+            f.write('{"a": {"b": 1}}')
+
+        config_file = clickfig.config.file.JSONConfigFile(name)
+
+        with config_file.lock():
+            config_file.write("a.c", 2)
+            config_file.unset("a.b")
+
+        self.assertEqual(config_file.read(key="a", flatten=False).data, {"c": 2})
+
+    def test_write_ignores_revalidate_ttl(self):
+        name = os.path.join(self.dir, "test.json")
+        with open(name, "w") as f:
+            f.write('{"a": 1}')
+
+        first = clickfig.config.file.JSONConfigFile(name, revalidate_ttl=3600)
+        second = clickfig.config.file.JSONConfigFile(name, revalidate_ttl=3600)
+        first.read(key="a")
+
+        second.write("b", 2)
+        first.write("c", 3)
+
+        with open(name) as f:
+            self.assertEqual(json.load(f), {"a": 1, "b": 2, "c": 3})
+
+    @unittest.skipIf(fcntl is None, "fcntl isn't available")
+    def test_locked_read_modify_write_ignores_revalidate_ttl(self):
+        name = os.path.join(self.dir, "test.ini")
+        with open(name, "w") as f:
+            f.write("[section]\ncount = 0\n")
+
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        incrementers = [subprocess.Popen([sys.executable, "-c", INCREMENTER, name, "25"], env=env)
+                        for _ in range(4)]
+
+        for incrementer in incrementers:
+            self.assertEqual(incrementer.wait(), 0)
+
+        self.assertEqual(clickfig.config.file.INIConfigFile(name).read(key="section.count").data, "100")
+
+    def test_no_temporary_files_left(self):
+        name = os.path.join(self.dir, "test.json")
+        with open(name, "w") as f:
+            f.write("{}")
+
+        config_file = clickfig.config.file.JSONConfigFile(name)
+        config_file.write("a", 1)
+
+        self.assertEqual(os.listdir(self.dir), ["test.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
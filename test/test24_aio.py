@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import clickfig
+from clickfig.config import AsyncConfig
+from clickfig.config.file.json import JSONConfigFile
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super(CountingExecutor, self).__init__(max_workers=4)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super(CountingExecutor, self).submit(*args, **kwargs)
+
+
+class TestAsyncConfig(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = os.path.join(self.dir, "test.json")
+        self.dump({"server": {"port": 8080, "host": "localhost"}})
+
+        self.executor = CountingExecutor()
+        self.cfg = AsyncConfig(clickfig.Config(self.name), executor=self.executor)
+
+        self.parse = JSONConfigFile._parse
+        self.parses = 0
+        # Keeps the parse running long enough for concurrent reads to overlap with it.
+        self.parsing = threading.Event()
+
+        def slow_parse(config_file):
+            self.parses += 1
+            self.parsing.wait(0.1)
+            return self.parse(config_file)
+
+        JSONConfigFile._parse = slow_parse
+
+    def tearDown(self):
+        JSONConfigFile._parse = self.parse
+        self.executor.shutdown()
+        shutil.rmtree(self.dir)
+
+    def dump(self, data):
+        with open(self.name, "w") as f:
+            json.dump(data, f)
+
+    def run_coroutine(self, coroutine):
+        loop = asyncio.new_event_loop()
+
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_read(self):
+        async def read():
+            return (await self.cfg.read(key="server.port")).data, (await self.cfg.read_many(["server.host"]))
+
+        port, values = self.run_coroutine(read())
+
+        self.assertEqual(port, 8080)
+        self.assertEqual(values["server.host"], "localhost")
+
+    def test_concurrent_reads_share_parse(self):
+        async def read_all():
+            return await asyncio.gather(*[self.cfg.read(key="server.port") for _ in range(10)])
+
+        results = self.run_coroutine(read_all())
+
+        self.assertEqual([r.data for r in results], [8080] * 10)
+        self.assertEqual(self.parses, 1)
+
+    def test_cancelled_read_leaves_others_running(self):
+        async def read_and_cancel():
+            first = asyncio.ensure_future(self.cfg.read(key="server.port"))
+            second = asyncio.ensure_future(self.cfg.read(key="server.host"))
+
+            await asyncio.sleep(0.01)
+            first.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+
+            return (await second).data
+
+        self.assertEqual(self.run_coroutine(read_and_cancel()), "localhost")
+        self.assertEqual(self.parses, 1)
+
+    def test_fresh_read_stays_on_loop(self):
+        async def read_twice():
+            await self.cfg.read(key="server.port")
+            submitted = self.executor.submitted
+
+            result = await self.cfg.read(key="server.host")
+
+            return submitted, result.data
+
+        submitted, host = self.run_coroutine(read_twice())
+
+        self.assertEqual(host, "localhost")
+        self.assertEqual(self.executor.submitted, submitted)
+
+    def test_write_then_read(self):
+        async def write_and_read():
+            await self.cfg.write("server.port", 9090)
+            await self.cfg.update({"server.host": "example.com"})
+            await self.cfg.unset("server.host")
+
+            return (await self.cfg.read(key="server", flatten=False)).data
+
+        self.assertEqual(self.run_coroutine(write_and_read()), {"port": 9090})
+
+    def test_reload_after_change(self):
+        async def read():
+            return (await self.cfg.read(key="server.port")).data
+
+        self.assertEqual(self.run_coroutine(read()), 8080)
+
+        self.dump({"server": {"port": 9090, "padding": "to change the size"}})
+
+        self.assertEqual(self.run_coroutine(read()), 9090)
+        self.assertEqual(self.parses, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+import unittest
+import clickfig
+from clickfig.exception import KeyNotFoundException, SharedConfigUnavailableException
+from clickfig.config.shared import SharedConfig, SharedConfigPublisher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import sys
+from clickfig.config.shared import SharedConfig
+
+shared = SharedConfig(sys.argv[1])
+print(shared.read(key="server.port").data)
+"""
+
+
+class TestSharedConfig(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.local = os.path.join(self.dir, "local.json")
+        self.global_ = os.path.join(self.dir, "global.json")
+
+        with open(self.local, "w") as f:
+            json.dump({"server": {"port": 8080}, "empty": {}}, f)
+
+        with open(self.global_, "w") as f:
+            json.dump({"server": {"port": 80, "host": "localhost"}, "ratio": 0.5,
+                       "hosts": {"example.com": {"weight": 3}}}, f)
+
+        self.cfg = clickfig.Config([{"name": self.local, "level": "local"},
+                                    {"name": self.global_, "level": "global"}])
+
+        self.publisher = SharedConfigPublisher(self.cfg, name="clickfig-test-{}".format(os.getpid()))
+        self.publisher.publish()
+        self.shared = SharedConfig(self.publisher.name)
+
+    def tearDown(self):
+        self.shared.close()
+        self.publisher.close()
+        shutil.rmtree(self.dir)
+
+    def test_read(self):
+        self.assertEqual(self.shared.read(key="server.port").data, 8080)
+        self.assertEqual(self.shared.read(key="server.host").data, "localhost")
+        self.assertEqual(self.shared.read(key="ratio").data, 0.5)
+        self.assertEqual(self.shared.read(key="hosts.example\\.com.weight").data, 3)
+        self.assertEqual(self.shared.read(key="empty", flatten=False).data, {})
+
+    def test_same_as_config(self):
+        # As with Config.read, a section comes from the highest-precedence level that has it.
+        for key in ["server", "server.port", "server.host", "hosts", "hosts.example\\.com", "empty"]:
+            for flatten in [True, False]:
+                self.assertEqual(self.shared.read(key=key, flatten=flatten).data,
+                                 self.cfg.read(key=key, flatten=flatten).data)
+
+        everything = self.shared.read(flatten=False).data
+        self.assertEqual(everything["server"], {"port": 8080})
+        self.assertEqual(everything["hosts"], {"example.com": {"weight": 3}})
+        self.assertEqual(set(everything), {"server", "empty", "ratio", "hosts"})
+
+    def test_leaves_stored_once(self):
+        self.cfg.write("deep.er.est", "unique value", level="local")
+        self.publisher.publish()
+
+        self.assertEqual(self.shared.read(key="deep", flatten=False).data, {"er": {"est": "unique value"}})
+        self.assertEqual(bytes(self.publisher._data.buf).count(b"unique value"), 1)
+
+    def test_missing(self):
+        with self.assertRaises(KeyNotFoundException):
+            self.shared.read(key="server.nope")
+
+        # A prefix of a key that isn't a section.
+        with self.assertRaises(KeyNotFoundException):
+            self.shared.read(key="serv")
+
+        self.assertFalse("nope" in self.shared)
+        self.assertEqual(self.shared.read_many(["ratio", "nope"], default=None),
+                         {"ratio": 0.5, "nope": None})
+
+    def test_republish(self):
+        generation = self.shared.generation
+
+        self.cfg.write("server.port", 9090, level="local")
+        self.publisher.publish()
+
+        self.assertEqual(self.shared.read(key="server.port").data, 9090)
+        self.assertEqual(self.shared.generation, generation + 1)
+        self.assertFalse(self.shared.refresh())
+
+    def test_worker_process(self):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+
+        for _ in range(2):
+            output = subprocess.check_output([sys.executable, "-c", WORKER, self.publisher.name],
+                                             env=env, universal_newlines=True, stderr=subprocess.STDOUT)
+
+            # Exiting the worker mustn't have unlinked the segments (or warned about leaking them).
+            self.assertEqual(output.strip(), "8080")
+
+        self.assertEqual(self.shared.read(key="server.port").data, 8080)
+
+    def test_new_publisher_continues_generations(self):
+        generation = self.shared.generation
+
+        publisher = SharedConfigPublisher(self.cfg, name=self.publisher.name)
+        self.assertEqual(publisher.publish(), generation + 1)
+        self.assertEqual(self.shared.read(key="server.port").data, 8080)
+
+        # The first publisher's data segment has been superseded.
+        self.publisher._data.close()
+        self.publisher._data = None
+        self.publisher = publisher
+
+    def test_publisher_died_mid_update(self):
+        # The sequence number is left odd, as if the publisher died part way through a publish.
+        control = self.publisher._control
+        sequence = struct.unpack_from("<Q", control.buf, 12)[0]
+        struct.pack_into("<Q", control.buf, 12, sequence + 1)
+
+        with self.assertRaises(SharedConfigUnavailableException):
+            SharedConfig(self.publisher.name)
+
+        # A reader that's already attached carries on with the data it has, and only waits for it once.
+        self.assertEqual(self.shared.read(key="server.port").data, 8080)
+
+        started = time.monotonic()
+        self.assertEqual(self.shared.read(key="server.port").data, 8080)
+        self.assertLess(time.monotonic() - started, 0.05)
+
+        # A new publisher rounds the sequence number back up to even.
+        publisher = SharedConfigPublisher(self.cfg, name=self.publisher.name)
+        self.cfg.write("server.port", 9090, level="local")
+        publisher.publish()
+
+        self.assertEqual(struct.unpack_from("<Q", control.buf, 12)[0], sequence + 4)
+        self.assertEqual(self.shared.read(key="server.port").data, 9090)
+
+        self.publisher._data.close()
+        self.publisher._data = None
+        self.publisher = publisher
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig.exception import SchemaValidationException
+from clickfig.schema import Field, to_bool
+
+INI = """[server]
+url = http://example.com
+port = 8080
+debug = yes
+
+[limits]
+ratio = 0.5
+"""
+
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = os.path.join(self.dir, "test.ini")
+
+        with open(self.name, "w") as f:
+            f.write(INI)
+
+        self.schema = {
+            "server.url": Field(str, validator=lambda url: url.startswith(("http://", "https://"))),
+            "server.port": int,
+            "server.debug": bool,
+            "limits.ratio": float,
+            "limits.retries": Field(int, default=3)
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_typed(self):
+        cfg = clickfig.Config(self.name, schema=self.schema)
+
+        self.assertEqual(cfg.typed("server.port"), 8080)
+        self.assertIs(cfg.typed("server.debug"), True)
+        self.assertEqual(cfg.typed("limits.ratio"), 0.5)
+        self.assertEqual(cfg.typed("limits.retries"), 3)
+        self.assertEqual(cfg.typed()["server.url"], "http://example.com")
+
+        with self.assertRaises(ValueError):
+            cfg.typed("server.nope")
+
+    def test_errors_reported_together_on_load(self):
+        with open(self.name, "w") as f:
+            f.write("[server]\nurl = ftp://example.com\nport = eighty\ndebug = maybe\n")
+
+        with self.assertRaises(SchemaValidationException) as context:
+            clickfig.Config(self.name, schema=self.schema)
+
+        errors = context.exception.errors
+        self.assertEqual(len(errors), 4)
+        self.assertEqual([e.split(":")[0] for e in errors],
+                         ["limits.ratio", "server.debug", "server.port", "server.url"])
+
+    def test_lazy_defers_validation(self):
+        self.schema["server.missing"] = int
+        cfg = clickfig.Config(self.name, schema=self.schema, lazy=True)
+
+        with self.assertRaises(SchemaValidationException):
+            cfg.typed("server.port")
+
+    def test_coerced_once_per_version(self):
+        calls = []
+
+        def port(value):
+            calls.append(value)
+            return int(value)
+
+        self.schema["server.port"] = port
+        cfg = clickfig.Config(self.name, schema=self.schema)
+
+        for _ in range(5):
+            self.assertEqual(cfg.typed("server.port"), 8080)
+
+        self.assertEqual(calls, ["8080"])
+
+        cfg.write("server.port", "9090")
+        self.assertEqual(cfg.typed("server.port"), 9090)
+        self.assertEqual(calls, ["8080", "9090"])
+
+    def test_unchanged_levels_not_recoerced(self):
+        local = os.path.join(self.dir, "local.ini")
+        with open(local, "w") as f:
+            f.write("[limits]\nratio = 0.25\n")
+
+        calls = []
+
+        def port(value):
+            calls.append(value)
+            return int(value)
+
+        self.schema["server.port"] = port
+        cfg = clickfig.Config([{"name": local, "level": "local"}, {"name": self.name, "level": "global"}],
+                              schema=self.schema)
+        self.assertEqual(cfg.typed("limits.ratio"), 0.25)
+
+        cfg.write("limits.ratio", "0.75", level="local")
+        self.assertEqual(cfg.typed("limits.ratio"), 0.75)
+        self.assertEqual(calls, ["8080"])
+
+    def test_to_bool(self):
+        for value in ["yes", "True", " on ", "1", True, 1]:
+            self.assertIs(to_bool(value), True)
+
+        for value in ["no", "FALSE", "off", "0", False, 0]:
+            self.assertIs(to_bool(value), False)
+
+        with self.assertRaises(ValueError):
+            to_bool("maybe")
+
+    def test_no_schema(self):
+        with self.assertRaises(ValueError):
+            clickfig.Config(self.name).typed("server.port")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import click
+import clickfig
+from click.testing import CliRunner
+from clickfig.exception import KeyNotFoundException
+from clickfig.stats import Histogram, StatsHook
+
+
+class RecordingHook(StatsHook):
+    def __init__(self):
+        self.events = []
+
+    def on_parse(self, config_file, seconds, nbytes):
+        self.events.append(("parse", config_file.level, nbytes))
+
+    def on_read(self, source, key, seconds):
+        self.events.append(("read", key))
+
+    def on_write(self, config_file, seconds, nbytes):
+        self.events.append(("write", config_file.level, nbytes))
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.local = os.path.join(self.dir, "local.json")
+        self.global_ = os.path.join(self.dir, "global.json")
+
+        with open(self.local, "w") as f:
+            json.dump({"server": {"port": 8080}}, f)
+
+        with open(self.global_, "w") as f:
+            json.dump({"server": {"port": 80, "host": "localhost"}}, f)
+
+        self.cfg = clickfig.Config([{"name": self.local, "level": "local"},
+                                    {"name": self.global_, "level": "global"}], verbose=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_counters(self):
+        self.cfg.read(key="server.port")
+        self.cfg.read(key="server.host")
+
+        with self.assertRaises(KeyNotFoundException):
+            self.cfg.read(key="nope")
+
+        report = self.cfg.stats_report()
+        self.assertEqual(report["config"]["reads"], 3)
+        self.assertEqual(report["config"]["lookups"], 3)
+        self.assertEqual(report["config"]["misses"], 1)
+        self.assertEqual(report["config"]["index_builds"], 1)
+        self.assertEqual(report["config"]["read"]["count"], 3)
+
+        local = report["levels"]["local"]
+        self.assertEqual(local["parses"], 1)
+        self.assertEqual(local["cache_misses"], 1)
+        self.assertEqual(local["cache_hits"], 2)
+        self.assertEqual(local["bytes_read"], os.path.getsize(self.local))
+        self.assertEqual(local["parse"]["count"], 1)
+
+    def test_rewrites(self):
+        self.cfg.read(key="server.port")
+        self.cfg.write("server.port", 9090, level="local")
+        self.cfg.update({"a": 1, "b": 2}, level="local")
+        self.cfg.read(key="server.port")
+
+        local = self.cfg.stats_report()["levels"]["local"]
+        self.assertEqual(local["rewrites"], 2)
+        self.assertTrue(local["bytes_written"] > 0)
+        self.assertEqual(local["write"]["count"], 2)
+        self.assertEqual(self.cfg.stats_report()["config"]["index_merges"], 1)
+
+        self.cfg.reset_stats()
+        self.assertEqual(self.cfg.stats_report()["levels"]["local"], {})
+
+    def test_hooks(self):
+        hook = RecordingHook()
+        self.cfg.add_hook(hook)
+
+        self.cfg.read(key="server.port")
+        self.cfg.write("server.port", 9090, level="global")
+
+        self.assertEqual(hook.events, [
+            ("parse", "local", os.path.getsize(self.local)),
+            ("parse", "global", len(json.dumps({"server": {"port": 80, "host": "localhost"}}))),
+            ("read", "server.port"),
+            # The write re-reads the file from disk, under its lock.
+            ("write", "global", os.path.getsize(self.global_))
+        ])
+
+        self.cfg.remove_hook(hook)
+        self.cfg.read(key="server.port")
+        self.assertEqual(len(hook.events), 4)
+
+    def test_unkeyed_read_is_one_event(self):
+        hook = RecordingHook()
+        self.cfg.add_hook(hook)
+
+        self.assertEqual([result.data for result in self.cfg.read()],
+                         [{"server.port": 8080}, {"server.port": 80, "server.host": "localhost"}])
+        self.assertEqual([event for event in hook.events if event[0] == "read"], [("read", None)])
+
+    def test_histogram(self):
+        histogram = Histogram()
+
+        for seconds in [0.000005, 0.0005, 0.0007, 20]:
+            histogram.observe(seconds)
+
+        result = histogram.as_dict()
+        self.assertEqual(result["count"], 4)
+        self.assertEqual(result["min"], 0.000005)
+        self.assertEqual(result["max"], 20)
+        self.assertEqual(dict(result["buckets"]), {"le_10us": 1, "le_1ms": 2, "gt_10s": 1})
+
+    def test_stats_flag(self):
+        group = click.Group("main")
+        clickfig.attach(group, self.cfg)
+
+        result = CliRunner().invoke(group, ["config", "--help"])
+        self.assertFalse("--stats" in result.output)
+
+        result = CliRunner().invoke(group, ["config", "server.port", "--stats"])
+        lines = result.output.splitlines()
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(lines[0], "8080")
+        self.assertTrue("stats.config.reads=1" in lines)
+        self.assertTrue("stats.levels.local.parses=1" in lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
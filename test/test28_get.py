@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+
+
+class TestGet(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.local = os.path.join(self.dir, "local.json")
+        self.global_ = os.path.join(self.dir, "global.json")
+
+        with open(self.local, "w") as f:
+            json.dump({"server": {"port": 8080}, "flags": {"debug": None}}, f)
+
+        with open(self.global_, "w") as f:
+            json.dump({"server": {"port": 80, "host": "localhost"}}, f)
+
+        self.files = [{"name": self.local, "level": "local"}, {"name": self.global_, "level": "global"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_get(self):
+        cfg = clickfig.Config(self.files)
+
+        self.assertEqual(cfg.get("server.port"), 8080)
+        self.assertEqual(cfg.get("server.host"), "localhost")
+        self.assertEqual(cfg.get("server.nope"), None)
+        self.assertEqual(cfg.get("server.nope", default=3), 3)
+        self.assertEqual(cfg.get("flags"), cfg.read(key="flags").data)
+        self.assertEqual(cfg.get("server", flatten=False), cfg.read(key="server", flatten=False).data)
+
+        # A value of None is still a value.
+        self.assertEqual(cfg.get("flags.debug", default=False), None)
+
+    def test_has(self):
+        cfg = clickfig.Config(self.files)
+
+        self.assertTrue(cfg.has("server.host"))
+        self.assertTrue(cfg.has("flags.debug"))
+        self.assertTrue("server" in cfg)
+        self.assertFalse(cfg.has("server.nope"))
+        self.assertFalse("serv" in cfg)
+
+        cfg.write("server.nope", "yes", level="global")
+        self.assertTrue(cfg.has("server.nope"))
+
+    def test_misses_are_remembered_until_the_file_changes(self):
+        cfg = clickfig.Config(self.files, partial_parse_threshold=0)
+
+        self.assertEqual(cfg.get("features.new_ui", default="off"), "off")
+        self.assertEqual([f.stats.counters["partial_parses"] for f in cfg.config_files], [1, 1])
+
+        # Only the first lookup is done by partial parses: after that, the files are parsed in full.
+        for _ in range(3):
+            self.assertEqual(cfg.get("features.new_ui", default="off"), "off")
+
+        self.assertEqual([f.stats.counters["partial_parses"] for f in cfg.config_files], [1, 1])
+        self.assertEqual([f.stats.counters["parses"] for f in cfg.config_files], [1, 1])
+
+        with open(self.global_, "w") as f:
+            json.dump({"features": {"new_ui": "on"}}, f)
+
+        self.assertEqual(cfg.get("features.new_ui", default="off"), "on")
+        self.assertEqual([f.stats.counters["partial_parses"] for f in cfg.config_files], [1, 1])
+        self.assertEqual([f.stats.counters["parses"] for f in cfg.config_files], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig.config.shared import SharedConfig, SharedConfigPublisher
+from clickfig.index import KeyIndex
+
+LOCAL = {
+    "upstream": {"api": {"host": "10.0.0.1", "port": 8081}},
+    "pool": {"db": {"timeout": 5}},
+    "hosts": {"example.com": {"weight": 3}},
+    "log": "debug"
+}
+
+GLOBAL = {
+    "upstream": {"api": {"host": "api.internal", "port": 80}, "web": {"host": "web.internal"}},
+    "pool": {"db": {"timeout": 30, "size": 10}, "cache": {"timeout": 1}},
+    "upstream-extra": {"host": "other"},
+    "log": {"level": "info"}
+}
+
+
+class TestKeyQueries(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.local = os.path.join(self.dir, "local.json")
+        self.global_ = os.path.join(self.dir, "global.json")
+
+        with open(self.local, "w") as f:
+            json.dump(LOCAL, f)
+
+        with open(self.global_, "w") as f:
+            json.dump(GLOBAL, f)
+
+        self.cfg = clickfig.Config([{"name": self.local, "level": "local"},
+                                    {"name": self.global_, "level": "global"}])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_prefix(self):
+        self.assertEqual(self.cfg.items(prefix="upstream"), [
+            ("upstream.api.host", "10.0.0.1"),
+            ("upstream.api.port", 8081),
+            ("upstream.web.host", "web.internal")
+        ])
+
+        self.assertEqual(self.cfg.keys(prefix="pool.db"), ["pool.db.size", "pool.db.timeout"])
+        self.assertEqual(self.cfg.keys(prefix="pool.db.timeout"), ["pool.db.timeout"])
+        self.assertEqual(self.cfg.keys(prefix="hosts"), ["hosts.example\\.com.weight"])
+        self.assertEqual(self.cfg.keys(prefix="nope"), [])
+
+    def test_everything(self):
+        keys = self.cfg.keys()
+
+        self.assertEqual(keys, sorted(keys))
+        self.assertTrue("upstream-extra.host" in keys)
+        self.assertTrue("log" in keys)
+        self.assertTrue("log.level" in keys)
+        self.assertEqual(len(keys), len(set(keys)))
+
+    def test_pattern(self):
+        self.assertEqual(self.cfg.items(pattern="pool.*.timeout"), [("pool.cache.timeout", 1), ("pool.db.timeout", 5)])
+        self.assertEqual(self.cfg.keys(pattern="upstream.*"), ["upstream.api", "upstream.web"])
+        self.assertEqual(self.cfg.keys(pattern="upstream*.host"), ["upstream-extra.host"])
+        self.assertEqual(self.cfg.keys(pattern="hosts.*.weight"), ["hosts.example\\.com.weight"])
+        self.assertEqual(self.cfg.keys(pattern="*.api.po?t"), ["upstream.api.port"])
+        self.assertEqual(self.cfg.keys(pattern="pool.*.nope"), [])
+
+        # Sections come with their value from the highest-precedence level, as with read.
+        self.assertEqual(dict(self.cfg.items(pattern="upstream.api")[0][1]), LOCAL["upstream"]["api"])
+
+        with self.assertRaises(ValueError):
+            self.cfg.keys(prefix="pool", pattern="pool.*")
+
+    def test_changes(self):
+        self.cfg.write("upstream.new.host", "new", level="global")
+        self.assertEqual(self.cfg.keys(pattern="upstream.*"), ["upstream.api", "upstream.new", "upstream.web"])
+
+    def test_shared(self):
+        publisher = SharedConfigPublisher(self.cfg, name="clickfig-test-queries-{}".format(os.getpid()))
+        publisher.publish()
+        shared = SharedConfig(publisher.name)
+
+        try:
+            for prefix in [None, "upstream", "pool.db", "hosts", "log", "nope"]:
+                self.assertEqual(shared.items(prefix=prefix), self.cfg.items(prefix=prefix))
+
+            for pattern in ["pool.*.timeout", "upstream.*", "upstream*.host", "hosts.*.weight", "*.api.po?t", "*"]:
+                self.assertEqual(shared.items(pattern=pattern), self.cfg.items(pattern=pattern))
+        finally:
+            shared.close()
+            publisher.close()
+
+
+class TestKeyIndex(unittest.TestCase):
+    def test_leaves_under(self):
+        index = KeyIndex({"a": {"b": 1, "c": {"d": 2}}, "a-b": 3, "ab": 4})
+
+        self.assertEqual(index.sorted_leaves, ["a-b", "a.b", "a.c.d", "ab"])
+        self.assertEqual(index.leaves_under("a"), ["a.b", "a.c.d"])
+        self.assertEqual(index.leaves_under("ab"), ["ab"])
+        self.assertEqual(index.leaves_under(), ["a-b", "a.b", "a.c.d", "ab"])
+
+    def test_separator(self):
+        index = KeyIndex({"a": {"b": 1}, "a~b": 2}, separator="::")
+
+        self.assertEqual(index.leaves_under("a"), ["a::b"])
+        self.assertEqual(sorted(index.match("a::*")), ["a::b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
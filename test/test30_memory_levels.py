@@ -0,0 +1,179 @@
+from __future__ import absolute_import
+import sys
+
+sys.path = ['..', '.'] + sys.path
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import clickfig
+from clickfig.config.file.memory import DictConfigFile, EnvConfigFile
+
+
+class MemoryLevelsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.name = os.path.join(self.dir, "local.json")
+
+        with open(self.name, "w") as f:
+            json.dump({"server": {"port": 8080}, "log": {"level": "info"}}, f)
+
+        self.cfg = clickfig.Config([{"name": self.name, "level": "local"},
+                                    {"level": "defaults", "data": {"server.port": 80, "server.timeout": 30}}])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+class TestMemoryLevels(MemoryLevelsTestCase):
+    def test_dict_level(self):
+        self.assertEqual(self.cfg.read(key="server.port").data, 8080)
+        self.assertEqual(self.cfg.read(key="server.timeout").data, 30)
+        self.assertEqual(self.cfg.levels, ["local", "defaults"])
+
+        self.cfg.write("server.timeout", 60, level="defaults")
+        self.assertEqual(self.cfg.read(key="server.timeout").data, 60)
+
+        self.cfg.unset("server.port", level="defaults")
+        self.assertEqual(self.cfg.file_by_level("defaults").read(key="server", flatten=False).data, {"timeout": 60})
+        self.assertEqual(os.listdir(self.dir), ["local.json"])
+
+    def test_dict_file(self):
+        config_file = DictConfigFile({"a.b": 1, "c": {"d": 2}}, level="test")
+
+        self.assertEqual(config_file.read(key="a.b").data, 1)
+        self.assertEqual(config_file.read(key="c.d").data, 2)
+
+        config_file.write("a.b", 3)
+        self.assertEqual(config_file.read(key="a.b").data, 3)
+        self.assertEqual(config_file.stats.counters["stat_calls"], 0)
+
+    def test_env_level(self):
+        environ = {"MYAPP_SERVER__PORT": "9090", "MYAPP_DEBUG": "yes", "OTHER": "no"}
+        config_file = EnvConfigFile("MYAPP_", environ=environ)
+
+        self.assertEqual(config_file.read(flatten=False).data, {"server": {"port": "9090"}, "debug": "yes"})
+
+        environ["MYAPP_DEBUG"] = "no"
+        self.assertEqual(config_file.read(key="debug").data, "yes")
+
+        config_file.invalidate()
+        self.assertEqual(config_file.read(key="debug").data, "no")
+
+        with self.assertRaises(NotImplementedError):
+            config_file.write("debug", "maybe")
+
+    def test_env_section_and_key(self):
+        # Keys within a section win over a variable for the section itself, whatever the order of the variables.
+        for environ in [{"MYAPP_SERVER": "x", "MYAPP_SERVER__PORT": "1"},
+                        {"MYAPP_SERVER__PORT": "1", "MYAPP_SERVER": "x"}]:
+            with self.assertLogs("clickfig.config.file.memory", level="WARNING") as logs:
+                config_file = EnvConfigFile("MYAPP_", environ=environ)
+
+            self.assertEqual(config_file.read(flatten=False).data, {"server": {"port": "1"}})
+            self.assertIn("MYAPP_SERVER,", logs.output[0])
+
+    def test_env_in_config(self):
+        os.environ["CLICKFIG_TEST_SERVER__PORT"] = "7070"
+
+        try:
+            cfg = clickfig.Config([{"level": "env", "env": "CLICKFIG_TEST_"}, {"name": self.name, "level": "local"}])
+            self.assertEqual(cfg.read(key="server.port").data, "7070")
+            self.assertEqual(self.cfg.with_env("CLICKFIG_TEST_").get("server.port"), "7070")
+        finally:
+            del os.environ["CLICKFIG_TEST_SERVER__PORT"]
+
+    def test_snapshot(self):
+        # In-memory levels are left out of the snapshot, which goes next to the first file on disk.
+        cwd = os.getcwd()
+        elsewhere = tempfile.mkdtemp()
+        os.chdir(elsewhere)
+
+        try:
+            def config():
+                return clickfig.Config([{"level": "overrides", "data": {"server.port": 9090}},
+                                        {"name": self.name, "level": "local"}], snapshot=True)
+
+            cfg = config()
+            self.assertEqual(cfg.get("server.port"), 9090)
+            self.assertEqual(os.path.dirname(cfg.snapshot_path), self.dir)
+
+            self.assertEqual(len([x for x in os.listdir(self.dir) if x.endswith(".snapshot")]), 1)
+            self.assertEqual(os.listdir("."), [])
+            mtime = os.stat(cfg.snapshot_path).st_mtime_ns
+
+            cfg = config()
+            self.assertEqual(cfg.get("server.port"), 9090)
+            self.assertEqual(cfg.get("log.level"), "info")
+            self.assertEqual(cfg.config_files[1].stats.counters["parses"], 0)
+            self.assertEqual(os.stat(cfg.snapshot_path).st_mtime_ns, mtime)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(elsewhere)
+
+
+class TestOverrides(MemoryLevelsTestCase):
+    def test_overrides(self):
+        overlay = self.cfg.with_overrides({"server.port": 9090, "feature": {"new_ui": True}})
+
+        self.assertEqual(overlay.levels, ["overrides", "local", "defaults"])
+        self.assertEqual(overlay.read(key="server.port").data, 9090)
+        self.assertEqual(overlay.get("server.timeout"), 30)
+        self.assertEqual(overlay.get("feature.new_ui"), True)
+        self.assertEqual(overlay.read_many(["log.level", "server.port"]), {"log.level": "info", "server.port": 9090})
+        self.assertEqual(overlay.keys(prefix="server"), ["server.port", "server.timeout"])
+
+        self.assertEqual(self.cfg.read(key="server.port").data, 8080)
+        self.assertFalse(self.cfg.has("feature"))
+
+    def test_shares_parsed_data(self):
+        self.cfg.read(key="server.port")
+        overlay = self.cfg.with_overrides({"server.port": 9090})
+        overlay.read(key="log.level")
+
+        self.assertIs(overlay.config_files[1], self.cfg.config_files[0])
+        self.assertIs(overlay._combined_index().maps[1], self.cfg._combined_index())
+        self.assertEqual(self.cfg.config_files[0].stats.counters["parses"], 1)
+
+    def test_sees_file_changes(self):
+        overlay = self.cfg.with_overrides({"server.port": 9090})
+        self.assertEqual(overlay.get("log.level"), "info")
+
+        self.cfg.write("log.level", "debug", level="local")
+        self.assertEqual(overlay.get("log.level"), "debug")
+        self.assertEqual(overlay.get("server.port"), 9090)
+
+    def test_writes_stay_in_the_overlay(self):
+        overlay = self.cfg.with_overrides({})
+        overlay.write("server.port", 1234)
+
+        self.assertEqual(overlay.get("server.port"), 1234)
+        self.assertEqual(self.cfg.get("server.port"), 8080)
+
+        with open(self.name) as f:
+            self.assertEqual(json.load(f)["server"]["port"], 8080)
+
+    def test_stacked(self):
+        overlay = self.cfg.with_overrides({"server.port": 9090})
+        request = overlay.with_overrides({"server.timeout": 5}, level="request")
+
+        self.assertEqual(request.levels, ["request", "overrides", "local", "defaults"])
+        self.assertEqual(request.get("server.port"), 9090)
+        self.assertEqual(request.get("server.timeout"), 5)
+        self.assertEqual(overlay.get("server.timeout"), 30)
+
+        with self.assertRaises(ValueError):
+            overlay.with_overrides({})
+
+    def test_fingerprint(self):
+        overlay = self.cfg.with_overrides({"server.port": 8080})
+        self.assertEqual(overlay.fingerprint(), self.cfg.fingerprint())
+
+        overlay = self.cfg.with_overrides({"server.port": 9090})
+        self.assertEqual(self.cfg.diff(overlay).changed, {"server.port"})
+
+
+if __name__ == "__main__":
+    unittest.main()